@@ -0,0 +1,73 @@
+# ACE YAML Benchmark
+# Parse and dump throughput of a generated ACE game two ways: ruamel's pure Python round trip (what
+# rpgmakerace used before) and loadYAML/dumpYAML from modules/aceyaml.py. No translation, it's the
+# cost of getting the files in and out, and both have to write the same bytes. Run from the project
+# folder with
+# python -m benchmarks.aceyaml [size, e.g. 20MB]
+# ruamel manages about 100 KiB/s, keep the size small.
+import io
+import os
+import sys
+import tempfile
+import time
+
+from ruamel.yaml.comments import CommentedMap, CommentedSeq
+
+from benchmarks import corpus
+from modules import aceyaml
+
+#Globals
+SIZE = corpus.parseSize(sys.argv[1]) if len(sys.argv) > 1 else 5 * 1048576
+
+def runRuamel(text):
+    start = time.perf_counter()
+    data = aceyaml.getYAML().load(text)
+    parsed = time.perf_counter()
+    output = io.StringIO()
+    aceyaml.getYAML().dump(data, output)
+    return [parsed - start, time.perf_counter() - parsed, output.getvalue(), False]
+
+def runFast(text):
+    start = time.perf_counter()
+    data = aceyaml.loadYAML(io.StringIO(text))
+    parsed = time.perf_counter()
+    output = io.StringIO()
+    aceyaml.dumpYAML(data, output)
+    fallback = isinstance(data, (CommentedMap, CommentedSeq))
+    return [parsed - start, time.perf_counter() - parsed, output.getvalue(), fallback]
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        lines, written = corpus.writeCorpus('ace', folder, size=SIZE)
+        texts = []
+        for filename in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, filename), 'r', encoding='utf-8') as f:
+                texts.append([filename, f.read()])
+    size = written / 1048576
+    print('ACE game {0:.1f} MiB, {1} files, ruamel.yaml.clib {2}'.format(size, len(texts),
+        'installed' if aceyaml.CParser is not None else 'not installed (fast path falls back to ruamel)'))
+
+    results = {'ruamel': [0, 0], 'fast': [0, 0]}
+    same = True
+    fallbacks = 0
+    for filename, text in texts:
+        parse, dump, expected, _ = runRuamel(text)
+        results['ruamel'][0] += parse
+        results['ruamel'][1] += dump
+        parse, dump, output, fallback = runFast(text)
+        results['fast'][0] += parse
+        results['fast'][1] += dump
+        same = same and output == expected
+        fallbacks += fallback
+        if output != expected:
+            print(filename + ' is different')
+
+    print('\n{0:<8} {1:>10} {2:>10} {3:>10} {4:>10} {5:>10}'.format('Mode', 'Parse (s)', 'MiB/s', 'Dump (s)', 'MiB/s', 'Same'))
+    for mode, [parse, dump] in results.items():
+        print('{0:<8} {1:>10.2f} {2:>10.2f} {3:>10.2f} {4:>10.2f} {5:>10}'.format(mode, parse, size / parse, dump,
+            size / dump, str(same) if mode == 'fast' else '-'))
+    print('\nSpeedup: parse {0:.1f}x, dump {1:.1f}x, {2} of {3} files fell back to ruamel'.format(
+        results['ruamel'][0] / results['fast'][0], results['ruamel'][1] / results['fast'][1], fallbacks, len(texts)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+# Corpus
+# Synthetic games for every engine in modules/cli.py ENGINES, in the layout each handler parses, so the
+# benchmarks can run at any size without commercial game data. Text is stitched from Japanese phrases,
+# message boxes follow the usual spread of 1-4 line 401 runs, and speaker tags, control codes, choices
+# and non text commands show up about as often as they do in real games. Everything is written a
+# record at a time so a 500 MB game doesn't have to fit in memory. Generate one with
+# python -m benchmarks.corpus <engine|all> <size, e.g. 1MB or 500MB> [folder]
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+
+#Globals
+SEED = 1234
+MAPLINES = 1500         # Average translatable lines per Map file, real maps spread widely around it
+TEXTLINES = 5000        # Lines per file for the script formats
+COMMONSHARE = 0.25      # Part of an MV/MZ or ACE game that lives in CommonEvents
+TROOPSHARE = 0.05       # Part that lives in Troops
+PHRASES = ['こんにちは', '今日は', 'いい天気', 'ですね', 'まさか', '本当に', '行こう', 'ありがとう', '勇者', '魔王',
+    'この村', 'には', '古い', '言い伝え', 'がある', 'んだ', '私は', 'あなたを', '信じて', 'いる', 'お金', 'が足りない',
+    '森の奥', 'へ', '向かえ', '気をつけて', 'ください', 'え？', 'そんな', 'はずは', 'ない', '宿屋', 'に泊まる', '明日',
+    'また来てね', '剣', 'を手に入れた', '扉が', '開かない', 'どうして', '待って', 'ここは', '危ない']
+ENDINGS = ['。', '！', '？', '…', '……', '！？', '']
+NAMES = ['アイル', 'リラ', 'ミーナ', 'ガルド', '村人', '兵士', '商人', '老人', '少女', '宿屋の主人', '王様', '？？？']
+CHOICES = ['はい', 'いいえ', 'もう一度', 'やめる', '話を聞く', '立ち去る', '買う', '売る']
+RUNLENGTHS = [[1, 2, 3, 4], [25, 30, 30, 15]]           # 401 lines per message box
+CHOICECOUNTS = [[2, 3, 4], [60, 25, 15]]
+PAGECOUNTS = [[1, 2, 3], [70, 20, 10]]
+
+def getLine(rng, codes=True):
+    # One line of a message box, 8-30 characters with control codes sprinkled in
+    phrases = [rng.choice(PHRASES) for _ in range(int(rng.triangular(1, 7, 3)))]
+    if codes:
+        if rng.random() < 0.15:
+            k = rng.randrange(len(phrases))
+            phrases[k] = '\\C[' + str(rng.randint(1, 24)) + ']' + phrases[k] + '\\C[0]'
+        if rng.random() < 0.05:
+            phrases.insert(rng.randrange(len(phrases) + 1), '\\V[' + str(rng.randint(1, 200)) + ']')
+        if rng.random() < 0.05:
+            phrases.insert(0, '\\N[' + str(rng.randint(1, 8)) + ']')
+        if rng.random() < 0.03:
+            phrases.insert(rng.randrange(len(phrases) + 1), '\\I[' + str(rng.randint(1, 400)) + ']')
+        if rng.random() < 0.10:
+            phrases.append(rng.choice(['\\.', '\\|', '\\!']))
+    return ''.join(phrases) + rng.choice(ENDINGS)
+
+def getRun(rng):
+    return [getLine(rng) for _ in range(rng.choices(*RUNLENGTHS)[0])]
+
+def getSpeaker(rng):
+    # [Name Box, Name Tag], MZ has a name box, MV games use a \n<Name> tag plugin, the rest is narration
+    roll = rng.random()
+    if roll < 0.45:
+        return [rng.choice(NAMES), None]
+    if roll < 0.65:
+        return ['', rng.choice(NAMES)]
+    return ['', None]
+
+def getNoise(rng, keys, indent):
+    # Commands with nothing to translate between messages
+    noise = [
+        [230, [rng.choice([15, 30, 60])]],
+        [250, [{'name': 'Cursor1', 'volume': 90, 'pitch': 100, 'pan': 0}]],
+        [121, [rng.randint(1, 50), rng.randint(1, 50), rng.randint(0, 1)]],
+        [122, [rng.randint(1, 50), rng.randint(1, 50), 0, 0, rng.randint(0, 9)]],
+        [213, [-1, rng.randint(1, 12), False]],
+        [355, ['$gameVariables.setValue(' + str(rng.randint(1, 50)) + ', 0)']],
+    ]
+    return [{keys[0]: code, keys[1]: indent, keys[2]: parameters} for code, parameters in
+        rng.sample(noise, rng.choices([0, 1, 2, 3], [40, 30, 20, 10])[0])]
+
+def getMessage(rng, keys, indent, ace=False):
+    # Returns [Commands, Translatable Strings]
+    name, tag = getSpeaker(rng)
+    lines = getRun(rng)
+    if tag is not None:
+        lines[0] = '\\n<' + tag + '>' + lines[0]
+    face = ['Actor1', rng.randint(0, 7), 0, 2] if rng.random() < 0.5 else ['', 0, 0, 2]
+    commands = [{keys[0]: 101, keys[1]: indent, keys[2]: face if ace else face + [name]}]
+    commands += [{keys[0]: 401, keys[1]: indent, keys[2]: [line]} for line in lines]
+    return [commands, len(lines) + (1 if name != '' and not ace else 0)]
+
+def getChoice(rng, keys, indent, ace=False):
+    # 102 with a 402 branch per choice, each answered by a message, closed with 404
+    choices = rng.sample(CHOICES, rng.choices(*CHOICECOUNTS)[0])
+    commands = [{keys[0]: 102, keys[1]: indent, keys[2]: [choices, 1, 0, 2, 0]}]
+    count = len(choices)
+    for k, choice in enumerate(choices):
+        commands.append({keys[0]: 402, keys[1]: indent, keys[2]: [k, choice]})
+        message = getMessage(rng, keys, indent + 1, ace)
+        commands += message[0]
+        commands.append({keys[0]: 0, keys[1]: indent + 1, keys[2]: []})
+        count += message[1]
+    commands.append({keys[0]: 404, keys[1]: indent, keys[2]: []})
+    return [commands, count]
+
+def getList(rng, lines, keys, ace=False):
+    # Event command list with about this many translatable strings
+    commands = []
+    count = 0
+    while count < lines:
+        commands += getNoise(rng, keys, 0)
+        message = getChoice(rng, keys, 0, ace) if count > 0 and rng.random() < 0.08 else getMessage(rng, keys, 0, ace)
+        commands += message[0]
+        count += message[1]
+    commands.append({keys[0]: 0, keys[1]: 0, keys[2]: []})
+    return [commands, count]
+
+def splitLines(rng, lines, average):
+    # Sizes of the files or events holding lines, skewed like real games (a few huge, many small)
+    sizes = []
+    while lines > 0:
+        size = min(lines, max(1, int(rng.lognormvariate(0, 0.8) * average)))
+        sizes.append(size)
+        lines -= size
+    return sizes
+
+def getSystem():
+    # Stock MV/MZ System terms
+    return {
+        'gameTitle': '勇者の伝説',
+        'armorTypes': ['', '一般防具', '魔法防具', '軽装防具', '重装防具', '小型盾', '大型盾'],
+        'equipTypes': ['', '武器', '盾', '頭', '身体', '装飾品'],
+        'skillTypes': ['', '魔法', '必殺技'],
+        'variables': [''] + ['変数' + str(i) for i in range(1, 21)],
+        'terms': {
+            'basic': ['レベル', 'Lv', 'ＨＰ', 'HP', 'ＭＰ', 'MP', 'ＴＰ', 'TP', '経験値', 'EXP'],
+            'commands': ['戦う', '逃げる', '攻撃', '防御', 'アイテム', 'スキル', '装備', 'ステータス', '並び替え', 'セーブ',
+                'ゲーム終了', 'オプション', '武器', '防具', '大事なもの', '装備', '最強装備', '全て外す', 'ニューゲーム',
+                'コンティニュー', None, 'タイトルへ', 'やめる', None, '購入する', '売却する'],
+            'params': ['最大ＨＰ', '最大ＭＰ', '攻撃力', '防御力', '魔法力', '魔法防御', '敏捷性', '運', '命中率', '回避率'],
+            'messages': {
+                'actionFailure': '%1には効かなかった！',
+                'actorDamage': '%1は %2 のダメージを受けた！',
+                'actorNoDamage': '%1はダメージを受けていない！',
+                'alwaysDash': '常時ダッシュ',
+                'bgmVolume': 'BGM 音量',
+                'buffAdd': '%1の%2が上がった！',
+                'commandRemember': 'コマンド記憶',
+                'defeat': '%1は戦いに敗れた。',
+                'emerge': '%1が出現！',
+                'escapeFailure': 'しかし逃げることはできなかった！',
+                'escapeStart': '%1は逃げ出した！',
+                'expNext': '次の%1まで',
+                'expTotal': '現在の%1',
+                'file': 'ファイル',
+                'levelUp': '%1は%2 %3 に上がった！',
+                'loadMessage': 'どのファイルをロードしますか？',
+                'obtainExp': '%1 の%2を獲得！',
+                'obtainGold': 'お金を %1\\G 手に入れた！',
+                'obtainItem': '%1を手に入れた！',
+                'possession': '持っている数',
+                'saveMessage': 'どのファイルにセーブしますか？',
+                'victory': '%1の勝利！',
+            },
+        },
+    }
+
+def getACESystem():
+    # Stock ACE System terms with the key names rvpacker dumps
+    return {
+        'game_title': '勇者の伝説',
+        'elements': ['', '物理', '炎', '氷', '雷', '水', '土', '風', '光', '闇'],
+        'skill_types': ['', '魔法', '必殺技'],
+        'weapon_types': ['', '斧', '爪', '槍', '剣', '刀', '弓', '短剣', 'ハンマー', '杖', '銃'],
+        'armor_types': ['', '一般防具', '魔法防具', '軽装防具', '重装防具', '小型盾', '大型盾'],
+        'switches': [''] + ['スイッチ' + str(i) for i in range(1, 21)],
+        'variables': [''] + ['変数' + str(i) for i in range(1, 21)],
+        'terms': {
+            'basic': ['レベル', 'Lv', 'ＨＰ', 'HP', 'ＭＰ', 'MP', 'ＴＰ', 'TP'],
+            'params': ['最大ＨＰ', '最大ＭＰ', '攻撃力', '防御力', '魔法力', '魔法防御', '敏捷性', '運'],
+            'etypes': ['武器', '盾', '頭', '身体', '装飾品'],
+            'commands': ['戦う', '逃げる', '攻撃', '防御', 'アイテム', 'スキル', '装備', 'ステータス', '並び替え', 'セーブ',
+                'ゲーム終了', None, '武器', '防具', '大事なもの', '装備変更', '最強装備', '全て外す', 'ニューゲーム',
+                'コンティニュー', 'シャットダウン', 'タイトルへ', 'やめる'],
+        },
+    }
+
+def writeJSONRecords(path, records, first=None):
+    # A JSON array written one record at a time, MV/MZ arrays start with null
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n' + json.dumps(first))
+        for record in records:
+            f.write(',\n' + json.dumps(record[0], ensure_ascii=False))
+            count += record[1]
+        f.write('\n]')
+    return count
+
+def getCommonEvents(rng, lines, keys, ace=False):
+    for k, size in enumerate(splitLines(rng, lines, 200)):
+        commands, count = getList(rng, size, keys, ace)
+        yield [{'id': k + 1, 'list': commands, 'name': 'CE' + str(k + 1), 'switchId': 1, 'trigger': 0}, count]
+
+def getTroops(rng, lines, keys, ace=False):
+    for k, size in enumerate(splitLines(rng, lines, 30)):
+        commands, count = getList(rng, size, keys, ace)
+        page = {'conditions': {'turnEnding': False, 'turnValid': True, 'turnA': 0, 'turnB': 0}, 'list': commands, 'span': 0}
+        yield [{'id': k + 1, 'members': [{'enemyId': 1, 'x': 400, 'y': 300, 'hidden': False}], 'name': rng.choice(NAMES) + '×2',
+            'pages': [page]}, count]
+
+def getMap(rng, lines, keys, ace=False):
+    # [Map, Count], events are a list in MV/MZ and an id keyed mapping in ACE
+    events = [None] if not ace else {}
+    count = 0
+    for size in splitLines(rng, lines, 40):
+        pages = []
+        for pageLines in splitLines(rng, size, size / rng.choices(*PAGECOUNTS)[0]):
+            commands, pageCount = getList(rng, pageLines, keys, ace)
+            pages.append({'list': commands})
+            count += pageCount
+        if ace:
+            events[len(events) + 1] = {'id': len(events) + 1, 'name': 'EV' + str(len(events) + 1), 'pages': pages}
+        else:
+            events.append({'id': len(events), 'name': 'EV' + str(len(events)), 'note': '', 'pages': pages})
+    if ace:
+        return [{'display_name': rng.choice(['町', '森', '城', '洞窟', '港']), 'events': events}, count]
+    return [{'displayName': rng.choice(['町', '森', '城', '洞窟', '港']), 'events': events, 'note': ''}, count]
+
+def writeMVMZ(rng, folder, lines):
+    keys = ['code', 'indent', 'parameters']
+    with open(os.path.join(folder, 'System.json'), 'w', encoding='utf-8') as f:
+        json.dump(getSystem(), f, ensure_ascii=False)
+    count = writeJSONRecords(os.path.join(folder, 'Troops.json'), getTroops(rng, int(lines * TROOPSHARE), keys))
+    count += writeJSONRecords(os.path.join(folder, 'CommonEvents.json'), getCommonEvents(rng, int(lines * COMMONSHARE), keys))
+    for k, size in enumerate(splitLines(rng, max(1, lines - count), MAPLINES)):
+        data, mapCount = getMap(rng, size, keys)
+        with open(os.path.join(folder, 'Map' + str(k + 1).zfill(3) + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        count += mapCount
+    return count
+
+def quoteYAML(value):
+    if value is None:
+        return '~'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + value.replace("'", "''") + "'"
+
+def getYAMLLines(value, indent):
+    # Block style the way the ACE module writes it (single quoted strings, no line folding)
+    pad = ' ' * indent
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and len(item) > 0:
+                yield pad + str(key) + ':\n'
+                yield from getYAMLLines(item, indent + 2)
+            else:
+                yield pad + str(key) + ': ' + (('{}' if isinstance(item, dict) else '[]') if isinstance(item, (dict, list)) \
+                    else quoteYAML(item)) + '\n'
+    else:
+        for item in value:
+            if isinstance(item, (dict, list)) and len(item) > 0:
+                lines = list(getYAMLLines(item, indent + 2))
+                yield pad + '- ' + lines[0][indent + 2:]
+                yield from lines[1:]
+            else:
+                yield pad + '- ' + (('{}' if isinstance(item, dict) else '[]') if isinstance(item, (dict, list)) \
+                    else quoteYAML(item)) + '\n'
+
+def writeYAML(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(getYAMLLines(data, 0))
+
+def writeACE(rng, folder, lines):
+    keys = ['c', 'i', 'p']
+    writeYAML(os.path.join(folder, 'System.yaml'), getACESystem())
+    count = 0
+    for name, records in [['Troops.yaml', getTroops(rng, int(lines * TROOPSHARE), keys, True)],
+        ['CommonEvents.yaml', getCommonEvents(rng, int(lines * COMMONSHARE), keys, True)]]:
+        # One record at a time, each is a '- ' item of the top level list
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            f.write('- ~\n')
+            for record, recordCount in records:
+                f.writelines(getYAMLLines([record], 0))
+                count += recordCount
+    for k, size in enumerate(splitLines(rng, max(1, lines - count), MAPLINES)):
+        data, mapCount = getMap(rng, size, keys, True)
+        writeYAML(os.path.join(folder, 'Map' + str(k + 1).zfill(3) + '.yaml'), data)
+        count += mapCount
+    return count
+
+def writeTextFiles(rng, folder, lines, name, extension, encoding, getBlock, end=''):
+    # Script formats, getBlock returns [Text, Translatable Lines] for one scene chunk, end closes each file
+    count = 0
+    for k, size in enumerate(splitLines(rng, lines, TEXTLINES)):
+        with open(os.path.join(folder, name + str(k + 1).zfill(3) + '.' + extension), 'w', encoding=encoding, newline='') as f:
+            fileCount = 0
+            while fileCount < size:
+                text, blockCount = getBlock(rng, fileCount)
+                f.write(text)
+                fileCount += blockCount
+            f.write(end)
+            count += fileCount
+    return count
+
+def getTyranoBlock(rng, count):
+    text = ''
+    if rng.random() < 0.1:
+        text += '*scene' + str(count) + '\n[cm]\n[bg storage="bg' + str(rng.randint(1, 30)) + '.jpg" time="500"]\n'
+    if rng.random() < 0.05:
+        text += '[playbgm storage="bgm' + str(rng.randint(1, 10)).zfill(2) + '.ogg"]\n;BGM\n'
+    if count > 0 and rng.random() < 0.05:
+        choices = rng.sample(CHOICES, rng.choices(*CHOICECOUNTS)[0])
+        for k, choice in enumerate(choices):
+            text += '[glink color="black" size="20" text="' + choice + '" target="*choice' + str(k) + '"]\n'
+        return [text + '[s]\n', len(choices)]
+    name = getSpeaker(rng)[0]
+    lines = [getLine(rng, False) for _ in range(rng.choices(*RUNLENGTHS)[0])]
+    if name != '':
+        text += '[' + name + ']\n'
+    text += ''.join([line + '[r]\n' for line in lines[:-1]]) + lines[-1] + '[p]\n'
+    return [text, len(lines) + (1 if name != '' else 0)]
+
+def getKansenBlock(rng, count):
+    text = ''
+    if rng.random() < 0.1:
+        text += '[bg storage="bg' + str(rng.randint(1, 30)) + '" time=500]\n[wait time=300]\n'
+    if count > 0 and rng.random() < 0.05:
+        choices = rng.sample(CHOICES, rng.choices(*CHOICECOUNTS)[0])
+        for k, choice in enumerate(choices):
+            text += '[eval exp="f.seltext' + str(k + 1) + '=\'' + choice + '\'"]\n'
+        return [text + '[select]\n', len(choices)]
+    name = getSpeaker(rng)[0]
+    lines = [getLine(rng, False) for _ in range(rng.choices(*RUNLENGTHS)[0])]
+    if name != '':
+        text += '[ns]' + name + '[nse]\n'
+        lines[0] = '「' + lines[0]
+        lines[-1] = lines[-1] + '」'
+    text += ''.join([line + '[r]\n' for line in lines[:-1]]) + lines[-1] + '[pcms]\n'
+    return [text, len(lines) + (1 if name != '' else 0)]
+
+def getLuneBlock(rng, count):
+    # Speaker marker then name then line, 00000000 for narration. Choices are a hex encoded Shift-JIS record
+    if count > 0 and rng.random() < 0.03:
+        choices = rng.sample(CHOICES, rng.choices(*CHOICECOUNTS)[0])
+        record = b'\x01\x00\x41\x00\x00\x00\x02' + ''.join(['d' + choice + ',' for choice in choices]).encode('shiftjis')
+        return [record.hex() + '\n', len(choices)]
+    name = getSpeaker(rng)[0]
+    line = ''.join([getLine(rng, False) for _ in range(rng.choices(*RUNLENGTHS)[0])])
+    if name == '':
+        return ['00000000\n' + line + '\n', 1]
+    return ['0000' + str(rng.randint(1, 9)) + '000\n' + name + '\n' + line + '\n', 2]
+
+def getAtelierBlock(rng, count):
+    text = ''
+    if rng.random() < 0.1:
+        text += '●Event' + str(count).zfill(4) + '\n#wait ' + str(rng.choice([15, 30, 60])) + '\n'
+    lines = [getLine(rng, False) for _ in range(rng.choices(*RUNLENGTHS)[0])]
+    return [text + '◆' + str(count).zfill(6) + '◆' + '\\n'.join(lines) + '\n', 1]
+
+def getTXTBlock(rng, count):
+    name = getSpeaker(rng)[0] or '_narration'
+    lines = getRun(rng)
+    text = 's[' + str(count) + '] = "' + name + '"\n'
+    text += ''.join(['m[' + str(count + k) + '] = "' + line.replace('\\', '\\\\') + '"\n' for k, line in enumerate(lines)])
+    return [text, len(lines)]
+
+def writeCSV(rng, folder, lines):
+    # Translator++ export, original in column 1, translation (mostly empty) in column 2
+    count = 0
+    for k, size in enumerate(splitLines(rng, lines, TEXTLINES)):
+        with open(os.path.join(folder, 'Text' + str(k + 1).zfill(3) + '.csv'), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=',', quotechar='\"')
+            for _ in range(size):
+                writer.writerow(['\n'.join(getRun(rng)), 'Translated' if rng.random() < 0.05 else ''])
+            count += size
+    return count
+
+def writeJSON(rng, folder, lines):
+    count = 0
+    for k, size in enumerate(splitLines(rng, lines, TEXTLINES)):
+        data = {}
+        for i in range(size):
+            name = getSpeaker(rng)[0]
+            data[str(i + 1)] = {'name': name if name != '' else '-', 'text': '\n'.join(getRun(rng))}
+        with open(os.path.join(folder, 'Text' + str(k + 1).zfill(3) + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        count += size
+    return count
+
+def writeAnim(rng, folder, lines):
+    count = 0
+    for k, size in enumerate(splitLines(rng, lines, TEXTLINES)):
+        data = {}
+        while len(data) < size:
+            data['\n'.join(getRun(rng)) + '#' + str(len(data))] = ''
+        with open(os.path.join(folder, 'Text' + str(k + 1).zfill(3) + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        count += size
+    return count
+
+# Engine -> Writer(rng, folder, lines), returns the translatable lines written
+WRITERS = {
+    'mvmz': writeMVMZ,
+    'ace': writeACE,
+    'csv': writeCSV,
+    'txt': lambda rng, folder, lines: writeTextFiles(rng, folder, lines, 'Text', 'txt', 'utf-8', getTXTBlock),
+    'tyrano': lambda rng, folder, lines: writeTextFiles(rng, folder, lines, 'scene', 'ks', 'utf-8', getTyranoBlock),
+    'json': writeJSON,
+    'kansen': lambda rng, folder, lines: writeTextFiles(rng, folder, lines, 'scene', 'ks', 'cp932', getKansenBlock, '[return]\n'),
+    'lune': lambda rng, folder, lines: writeTextFiles(rng, folder, lines, 'script', 'txt', 'shiftjis', getLuneBlock),
+    'atelier': lambda rng, folder, lines: writeTextFiles(rng, folder, lines, 'Text', 'txt', 'utf-8', getAtelierBlock),
+    'anim': writeAnim,
+}
+
+def getFolderSize(folder):
+    return sum([os.path.getsize(os.path.join(folder, filename)) for filename in os.listdir(folder)])
+
+def getLinesForSize(engine, size, seed=SEED):
+    # Bytes per line differ a lot between formats, measure a sample game and scale it
+    with tempfile.TemporaryDirectory() as folder:
+        lines = WRITERS[engine](random.Random(seed), folder, 5000)
+        return max(1, int(size * lines / getFolderSize(folder)))
+
+def writeCorpus(engine, folder, lines=None, size=None, seed=SEED):
+    # Either about this many translatable lines or about this many bytes, returns [Lines, Bytes]
+    if lines is None:
+        lines = getLinesForSize(engine, size, seed)
+    os.makedirs(folder, exist_ok=True)
+    written = WRITERS[engine](random.Random(seed), folder, lines)
+    return [written, getFolderSize(folder)]
+
+def parseSize(size):
+    units = {'KB': 1024, 'MB': 1048576, 'GB': 1073741824}
+    size = size.upper()
+    for unit in units:
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * units[unit])
+    return int(size)
+
+def main():
+    if len(sys.argv) < 3:
+        print('Usage: python -m benchmarks.corpus <' + '|'.join(WRITERS.keys()) + '|all> <size, e.g. 1MB> [folder]')
+        sys.exit(2)
+    engines = list(WRITERS.keys()) if sys.argv[1] == 'all' else [sys.argv[1]]
+    size = parseSize(sys.argv[2])
+    root = sys.argv[3] if len(sys.argv) > 3 else 'corpus'
+    for engine in engines:
+        folder = os.path.join(root, engine) if len(engines) > 1 or len(sys.argv) <= 3 else root
+        lines, written = writeCorpus(engine, folder, size=size)
+        print('{0:<8} {1:>10} lines {2:>10.1f} MiB  {3}'.format(engine, lines, written / 1048576, folder))
+
+if __name__ == '__main__':
+    main()
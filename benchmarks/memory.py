@@ -0,0 +1,80 @@
+# Memory Benchmark
+# Peak memory and wall clock of reading and writing one big CommonEvents.json three ways: json.load
+# and json.dump (what openFiles used to do), loadJSON and dumpJSON (orjson when installed, the C
+# encoder), and the streaming Reader and Writer. No translation, it's the cost of getting the file in
+# and out, and every mode has to write the same bytes. Run from the project folder with
+# python -m benchmarks.memory [size, e.g. 200MB]
+# Each mode runs in its own process so the peaks don't mix.
+import filecmp
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import corpus
+from modules import jsonstream
+
+#Globals
+SIZE = corpus.parseSize(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != '--run' else 100 * 1048576
+MODES = ['json', 'fast', 'stream']
+SAMPLELINES = 5000
+
+def writeFile(path, size):
+    # CommonEvents.json of about size bytes, calibrated on a small one
+    keys = ['code', 'indent', 'parameters']
+    corpus.writeJSONRecords(path, corpus.getCommonEvents(random.Random(corpus.SEED), SAMPLELINES, keys))
+    lines = int(SAMPLELINES * size / os.path.getsize(path))
+    corpus.writeJSONRecords(path, corpus.getCommonEvents(random.Random(corpus.SEED), lines, keys))
+
+def runMode(mode, inPath, outPath):
+    start = time.perf_counter()
+    with open(outPath, 'w', encoding='utf-8') as outFile:
+        if mode == 'json':
+            with open(inPath, 'r', encoding='utf-8-sig') as f:
+                data = json.load(f)
+            json.dump(data, outFile, ensure_ascii=False)
+        elif mode == 'fast':
+            jsonstream.dumpJSON(jsonstream.loadJSON(inPath), outFile)
+        else:
+            writer = jsonstream.Writer(outFile)
+            with open(inPath, 'r', encoding='utf-8-sig') as f:
+                writer.start('[')
+                for event in jsonstream.Reader(f).iterItems():
+                    writer.item(event)
+                writer.end(']')
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux
+    print(json.dumps([elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024]))
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        inPath = os.path.join(workdir, 'CommonEvents.json')
+        writeFile(inPath, SIZE)
+        size = os.path.getsize(inPath) / 1048576
+        print('CommonEvents.json {0:.1f} MiB, orjson {1}'.format(size, 'installed' if jsonstream.orjson is not None else 'not installed'))
+
+        results = []
+        for mode in MODES:
+            outPath = os.path.join(workdir, mode + '.json')
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.memory', '--run', mode, inPath, outPath],
+                capture_output=True, text=True, check=True).stdout
+            elapsed, peak = json.loads(output.strip().splitlines()[-1])
+            same = filecmp.cmp(os.path.join(workdir, 'json.json'), outPath, shallow=False)
+            results.append([mode, elapsed, peak, same])
+            if mode != 'json':
+                os.remove(outPath)
+
+    print('\n{0:<8} {1:>10} {2:>10} {3:>14} {4:>10}'.format('Mode', 'Wall (s)', 'MiB/s', 'Peak RSS (MiB)', 'Same'))
+    for mode, elapsed, peak, same in results:
+        print('{0:<8} {1:>10.2f} {2:>10.1f} {3:>14.1f} {4:>10}'.format(mode, elapsed, size / elapsed, peak, str(same)))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        runMode(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        main()
@@ -0,0 +1,180 @@
+# Mock Server
+# A local stand-in for the ChatCompletion endpoint so performance can be measured without paying for it.
+# Replies are deterministic pseudo translations, every run of Japanese becomes the same English words
+# each time while ASCII (placeholders like [Color_1], <N_1>, speaker prefixes, numbers) is kept as is.
+# Batch requests get a JSON array back. Latency, jitter, 429s, timeouts and usage are set with env vars.
+# Run it on its own with
+# python -m benchmarks.mockserver [port]
+# then set api="http://127.0.0.1:<port>/v1" in .env
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#Globals
+LATENCY = float(os.getenv('mockLatency', '300')) / 1000     # Base seconds per reply
+JITTER = float(os.getenv('mockJitter', '100')) / 1000       # +/- seconds added to the latency
+PERTOKEN = float(os.getenv('mockPerToken', '0')) / 1000     # Seconds per completion token, like streaming generation
+RATELIMIT = float(os.getenv('mockRateLimit', '0'))          # Fraction of requests answered with a 429
+TIMEOUTS = float(os.getenv('mockTimeouts', '0'))            # Fraction of requests that hang past the client timeout
+HANG = float(os.getenv('mockHang', '300'))                  # Seconds a hanging request holds the connection
+SEED = int(os.getenv('mockSeed', '1234'))
+LOCK = threading.Lock()
+RNG = random.Random(SEED)
+STATS = [0, 0, 0, 0, 0]     # Requests, 429s, Timeouts, Prompt Tokens, Completion Tokens
+WORDS = ['the', 'light', 'sword', 'village', 'we', 'must', 'go', 'now', 'master', 'is', 'it', 'true', 'that', 'you',
+    'saw', 'her', 'again', 'thank', 'really', 'wait', 'here', 'forest', 'king', 'money', 'quiet', 'tomorrow']
+PUNCTUATION = {'。': '.', '、': ',', '！': '!', '？': '?', '…': '...', '「': '"', '」': '"', '『': '"', '』': '"',
+    '（': '(', '）': ')', '　': ' ', '～': '~', 'ー': '-'}
+JAPANESE = re.compile(r'[^\x00-\x7f]+')
+
+def translateRun(match):
+    # Same words for the same text on every run, about one word per two characters
+    text = match.group(0)
+    if all([char in PUNCTUATION for char in text]):
+        return ''.join([PUNCTUATION[char] for char in text])
+    rng = random.Random(hashlib.md5(text.encode('utf-8')).hexdigest())
+    words = [rng.choice(WORDS) for _ in range(max(1, len(text) // 2))]
+    return ' '.join(words) + PUNCTUATION.get(text[-1], '')
+
+def pseudoTranslate(text):
+    return JAPANESE.sub(translateRun, text)
+
+def countTokens(text):
+    # Close enough to cl100k without needing tiktoken, Japanese is about a token per character
+    japanese = sum([len(run) for run in JAPANESE.findall(text)])
+    return japanese + (len(text) - japanese + 3) // 4
+
+def getReply(messages):
+    # The last user message is the line, MV/MZ batches send a JSON array and database records a JSON
+    # object, both want the same shape back
+    content = messages[-1]['content'] if len(messages) > 0 else ''
+    if content.startswith('Lines to Translate = '):
+        try:
+            lines = json.loads(content[len('Lines to Translate = '):])
+            return json.dumps([pseudoTranslate(str(line)) for line in lines], ensure_ascii=False)
+        except ValueError:
+            pass
+    if content.startswith('Record to Translate = '):
+        try:
+            record = json.loads(content[len('Record to Translate = '):])
+            return json.dumps({key: pseudoTranslate(str(value)) for key, value in record.items()}, ensure_ascii=False)
+        except ValueError:
+            pass
+    for prefix in ['Line to Translate = ', 'Lines to Translate = ']:
+        if content.startswith(prefix):
+            content = content[len(prefix):]
+    return pseudoTranslate(content)
+
+def getFault():
+    # None, '429' or 'timeout', drawn from one seeded generator
+    with LOCK:
+        roll = RNG.random()
+    if roll < RATELIMIT:
+        return '429'
+    if roll < RATELIMIT + TIMEOUTS:
+        return 'timeout'
+    return None
+
+def getDelay(completionTokens):
+    with LOCK:
+        jitter = RNG.uniform(-JITTER, JITTER)
+    return max(0, LATENCY + jitter + PERTOKEN * completionTokens)
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def sendJSON(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', '0'))
+        try:
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            self.sendJSON(400, {'error': {'message': 'Invalid JSON', 'type': 'invalid_request_error', 'code': None}})
+            return
+        if not self.path.endswith('/chat/completions'):
+            self.sendJSON(404, {'error': {'message': 'Unknown path ' + self.path, 'type': 'invalid_request_error', 'code': None}})
+            return
+
+        with LOCK:
+            STATS[0] += 1
+        fault = getFault()
+        if fault == '429':
+            with LOCK:
+                STATS[1] += 1
+            self.sendJSON(429, {'error': {'message': 'Rate limit reached (mock)', 'type': 'requests', 'code': 'rate_limit_exceeded'}},
+                {'Retry-After': '1'})
+            return
+        if fault == 'timeout':
+            with LOCK:
+                STATS[2] += 1
+            time.sleep(HANG)
+            self.close_connection = True
+            return
+
+        messages = request.get('messages', [])
+        reply = getReply(messages)
+        promptTokens = 3 + sum([4 + countTokens(str(message.get('content', ''))) for message in messages])
+        completionTokens = countTokens(reply)
+        time.sleep(getDelay(completionTokens))
+        with LOCK:
+            STATS[3] += promptTokens
+            STATS[4] += completionTokens
+        self.sendJSON(200, {
+            'id': 'chatcmpl-mock' + str(STATS[0]),
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': promptTokens, 'completion_tokens': completionTokens,
+                'total_tokens': promptTokens + completionTokens},
+        })
+
+    def handle(self):
+        # The client hangs up on timeouts, that isn't an error here
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def startServer(port=0):
+    # Serves on a daemon thread, returns [server, api base url]
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return [server, 'http://127.0.0.1:' + str(server.server_address[1]) + '/v1']
+
+def getStats():
+    with LOCK:
+        return list(STATS)
+
+def resetStats():
+    with LOCK:
+        for i in range(len(STATS)):
+            STATS[i] = 0
+
+if __name__ == '__main__':
+    server, url = startServer(int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print('Mock ChatCompletion at ' + url + ' (Ctrl+C to stop)')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
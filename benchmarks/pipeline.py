@@ -0,0 +1,81 @@
+# Pipeline Benchmark
+# Times each stage of modules/pipeline.py on its own over generated MV/MZ maps, with the peak traced
+# memory of each stage from a second run under tracemalloc. The translate stage uses a fake translator
+# (optionally with a fixed latency per unit) so it measures the stage itself, not the API. Run from the project
+# folder with
+# python -m benchmarks.pipeline [maps] [latencyMs]
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Settings the pipeline and the MV/MZ handler read on import, the benchmark doesn't need a .env (prompt.txt
+# is read from the project folder)
+for key, value in [['api', ''], ['key', ''], ['org', ''], ['model', 'gpt-3.5-turbo'], ['language', 'English'],
+    ['timeout', '30'], ['width', '60'], ['listWidth', '100'], ['threads', '8'], ['fileThreads', '1']]:
+    os.environ.setdefault(key, value)
+
+from modules import pipeline
+
+#Globals
+MAPS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+LATENCY = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0
+SEED = 1234
+WORDS = ['こんにちは', '今日は', 'いい天気', 'ですね', 'まさか', '本当に', '行こう', 'ありがとう', '…', '！']
+
+def buildMaps(folder):
+    rng = random.Random(SEED)
+    for m in range(MAPS):
+        events = [None]
+        for e in range(rng.randint(5, 30)):
+            commands = []
+            for _ in range(rng.randint(3, 20)):
+                commands.append({'code': 101, 'indent': 0, 'parameters': ['', 0, 0, 2, rng.choice(['', 'アイル', 'リラ'])]})
+                for _ in range(rng.randint(1, 4)):
+                    line = ''.join([rng.choice(WORDS) for _ in range(rng.randint(2, 8))])
+                    commands.append({'code': 401, 'indent': 0, 'parameters': [line]})
+                if rng.random() < 0.2:
+                    commands.append({'code': 102, 'indent': 0, 'parameters': [['はい', 'いいえ'], 1, 0, 2, 0]})
+            commands.append({'code': 0, 'indent': 0, 'parameters': []})
+            events.append({'id': e + 1, 'name': 'EV' + str(e), 'note': '', 'pages': [{'list': commands}]})
+        with open(os.path.join(folder, 'Map%03d.json' % m), 'w', encoding='utf-8') as f:
+            json.dump({'displayName': '町', 'events': events}, f, ensure_ascii=False)
+
+def fakeTranslate(unit, history, pbar):
+    # One request per unit, the page comes back as it went in
+    if LATENCY > 0:
+        time.sleep(LATENCY)
+    pbar.update(unit['lines'])
+    return [unit['value'], [unit['lines'], unit['lines']]]
+
+def timeStage(name, fn, *args):
+    # Timed without tracing, then run again under tracemalloc for the peak (tracing slows it down a lot)
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{0:<10} {1:8.3f}s  peak {2:8.1f} MiB'.format(name, elapsed, peak / 1048576))
+    return result
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        folders = [os.path.join(root, name) for name in ['files', 'translated', 'pipeline']]
+        for folder in folders:
+            os.makedirs(folder)
+        buildMaps(folders[0])
+        size = sum([os.path.getsize(os.path.join(folders[0], filename)) for filename in os.listdir(folders[0])])
+        print('Maps: ' + str(MAPS) + ' (' + str(round(size / 1048576, 1)) + ' MiB)')
+
+        units = timeStage('Extract', pipeline.extractFiles, 'mvmz', folders[0], folders[2])
+        timeStage('Translate', pipeline.translateUnits, fakeTranslate, pipeline.THREADS, folders[2])
+        timeStage('Inject', pipeline.injectFiles, 'mvmz', folders[0], folders[1], folders[2])
+        print('Units: ' + str(units))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Placeholder Benchmark
+# Times the old per-kind subVars/resubVars (kept here as they were in rpgmakermvmz.py) against the shared
+# Tokenizer on a generated 100k line corpus. Run from the project folder with
+# python -m benchmarks.placeholders [lines]
+import random
+import re
+import sys
+import time
+
+from modules.placeholders import DEFAULT, Tokenizer
+
+#Globals
+LINES = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+SEED = 1234
+WORDS = ['こんにちは', '今日は', 'いい天気', 'ですね', 'まさか', '本当に', '行こう', 'ありがとう', '…', '！', '？', '、']
+CODES = ['\\N[1]', '\\n[12]', '\\C[2]', '\\c[0]', '\\I[45]', '\\V[3]', '\\k[7]', '\\FS[24]', '\\C[\\V[5]]', '\\\\N[2]']
+CODERATE = 0.35  # Share of lines that carry at least one code
+
+def buildCorpus(lines):
+    rng = random.Random(SEED)
+    corpus = []
+    for _ in range(lines):
+        parts = [rng.choice(WORDS) for _ in range(rng.randint(3, 12))]
+        if rng.random() < CODERATE:
+            for _ in range(rng.randint(1, 4)):
+                parts.insert(rng.randint(0, len(parts)), rng.choice(CODES))
+        corpus.append(''.join(parts))
+    return corpus
+
+def legacySubVars(jaString):
+    jaString = jaString.replace('\u3000', ' ')
+    allList = []
+    for name, pattern in [['Nested', r'[\\]+[\w]+\[[\\]+[\w]+\[[0-9]+\]\]'], ['Ascii', r'[\\]+[iIkKwWaA]+\[[0-9]+\]'],
+        ['Color', r'[\\]+[cC]\[[0-9]+\]'], ['N', r'[\\]+[nN]\[.+?\]+'], ['Var', r'[\\]+[vV]\[[0-9]+\]'],
+        ['FCode', r'[\\]+[\w]+\[.+?\]']]:
+        count = 0
+        codeList = set(re.findall(pattern, jaString))
+        for code in codeList:
+            jaString = jaString.replace(code, '{' + name + '_' + str(count) + '}')
+            count += 1
+        allList.append(codeList)
+    return [jaString, allList]
+
+def legacyResubVars(translatedText, allList):
+    matchList = re.findall(r'\[\s?.+?\s?\]', translatedText)
+    for match in matchList:
+        translatedText = translatedText.replace(match, match.strip())
+    for name, codeList in zip(['Nested', 'Ascii', 'Color', 'N', 'Var', 'FCode'], allList):
+        count = 0
+        for code in codeList:
+            translatedText = translatedText.replace('{' + name + '_' + str(count) + '}', code)
+            count += 1
+    return translatedText
+
+def timeRoundTrip(corpus, subVars, resubVars):
+    # Sub, resub, then sub again for the history entry, same as a dialogue line in searchCodes
+    mismatches = 0
+    start = time.perf_counter()
+    for line in corpus:
+        varResponse = subVars(line)
+        translatedText = resubVars(varResponse[0], varResponse[1])
+        subVars(translatedText)
+        if translatedText != line:
+            mismatches += 1
+    return [time.perf_counter() - start, mismatches]
+
+def main():
+    corpus = buildCorpus(LINES)
+    tokenizer = Tokenizer(DEFAULT)
+
+    legacy = timeRoundTrip(corpus, legacySubVars, legacyResubVars)
+    shared = timeRoundTrip(corpus, tokenizer.subVars, tokenizer.resubVars)
+
+    print('Lines: ' + str(LINES))
+    for name, result in [['Legacy', legacy], ['Tokenizer', shared]]:
+        print('{0:<10} {1:8.3f}s  {2:6.2f}us/line  {3} lines not restored'.format(
+            name, result[0], result[0] / LINES * 1e6, result[1]))
+    print('Saved: {0:.2f}us/line ({1:.1f}x)'.format((legacy[0] - shared[0]) / LINES * 1e6, legacy[0] / shared[0]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Throughput Benchmark
+# Runs every handler in modules/main.py VERSIONS end to end against benchmarks/mockserver.py on a
+# synthetic corpus and reports lines/sec, requests/sec, tokens/line and wall clock per engine, so a
+# change that slows the real pipeline down shows up without spending anything. Fails counts files and
+# event pages a handler gave up on, a run with any is not a clean measurement. Run from the project
+# folder with
+# python -m benchmarks.throughput [lines] [engine ...]
+# Mock latency, 429s and timeouts come from the mock* env vars (see benchmarks/mockserver.py), any
+# other setting (threads, batchSize, engine, rpm...) can be set in the environment as usual.
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks import corpus, mockserver
+from modules.cli import ENGINES
+
+#Globals
+LINES = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+SELECTED = sys.argv[2:] if len(sys.argv) > 2 else list(ENGINES.keys())
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def setEnvironment(url):
+    # Fixed settings first, they have to be in place before modules.main is imported
+    os.environ['api'] = url
+    os.environ['key'] = 'mock'
+    os.environ['org'] = 'mock'
+    os.environ['inputDir'] = 'files'
+    os.environ['outputDir'] = 'translated'
+    os.environ['deleteFiles'] = 'false'
+
+    # Memory and journal would answer the second engine from the first, every run has to hit the server
+    for key, value in [['model', 'gpt-3.5-turbo'], ['language', 'English'], ['timeout', '30'], ['fileThreads', '4'],
+        ['threads', '4'], ['width', '60'], ['listWidth', '100'], ['cache', 'false'], ['journal', 'false'],
+        ['csvFormat', '1']]:
+        os.environ.setdefault(key, value)
+
+def clearFolder(folder):
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+
+def main():
+    server, url = mockserver.startServer()
+    setEnvironment(url)
+    with tempfile.TemporaryDirectory() as workdir:
+        # Modules read prompt.txt from the working folder
+        prompt = os.path.join(ROOT, 'prompt.txt')
+        shutil.copy(prompt if os.path.exists(prompt) else os.path.join(ROOT, 'prompt.example'), os.path.join(workdir, 'prompt.txt'))
+        os.chdir(workdir)
+        from modules.main import VERSIONS, run
+        from modules.status import getFailures
+
+        results = []
+        for engine in SELECTED:
+            clearFolder('files')
+            clearFolder('translated')
+            lines = corpus.writeCorpus(engine, 'files', LINES)[0]
+            mockserver.resetStats()
+            failed = len(getFailures())
+            start = time.perf_counter()
+            run('translate', ENGINES[engine][0])
+            elapsed = time.perf_counter() - start
+            stats = mockserver.getStats()
+            results.append([VERSIONS[ENGINES[engine][0]][2], lines, elapsed, stats, len(getFailures()) - failed])
+    server.shutdown()
+
+    print('\n{0:<24} {1:>8} {2:>10} {3:>10} {4:>11} {5:>9} {6:>6} {7:>6}'.format(
+        'Engine', 'Lines', 'Wall (s)', 'Lines/s', 'Requests/s', 'Tok/Line', '429s', 'Fails'))
+    for name, lines, elapsed, stats, failures in results:
+        print('{0:<24} {1:>8} {2:>10.2f} {3:>10.1f} {4:>11.1f} {5:>9.1f} {6:>6} {7:>6}'.format(
+            name, lines, elapsed, lines / elapsed, stats[0] / elapsed, (stats[3] + stats[4]) / lines, stats[1], failures))
+
+if __name__ == '__main__':
+    main()
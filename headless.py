@@ -0,0 +1,5 @@
+import sys
+
+from modules.cli import cli
+
+sys.exit(cli())
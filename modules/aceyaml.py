@@ -0,0 +1,465 @@
+# ACE YAML
+# ACE games are translated from rvpacker YAML, which used to go through ruamel's pure Python round
+# trip both ways. That is most of the time spent on a big Map. loadYAML reads the events from the
+# libyaml parser in ruamel.yaml.clib straight into dicts and lists (mappings with a Ruby class tag
+# become TaggedMap), and dumpYAML writes them with the fixed settings the module always used (every
+# scalar single quoted, width 4096). The emitter follows ruamel's step for step, the output is byte
+# for byte what YAML(pure=True) would have written. Anything the fast path can't reproduce (comments,
+# blank lines, anchors, block scalars, non default tags or number formats) is loaded and dumped by
+# ruamel as before, same when ruamel.yaml.clib isn't installed.
+import bisect
+import re
+from functools import lru_cache
+
+from ruamel.yaml import YAML
+from ruamel.yaml.comments import CommentedMap, CommentedSeq
+from ruamel.yaml.error import YAMLError
+from ruamel.yaml.events import AliasEvent, DocumentEndEvent, DocumentStartEvent, MappingEndEvent, \
+    MappingStartEvent, ScalarEvent, SequenceEndEvent, SequenceStartEvent, StreamEndEvent, StreamStartEvent
+from ruamel.yaml.nodes import ScalarNode
+from ruamel.yaml.resolver import VersionedResolver
+
+try:
+    from ruamel.yaml.cyaml import CParser
+except ImportError:
+    CParser = None
+
+#Globals
+WIDTH = 4096
+MAXKEY = 128    # ruamel's longest simple key
+RESOLVER = VersionedResolver()
+LOCALTAG = re.compile(r'![\w\-/:.]+')    # !ruby/object:RPG::Map
+INTEGER = re.compile(r'-?(?:0|[1-9][0-9]*)')
+FLOAT = re.compile(r'-?(?:0|[1-9][0-9]*)\.[0-9]+')
+SPECIAL = re.compile('[^\n\x20-\x7e\x85\xa0-\uD7FF\uE000-\uFFFD\U00010000-\U0010ffff]|\uFEFF')
+BREAKS = re.compile('[\n\x85\u2028\u2029]')
+BREAKSPACE = re.compile('[\n\x85\u2028\u2029] | [\n\x85\u2028\u2029]')
+ESCAPES = {
+    '\0': '0', '\x07': 'a', '\x08': 'b', '\x09': 't', '\x0A': 'n', '\x0B': 'v', '\x0C': 'f',
+    '\x0D': 'r', '\x1B': 'e', '"': '"', '\\': '\\', '\x85': 'N', '\xA0': '_', '\u2028': 'L', '\u2029': 'P',
+}
+
+# Things ruamel keeps that never reach the parser's events, only where they're outside every scalar
+COMMENT = re.compile('#')
+BLANKLINE = re.compile(r'^[ \t]*\n', re.M)
+EXPLICITKEY = re.compile(r'^[ \t]*(?:-[ \t]+)*\?(?:[ \t]|$)', re.M)
+DIRECTIVE = re.compile('^%', re.M)
+
+class Unsupported(Exception):
+    pass
+
+class TaggedMap(dict):
+    # Mapping with a Ruby class tag (!ruby/object:RPG::Event)
+    def __init__(self, tag):
+        super().__init__()
+        self.tag = tag
+
+class TaggedFloat(float):
+    # Floats keep how they were written, 1.50 stays 1.50
+    def __new__(cls, text):
+        value = super().__new__(cls, text)
+        value.text = text
+        return value
+
+def getYAML():
+    yaml = YAML(pure=True)
+    yaml.width = WIDTH
+    yaml.default_style = "'"
+    return yaml
+
+def loadYAML(f):
+    text = f.read()
+    if CParser is not None:
+        try:
+            return parseYAML(text)
+        except (Unsupported, YAMLError):
+            # libyaml is stricter than ruamel in places, ruamel gets the last word on what's valid
+            pass
+    return getYAML().load(text)
+
+def dumpYAML(data, f):
+    # ruamel's own types came from the fallback and go back out through it
+    if isinstance(data, (CommentedMap, CommentedSeq)):
+        getYAML().dump(data, f)
+    else:
+        Emitter(f).emit(data)
+
+@lru_cache(maxsize=4096)
+def resolveScalar(tag, value):
+    # Plain scalars resolve like the round trip loader would (YAML 1.2), tag None. Files this module
+    # wrote come back with !!int '1' and the like, those are only taken in the form they're written in
+    if tag is None:
+        tag = str(RESOLVER.resolve(ScalarNode, value, (True, False)))
+        if tag == 'tag:yaml.org,2002:str':
+            return value
+        if tag == 'tag:yaml.org,2002:null':
+            return None
+        if tag == 'tag:yaml.org,2002:bool':
+            return value.lower() == 'true'
+    elif tag == 'tag:yaml.org,2002:null' and value == 'null':
+        return None
+    elif tag == 'tag:yaml.org,2002:bool' and value in ('true', 'false'):
+        return value == 'true'
+    if tag == 'tag:yaml.org,2002:int' and INTEGER.fullmatch(value):
+        return int(value)
+    if tag == 'tag:yaml.org,2002:float' and FLOAT.fullmatch(value):
+        return TaggedFloat(value)
+
+    # 0x1F, 1_000, 1e3, dates, merge keys, !!str, ruamel writes these back its own way
+    raise Unsupported(value)
+
+def getSuspects(text):
+    # Positions of what might be a comment, a blank line, a ? key or a directive, fine if a scalar covers them
+    suspects = [match.start() for match in COMMENT.finditer(text)]
+    suspects += [match.start() for match in BLANKLINE.finditer(text)]
+    suspects += [match.start() for match in EXPLICITKEY.finditer(text)]
+    suspects += [match.start() for match in DIRECTIVE.finditer(text)]
+    return sorted(suspects)
+
+def parseYAML(text):
+    if text.startswith('\uFEFF'):
+        raise Unsupported('BOM')
+    suspects = getSuspects(text)
+    spans = []      # [Start, End] of scalars that span a suspect position
+    parser = CParser(text)
+    root = None
+    stack = []      # [Container, Key, Waiting for a value, Flow]
+
+    def add(value):
+        nonlocal root
+        if len(stack) == 0:
+            root = value
+            return
+        top = stack[-1]
+        container = top[0]
+        if isinstance(container, list):
+            container.append(value)
+        elif top[2]:
+            container[top[1]] = value
+            top[2] = False
+        else:
+            if isinstance(value, (dict, list)) or value in container:
+                raise Unsupported('Key')
+            top[1] = value
+            top[2] = True
+
+    documents = 0
+    while True:
+        event = parser.get_event()
+        kind = type(event)
+        if kind is ScalarEvent:
+            if event.anchor is not None or event.style in ('|', '>'):
+                raise Unsupported('Scalar')
+            if event.tag is not None:
+                value = resolveScalar(event.tag, event.value)
+            elif event.style == '' and event.implicit[0]:
+                value = resolveScalar(None, event.value)
+            else:
+                value = event.value
+            if suspects:
+                start = bisect.bisect_left(suspects, event.start_mark.index)
+                if start < len(suspects) and suspects[start] < event.end_mark.index:
+                    spans.append([event.start_mark.index, event.end_mark.index])
+            add(value)
+        elif kind is MappingStartEvent:
+            if event.anchor is not None:
+                raise Unsupported('Anchor')
+            if event.implicit:
+                container = {}
+            elif LOCALTAG.fullmatch(event.tag or ''):
+                container = TaggedMap(event.tag)
+            else:
+                raise Unsupported(event.tag)
+            add(container)
+            stack.append([container, None, False, event.flow_style])
+        elif kind is SequenceStartEvent:
+            if event.anchor is not None or not event.implicit:
+                raise Unsupported('Sequence')
+            container = []
+            add(container)
+            stack.append([container, None, False, event.flow_style])
+        elif kind is MappingEndEvent or kind is SequenceEndEvent:
+            # ruamel keeps flow style, only {} and [] come out the same in block style
+            container, _, _, flow = stack.pop()
+            if flow and len(container) > 0:
+                raise Unsupported('Flow')
+        elif kind is DocumentStartEvent:
+            documents += 1
+            if documents > 1 or event.version or event.tags:
+                raise Unsupported('Document')
+        elif kind is StreamEndEvent:
+            break
+        elif kind is AliasEvent:
+            raise Unsupported('Alias')
+        elif kind is not StreamStartEvent and kind is not DocumentEndEvent:
+            raise Unsupported(kind.__name__)
+
+    # Every suspect has to be inside a scalar, otherwise ruamel would have kept something
+    starts = [span[0] for span in spans]
+    for position in suspects:
+        index = bisect.bisect_right(starts, position) - 1
+        if index < 0 or position >= spans[index][1]:
+            raise Unsupported('Comment')
+    if not isinstance(root, (dict, list)):
+        raise Unsupported('Root')
+    return root
+
+def getScalar(value):
+    # [Tag, Text] the way the round trip representer describes a value
+    if isinstance(value, str):
+        return [None, value]
+    if value is None:
+        return ['!!null', 'null']
+    if isinstance(value, bool):
+        return ['!!bool', 'true' if value else 'false']
+    if isinstance(value, int):
+        return ['!!int', str(value)]
+    if isinstance(value, TaggedFloat):
+        return ['!!float', value.text]
+    if isinstance(value, float):
+        if value != value:
+            return ['!!float', '.nan']
+        if value in (float('inf'), float('-inf')):
+            return ['!!float', '.inf' if value > 0 else '-.inf']
+        return ['!!float', repr(value).lower()]
+    raise ValueError('Can\'t write ' + type(value).__name__ + ' to YAML')
+
+class Emitter:
+    # ruamel's Emitter with the events replaced by walking the data, the state it keeps is the same
+    def __init__(self, f):
+        self.f = f
+        self.buffer = []
+        self.indents = []       # [Indent, Sequence]
+        self.indent = None
+        self.column = 0
+        self.whitespace = True
+        self.indention = True
+        self.noNewline = None
+        self.flowLevel = 0
+        self.sequenceContext = False
+        self.mappingContext = False
+        self.simpleKeyContext = False
+
+    def emit(self, data):
+        self.node(data, root=True)
+        self.writeIndent()
+        self.flush()
+
+    def write(self, data):
+        self.buffer.append(data)
+        if len(self.buffer) > 8192:
+            self.flush()
+
+    def flush(self):
+        self.f.write(''.join(self.buffer))
+        self.buffer = []
+
+    def increaseIndent(self, flow=False, sequence=False, indentless=False):
+        self.indents.append([self.indent, sequence])
+        if self.indent is None:
+            self.indent = 0
+        elif not indentless:
+            self.indent += 2
+
+    def writeIndicator(self, indicator, needWhitespace, whitespace=False, indention=False):
+        if not self.whitespace and needWhitespace:
+            indicator = ' ' + indicator
+        self.whitespace = whitespace
+        self.indention = self.indention and indention
+        self.column += len(indicator)
+        self.write(indicator)
+
+    def writeIndent(self):
+        indent = self.indent or 0
+        if not self.indention or self.column > indent or (self.column == indent and not self.whitespace):
+            if self.noNewline:
+                self.noNewline = False
+            else:
+                self.writeLineBreak()
+        if self.column < indent:
+            self.whitespace = True
+            self.write(' ' * (indent - self.column))
+            self.column = indent
+
+    def writeLineBreak(self, data='\n'):
+        self.whitespace = True
+        self.indention = True
+        self.column = 0
+        self.write(data)
+
+    def node(self, value, root=False, sequence=False, mapping=False, simpleKey=False):
+        self.sequenceContext = sequence
+        self.mappingContext = mapping
+        self.simpleKeyContext = simpleKey
+        if isinstance(value, (dict, list)):
+            tag = getattr(value, 'tag', None)
+            if tag is not None:
+                self.writeIndicator(tag, True)
+            if len(value) == 0:
+                self.flowCollection('{}' if isinstance(value, dict) else '[]')
+            elif isinstance(value, dict):
+                self.blockMapping(value)
+            else:
+                self.blockSequence(value)
+        else:
+            if root:
+                raise ValueError('Top level of a YAML file has to be a mapping or a sequence')
+            tag, text = getScalar(value)
+            if tag is not None:
+                self.writeIndicator(tag, True)
+                if self.sequenceContext and not self.flowLevel:
+                    self.noNewline = True
+            self.increaseIndent(flow=True)
+            self.scalar(text)
+            self.indent = self.indents.pop()[0]
+
+    def flowCollection(self, brackets):
+        # Only ever empty, [] or {} then the line ends
+        ind = 0
+        if len(self.indents) >= 2 and self.indents[-1][1]:
+            base = self.indents[-1][0] if self.indents[-1][0] is not None else 0
+            ind = base + 2 - self.column - 1
+        self.writeIndicator(' ' * ind + brackets[0], True, whitespace=True)
+        self.increaseIndent(flow=True, sequence=brackets == '[]')
+        self.indent = self.indents.pop()[0]
+        self.writeIndicator(brackets[1], False)
+        self.writeLineBreak()
+
+    def blockSequence(self, value):
+        indentless = not self.indention if self.mappingContext else False
+        self.increaseIndent(sequence=True, indentless=indentless)
+        for item in value:
+            nonl = self.noNewline if self.column == 0 else False
+            self.writeIndent()
+            self.writeIndicator('-', True, indention=True)
+            if nonl:
+                self.noNewline = True
+            self.node(item, sequence=True)
+        self.indent = self.indents.pop()[0]
+        self.noNewline = False
+
+    def blockMapping(self, value):
+        self.increaseIndent()
+        for key, item in value.items():
+            self.writeIndent()
+            tag, text = getScalar(key)
+            if len(text) + len(tag or '') >= MAXKEY or BREAKS.search(text):
+                raise ValueError('Complex key ' + repr(key))
+            self.node(key, mapping=True, simpleKey=True)
+            self.writeIndicator(':', False)
+            self.node(item, mapping=True)
+        self.indent = self.indents.pop()[0]
+
+    def scalar(self, text):
+        # default_style "'" means single quoted unless the text can't be, then double quoted
+        if self.sequenceContext and not self.flowLevel:
+            self.writeIndent()
+        split = not self.simpleKeyContext
+        if SPECIAL.search(text) or BREAKSPACE.search(text):
+            self.writeDoubleQuoted(text, split)
+        else:
+            data = text.replace("'", "''")
+            if self.column + len(data) + 3 <= WIDTH and not BREAKS.search(text):
+                # Nothing to fold or break, the whole string in one go
+                self.writeIndicator("'", True)
+                self.column += len(data)
+                self.write(data)
+                self.writeIndicator("'", False)
+            else:
+                self.writeSingleQuoted(text, split)
+
+    def writeSingleQuoted(self, text, split=True):
+        self.writeIndicator("'", True)
+        spaces = False
+        breaks = False
+        start = end = 0
+        while end <= len(text):
+            ch = None
+            if end < len(text):
+                ch = text[end]
+            if spaces:
+                if ch is None or ch != ' ':
+                    if start + 1 == end and self.column > WIDTH and split and start != 0 and end != len(text):
+                        self.writeIndent()
+                    else:
+                        data = text[start:end]
+                        self.column += len(data)
+                        self.write(data)
+                    start = end
+            elif breaks:
+                if ch is None or ch not in '\n\x85\u2028\u2029':
+                    if text[start] == '\n':
+                        self.writeLineBreak()
+                    for br in text[start:end]:
+                        self.writeLineBreak(br)
+                    self.writeIndent()
+                    start = end
+            else:
+                if ch is None or ch in ' \n\x85\u2028\u2029' or ch == "'":
+                    if start < end:
+                        data = text[start:end]
+                        self.column += len(data)
+                        self.write(data)
+                        start = end
+            if ch == "'":
+                self.column += 2
+                self.write("''")
+                start = end + 1
+            if ch is not None:
+                spaces = ch == ' '
+                breaks = ch in '\n\x85\u2028\u2029'
+            end += 1
+        self.writeIndicator("'", False)
+
+    def writeDoubleQuoted(self, text, split=True):
+        self.writeIndicator('"', True)
+        start = end = 0
+        while end <= len(text):
+            ch = None
+            if end < len(text):
+                ch = text[end]
+            if ch is None or ch in '"\\\x85\u2028\u2029\uFEFF' or not ('\x20' <= ch <= '\x7E' or '\xA0' <= ch <= '\uD7FF' \
+                or '\uE000' <= ch <= '\uFFFD' or '\U00010000' <= ch <= '\U0010FFFF'):
+                if start < end:
+                    data = text[start:end]
+                    self.column += len(data)
+                    self.write(data)
+                    start = end
+                if ch is not None:
+                    if ch in ESCAPES:
+                        data = '\\' + ESCAPES[ch]
+                    elif ch <= '\xFF':
+                        data = '\\x%02X' % ord(ch)
+                    elif ch <= '\uFFFF':
+                        data = '\\u%04X' % ord(ch)
+                    else:
+                        data = '\\U%08X' % ord(ch)
+                    self.column += len(data)
+                    self.write(data)
+                    start = end + 1
+            if 0 < end < len(text) - 1 and (ch == ' ' or start >= end) and self.column + (end - start) > WIDTH and split:
+                needBackquote = True
+                if len(text) > end:
+                    try:
+                        spacePos = text.index(' ', end)
+                        if '"' not in text[end:spacePos] and "'" not in text[end:spacePos] \
+                            and text[spacePos + 1] != ' ' and text[end - 1:end + 1] != '  ':
+                            needBackquote = False
+                    except (ValueError, IndexError):
+                        pass
+                data = text[start:end] + ('\\' if needBackquote else '')
+                if start < end:
+                    start = end
+                self.column += len(data)
+                self.write(data)
+                self.writeIndent()
+                self.whitespace = False
+                self.indention = False
+                if text[start] == ' ':
+                    if not needBackquote:
+                        start += 1
+                    data = '\\' if needBackquote else ''
+                    self.column += len(data)
+                    self.write(data)
+            end += 1
+        self.writeIndicator('"', False)
@@ -0,0 +1,106 @@
+# API
+# Every translateGPT sends its request through createCompletion so process wide policies like the
+# rate limiter are applied in one place instead of in each module.
+import os
+import time
+
+import openai
+import tiktoken
+from dotenv import load_dotenv
+
+from modules import concurrency, engine, metrics, ratelimit
+
+#Globals
+load_dotenv()
+MODEL = os.getenv('model')
+ENCODER = None
+
+def getEncoder():
+    global ENCODER
+    if ENCODER is None:
+        try:
+            ENCODER = tiktoken.encoding_for_model(MODEL)
+        except KeyError:
+            # Self hosted or other API model names tiktoken doesn't know
+            ENCODER = tiktoken.get_encoding('cl100k_base')
+    return ENCODER
+
+def estimateTokens(messages):
+    # Same rule of thumb OpenAI uses, content plus about 4 tokens of overhead per message
+    enc = getEncoder()
+    tokens = 3
+    for message in messages:
+        tokens += 4 + len(enc.encode(message['content']))
+    return tokens
+
+def finishCall(estimated, queued, start, response, e, lines):
+    # Feed the result back to the limiter, the concurrency controller and the metrics
+    metrics.addRequest(start - queued, time.monotonic() - start, response, lines, e)
+    if isinstance(e, (openai.error.RateLimitError, openai.error.Timeout, openai.error.ServiceUnavailableError)):
+        # Overloaded, back off
+        concurrency.releaseSlot(None, True)
+        ratelimit.correct(estimated, 0)
+    elif e is not None:
+        # Nothing was used, give the tokens back
+        concurrency.releaseSlot(None, False)
+        ratelimit.correct(estimated, 0)
+    else:
+        concurrency.releaseSlot(time.monotonic() - start, False)
+        ratelimit.correct(estimated, response.usage.total_tokens)
+
+def createCompletion(**kwargs):
+    # lines is how many lines the request carries (batches), only used for the metrics
+    lines = kwargs.pop('lines', 1)
+    queued = time.monotonic()
+    estimated = ratelimit.acquire(estimateTokens(kwargs['messages']))
+    concurrency.acquireSlot()
+    start = time.monotonic()
+    try:
+        if engine.ENGINE == 'async':
+            response = engine.run(engine.acreate(**kwargs))
+        else:
+            response = openai.ChatCompletion.create(**kwargs)
+    except Exception as e:
+        finishCall(estimated, queued, start, None, e, lines)
+        raise
+    finishCall(estimated, queued, start, response, None, lines)
+    return response
+
+async def sendCompletion(estimated, queued, lines, kwargs):
+    # Runs on the engine loop, the caller already went through the limiter
+    start = time.monotonic()
+    try:
+        response = await engine.acreate(**kwargs)
+    except Exception as e:
+        finishCall(estimated, queued, start, None, e, lines)
+        raise
+    finishCall(estimated, queued, start, response, None, lines)
+    return response
+
+def createCompletions(requestList):
+    # Each item is the kwargs of one createCompletion, the responses come back in the same order. With the
+    # async engine the calling thread only waits on the limiter and every request goes out on the engine
+    # loop as soon as it's let through. The first error is raised once all of them have finished
+    if engine.ENGINE != 'async':
+        return [createCompletion(**kwargs) for kwargs in requestList]
+
+    futures = []
+    for kwargs in requestList:
+        kwargs = dict(kwargs)
+        lines = kwargs.pop('lines', 1)
+        queued = time.monotonic()
+        estimated = ratelimit.acquire(estimateTokens(kwargs['messages']))
+        concurrency.acquireSlot()
+        futures.append(engine.submit(sendCompletion(estimated, queued, lines, kwargs)))
+
+    responses = []
+    error = None
+    for future in futures:
+        try:
+            responses.append(future.result())
+        except Exception as e:
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+    return responses
@@ -0,0 +1,68 @@
+# Offline Batch API
+# Export runs the normal handlers but every line that misses the Translation Memory is written to
+# requests.jsonl in the OpenAI Batch format instead of going to the API. Import reads the results file
+# back into the Translation Memory, so a normal run afterwards builds /translated from it.
+import json
+import os
+import threading
+
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+MODEL = os.getenv('model')
+REQUESTFILE = os.getenv('batchRequestFile', 'requests.jsonl')
+RESULTFILE = os.getenv('batchResultFile', 'results.jsonl')
+EXPORT = False
+LOCK = threading.Lock()
+CUSTOMIDS = set()
+
+def startExport():
+    global EXPORT
+    with LOCK:
+        EXPORT = True
+        CUSTOMIDS.clear()
+        open(REQUESTFILE, 'w', encoding='utf-8').close()
+
+def stopExport():
+    global EXPORT
+    with LOCK:
+        EXPORT = False
+        return len(CUSTOMIDS)
+
+def addRequest(customId, msg):
+    with LOCK:
+        # Same line in another file or page, one request covers both
+        if customId in CUSTOMIDS:
+            return
+        CUSTOMIDS.add(customId)
+
+        line = {
+            'custom_id': customId,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': MODEL,
+                'temperature': 0,
+                'frequency_penalty': 0.2,
+                'presence_penalty': 0.2,
+                'messages': msg,
+            },
+        }
+        with open(REQUESTFILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+
+def readResults(filename=RESULTFILE):
+    # Yields [custom_id, content, [promptTokens, completionTokens]] for every successful line
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip() == '':
+                continue
+            result = json.loads(line)
+            response = result.get('response')
+            if result.get('error') is not None or response is None or response.get('status_code') != 200:
+                continue
+            body = response['body']
+            usage = body.get('usage', {})
+            yield [result['custom_id'], body['choices'][0]['message']['content'],
+                [usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)]]
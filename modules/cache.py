@@ -0,0 +1,152 @@
+# Translation Memory
+# Every translateGPT checks here before going to the API and saves here after. Rows are keyed on
+# the subbed text (after TOKENIZER.subVars), model, language and a hash of the fixed instructions so a rerun
+# after a crash, a patch, an offline batch import or the same line in another file costs nothing. Context
+# (dialogue history, the previous line in front of a choice) and the speaker's translated name stay out
+# of the key, they are different between an export and the run after its import.
+import hashlib
+import os
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+
+from modules import batch, dedup, metrics
+from modules.estimate import countTokens
+from modules.speakers import getSourceLine
+
+#Globals
+load_dotenv()
+MODEL = os.getenv('model')
+LANGUAGE = os.getenv('language').capitalize()
+CACHEFILE = os.getenv('cacheFile', 'translationMemory.db')
+CACHE = os.getenv('cache', 'true').lower() in ['true', '1', 'yes']
+LOCK = threading.Lock()
+CONNECTION = None
+STATS = [0, 0]  # Hits, Misses
+
+def getConnection():
+    global CONNECTION
+    if CONNECTION is None:
+        CONNECTION = sqlite3.connect(CACHEFILE, check_same_thread=False)
+        CONNECTION.execute('PRAGMA journal_mode=WAL')
+        CONNECTION.execute('PRAGMA synchronous=NORMAL')
+        CONNECTION.execute('CREATE TABLE IF NOT EXISTS memory (\
+            key TEXT PRIMARY KEY,\
+            source TEXT NOT NULL,\
+            model TEXT NOT NULL,\
+            language TEXT NOT NULL,\
+            prompt TEXT NOT NULL,\
+            translation TEXT NOT NULL)')
+        CONNECTION.execute('CREATE TABLE IF NOT EXISTS pending (\
+            key TEXT PRIMARY KEY,\
+            source TEXT NOT NULL,\
+            prompt TEXT NOT NULL)')
+        CONNECTION.commit()
+    return CONNECTION
+
+def getPromptHash(system, history):
+    # List history is the rolling dialogue window and changes every line, so only instructions count
+    prompt = system
+    if isinstance(history, str):
+        prompt += dedup.getInstruction(history)
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+def getKey(subbedT, promptHash):
+    key = '\x1f'.join([getSourceLine(subbedT), MODEL, LANGUAGE, promptHash])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def countSaved(subbedT, system, history, translatedText):
+    inputTokens = countTokens(system) + countTokens(subbedT)
+    if isinstance(history, list):
+        inputTokens += sum([countTokens(line) for line in history])
+    else:
+        inputTokens += countTokens(history)
+    dedup.addSaved(inputTokens, countTokens(translatedText))
+
+def getCache(subbedT, system, history, msg=None, wait=True):
+    # wait=False when the caller already holds other lines (batches), so two batches never wait on each other
+    if CACHE is False and batch.EXPORT is False and dedup.DEDUP is False:
+        return None
+
+    promptHash = getPromptHash(system, history)
+    key = getKey(subbedT, promptHash)
+    if CACHE is True or batch.EXPORT is True:
+        with LOCK:
+            connection = getConnection()
+            row = connection.execute('SELECT translation FROM memory WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                STATS[0] += 1
+                if dedup.isDuplicate(key):
+                    countSaved(subbedT, system, history, row[0])
+                metrics.addCached()
+                return row[0]
+            STATS[1] += 1
+
+            # Batch Export, write the request out and hand the line back untranslated
+            if batch.EXPORT is True:
+                connection.execute('INSERT OR REPLACE INTO pending VALUES (?, ?, ?)', (key, subbedT, promptHash))
+                connection.commit()
+    if batch.EXPORT is True:
+        if msg is None:
+            msg = [{"role": "system", "content": system}]
+            if isinstance(history, list):
+                for line in history:
+                    msg.append({"role": "user", "content": line})
+            else:
+                msg.append({"role": "user", "content": history})
+            msg.append({"role": "user", "content": 'Line to Translate = ' + subbedT})
+        batch.addRequest(key, msg)
+        return subbedT
+
+    # Another thread may be sending the same line right now
+    translatedText = dedup.claim(key, wait)
+    if translatedText is not None:
+        countSaved(subbedT, system, history, translatedText)
+        metrics.addCached()
+    return translatedText
+
+def setCache(subbedT, system, history, translatedText):
+    if batch.EXPORT is True:
+        return
+
+    promptHash = getPromptHash(system, history)
+    key = getKey(subbedT, promptHash)
+    dedup.release(key, translatedText)
+    if CACHE is False:
+        return
+    with LOCK:
+        connection = getConnection()
+        connection.execute('INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?)',
+            (key, subbedT, MODEL, LANGUAGE, promptHash, translatedText))
+        connection.commit()
+
+def isBadReply(source, translatedText):
+    # The same check every translateGPT makes before it saves a reply
+    return len(translatedText) > 15 * len(source) or "I'm sorry, but I'm unable to assist with that translation" in translatedText
+
+def importResults(filename=batch.RESULTFILE):
+    # Move every answered request from pending into memory, returns [imported, missing, rejected, tokens].
+    # Rejected replies stay pending so the next run sends those lines again
+    imported = 0
+    missing = 0
+    rejected = 0
+    totalTokens = [0, 0]
+    with LOCK:
+        connection = getConnection()
+        for customId, translatedText, tokens in batch.readResults(filename):
+            row = connection.execute('SELECT source, prompt FROM pending WHERE key = ?', (customId,)).fetchone()
+            if row is None:
+                missing += 1
+                continue
+            totalTokens[0] += tokens[0]
+            totalTokens[1] += tokens[1]
+            if isBadReply(row[0], translatedText):
+                rejected += 1
+                continue
+            connection.execute('INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?)',
+                (customId, row[0], MODEL, LANGUAGE, row[1], translatedText))
+            connection.execute('DELETE FROM pending WHERE key = ?', (customId,))
+            imported += 1
+        connection.commit()
+    return [imported, missing, rejected, totalTokens]
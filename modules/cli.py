@@ -0,0 +1,155 @@
+# Headless CLI
+# Runs one job with no prompts so it can be driven from a scheduler, for example
+#   python headless.py --engine mvmz --mode translate --workdir games/foo --config games/foo/.env --rpm 500
+# Settings are read from the flags first, then --config, then the usual .env. They have to be in the
+# environment before modules.main is imported because every module reads its globals on import.
+import argparse
+import os
+import sys
+import traceback
+
+from dotenv import load_dotenv
+
+# Exit Codes
+OK = 0
+FAILED = 1          # At least one file failed, everything else was written
+USAGE = 2           # Bad flags or config (argparse uses 2 as well)
+NOFILES = 3         # Nothing to translate in the input folder
+INTERRUPTED = 130
+
+# Engine -> [Version in main.VERSIONS, Extension, [Source Encoding, Translated Encoding]]
+ENGINES = {
+    'mvmz': ['1', 'json', ['utf-8-sig', 'utf-8']],
+    'ace': ['2', 'yaml', ['utf-8', 'utf-8']],
+    'csv': ['3', 'csv', ['utf-8', 'utf-8']],
+    'txt': ['4', 'txt', ['utf-8', 'utf-8']],
+    'tyrano': ['5', 'ks', ['utf-8', 'utf-8']],
+    'json': ['6', 'json', ['utf-8-sig', 'utf-8']],
+    'kansen': ['7', 'ks', ['cp932', 'shift_jis']],
+    'lune': ['8', 'txt', ['shiftjis', 'shiftjis']],
+    'atelier': ['9', 'txt', ['utf-8', 'utf-8']],
+    'anim': ['10', 'json', ['utf-8-sig', 'utf-8']],
+}
+
+# Flag -> Environment Variable
+SETTINGS = [
+    ['input', 'inputDir', 'Folder with the untranslated files (default files)'],
+    ['output', 'outputDir', 'Folder the translated files go to (default translated)'],
+    ['threads', 'threads', 'Threads working on a single file'],
+    ['file_threads', 'fileThreads', 'Files worked on at once'],
+    ['workers', 'workers', 'Shared MV/MZ and ACE worker pool size'],
+    ['rpm', 'rpm', 'Requests per minute limit'],
+    ['tpm', 'tpm', 'Tokens per minute limit'],
+    ['request_engine', 'engine', 'sync or async'],
+    ['model', 'model', 'Model name'],
+    ['language', 'language', 'Target language'],
+    ['timeout', 'timeout', 'Request timeout in seconds'],
+    ['csv_format', 'csvFormat', '1 (Translator++) or 2 (Translate All)'],
+]
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(prog='headless.py', description='Translate a folder of game files without prompts.')
+    parser.add_argument('--engine', required=True, choices=ENGINES.keys(), help='Game engine / file format')
+    parser.add_argument('--mode', default='translate', choices=['translate', 'estimate', 'export', 'import', 'patch', 'pipeline'],
+        help='import reads the Batch API results then translates, patch carries old translations forward then translates, '
+        'pipeline runs extract/translate/inject as separate stages (mvmz and txt)')
+    parser.add_argument('--workdir', help='Run inside this folder (prompt.txt, cache and journal are read from here)')
+    parser.add_argument('--config', help='.env style file with settings for this job')
+    for setting in SETTINGS:
+        parser.add_argument('--' + setting[0].replace('_', '-'), dest=setting[0], help=setting[2])
+    parser.add_argument('--old-source', help='patch: the previous version of the source files')
+    parser.add_argument('--old-translated', help='patch: the /translated output of the previous version')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='Any other .env setting')
+    parser.add_argument('--keep-files', action='store_true', help='Do not delete the input files after a clean run')
+    return parser.parse_args(argv)
+
+def applySettings(args):
+    # Flags win over the config file, the config file wins over .env (load_dotenv never overrides)
+    for setting in SETTINGS:
+        value = getattr(args, setting[0])
+        if value is not None:
+            os.environ[setting[1]] = value
+    for pair in args.set:
+        if '=' not in pair:
+            raise ValueError('--set expects KEY=VALUE, got ' + pair)
+        key, value = pair.split('=', 1)
+        os.environ[key.strip()] = value
+    if args.keep_files:
+        os.environ['deleteFiles'] = 'false'
+    if args.config is not None:
+        if not os.path.isfile(args.config):
+            raise ValueError('Config file not found: ' + args.config)
+        load_dotenv(args.config)
+    if args.mode == 'patch':
+        for folder in [args.old_source, args.old_translated]:
+            if folder is None or not os.path.isdir(folder):
+                raise ValueError('patch needs --old-source and --old-translated folders')
+    if args.engine == 'csv' and os.getenv('csvFormat', '') not in ['1', '2']:
+        raise ValueError('--csv-format 1 or 2 is required for csv')
+
+def cli(argv=None):
+    args = parseArgs(argv)
+    try:
+        # Config and old version paths are relative to where the command was run, everything else to the workdir
+        for name in ['config', 'old_source', 'old_translated']:
+            if getattr(args, name) is not None:
+                setattr(args, name, os.path.abspath(getattr(args, name)))
+        if args.workdir is not None:
+            os.chdir(args.workdir)
+        applySettings(args)
+    except (OSError, ValueError) as e:
+        print('Error: ' + str(e), file=sys.stderr)
+        return USAGE
+
+    inputDir = os.getenv('inputDir', 'files')
+    if not os.path.isdir(inputDir) or \
+        not any(filename.endswith(ENGINES[args.engine][1]) for filename in os.listdir(inputDir)):
+        print('Error: no .' + ENGINES[args.engine][1] + ' files in ' + inputDir, file=sys.stderr)
+        return NOFILES
+    os.makedirs(os.getenv('outputDir', 'translated'), exist_ok=True)
+
+    # Patch, translate the carried files instead of the new source
+    mode = args.mode
+    if mode == 'patch':
+        from modules.patch import CARRYDIR, carryForward, getPatchString
+        try:
+            result = carryForward(inputDir, args.old_source, args.old_translated, ENGINES[args.engine][1],
+                ENGINES[args.engine][2])
+        except Exception:
+            traceback.print_exc()
+            return USAGE
+        print(getPatchString(result))
+        os.environ['inputDir'] = CARRYDIR
+        mode = 'translate'
+
+    # Pipeline, the three stages instead of the handler
+    if mode == 'pipeline':
+        try:
+            from modules.pipeline import ADAPTERS, runPipeline
+        except Exception:
+            traceback.print_exc()
+            return USAGE
+        if args.engine not in ADAPTERS:
+            print('Error: pipeline supports ' + ', '.join(ADAPTERS.keys()), file=sys.stderr)
+            return USAGE
+        try:
+            result = runPipeline(args.engine)
+        except KeyboardInterrupt:
+            return INTERRUPTED
+        for error in result[2]:
+            print('Error: ' + str(error), file=sys.stderr)
+        print(str(result[0]) + ' units [Input: ' + str(result[1][0]) + '][Output: ' + str(result[1][1]) + ']')
+        return FAILED if len(result[2]) > 0 else OK
+
+    try:
+        # Every module reads .env and prompt.txt on import, a missing setting fails here
+        from modules.main import run
+    except Exception:
+        traceback.print_exc()
+        return USAGE
+
+    try:
+        failures = run(mode, ENGINES[args.engine][0])
+    except KeyboardInterrupt:
+        return INTERRUPTED
+    return FAILED if failures > 0 else OK
@@ -0,0 +1,68 @@
+# Adaptive Concurrency
+# AIMD controller around the API call path. The number of requests allowed in flight grows by about one
+# per round trip while latency stays healthy and is cut in half on a 429 or timeout. With it on, the
+# thread pools are sized to maxThreads and this decides how many of those threads may call the API.
+import os
+import threading
+import time
+
+from colorama import Fore
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+#Globals
+load_dotenv()
+ADAPTIVE = os.getenv('adaptive', 'false').lower() in ['true', '1', 'yes']
+MINLIMIT = int(os.getenv('minThreads', '1'))
+MAXLIMIT = int(os.getenv('maxThreads', '16'))
+LATENCYFACTOR = 2   # Latency this many times over the baseline counts as congestion
+COOLDOWN = 5    # Seconds between decreases so one burst of 429s only halves once
+CONDITION = threading.Condition()
+LIMIT = float(MINLIMIT)
+INFLIGHT = 0
+BASELATENCY = 0
+LASTDECREASE = 0
+
+def getThreads(name):
+    # Pool size for a module, the controller does the limiting when it's on
+    if ADAPTIVE is True:
+        return MAXLIMIT
+    return int(os.getenv(name))
+
+def getLimit():
+    return int(LIMIT)
+
+def acquireSlot():
+    global INFLIGHT
+    if ADAPTIVE is False:
+        return
+    with CONDITION:
+        while INFLIGHT >= int(LIMIT):
+            CONDITION.wait()
+        INFLIGHT += 1
+
+def releaseSlot(latency, congested):
+    global INFLIGHT, LIMIT, BASELATENCY, LASTDECREASE
+    if ADAPTIVE is False:
+        return
+    with CONDITION:
+        INFLIGHT -= 1
+        now = time.monotonic()
+
+        if congested:
+            # Multiplicative Decrease
+            if now - LASTDECREASE > COOLDOWN:
+                LIMIT = max(MINLIMIT, LIMIT / 2)
+                LASTDECREASE = now
+                tqdm.write(Fore.YELLOW + 'Rate limited, concurrency down to ' + str(getLimit()) + Fore.RESET)
+        elif latency is not None:
+            # Baseline follows the fastest responses and drifts up slowly
+            if BASELATENCY == 0 or latency < BASELATENCY:
+                BASELATENCY = latency
+            else:
+                BASELATENCY = BASELATENCY * 0.99 + latency * 0.01
+
+            # Additive Increase, about one slot per round trip at the current limit
+            if latency <= BASELATENCY * LATENCYFACTOR:
+                LIMIT = min(MAXLIMIT, LIMIT + 1 / LIMIT)
+        CONDITION.notify_all()
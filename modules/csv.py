@@ -7,15 +7,22 @@ import textwrap
 import threading
 import time
 import traceback
-import tiktoken
 import csv
 
 from colorama import Fore
 from dotenv import load_dotenv
 import openai
-from retry import retry
 from tqdm import tqdm
 
+from modules.api import createCompletion
+from modules.cache import getCache, setCache
+from modules.estimate import estimateRequest
+from modules.concurrency import getThreads
+from modules.history import History
+from modules.placeholders import COLOR, VAR, Tokenizer
+from modules.retrypolicy import BadTranslation, retryPolicy
+from modules.status import addFailure
+
 #Globals
 load_dotenv()
 if os.getenv('api').replace(' ', '') != '':
@@ -29,10 +36,19 @@ LANGUAGE=os.getenv('language').capitalize()
 
 APICOST = .002 # Depends on the model https://openai.com/pricing
 PROMPT = Path('prompt.txt').read_text(encoding='utf-8')
-THREADS = int(os.getenv('threads'))
+INPUTDIR = os.getenv('inputDir', 'files')
+OUTPUTDIR = os.getenv('outputDir', 'translated')
+FORMAT = os.getenv('csvFormat', '')   # 1. Translator++ 2. Translate All
+THREADS = getThreads('threads')
 LOCK = threading.Lock()
+TOKENIZER = Tokenizer([
+    ['I', r'[\\]+[iI]\[[0-9]+\]'],
+    ['C', COLOR],
+    ['N', r'[\\]+[nN]\[[0-9]+\]'],
+    ['V', VAR],
+    ['F', r'[\\]+[!.]'],
+], '<', '>', '')
 WIDTH = int(os.getenv('width'))
-MAXHISTORY = 10
 ESTIMATE = ''
 TOTALCOST = 0
 TOKENS = 0
@@ -47,7 +63,7 @@ def handleCSV(filename, estimate):
     global ESTIMATE, TOKENS, TOTALTOKENS, TOTALCOST
     ESTIMATE = estimate
     
-    with open('translated/' + filename, 'w+t', newline='', encoding='utf-8') as writeFile:
+    with open(os.path.join(OUTPUTDIR, filename), 'w+t', newline='', encoding='utf-8') as writeFile:
         start = time.time()
         translatedData = openFiles(filename, writeFile)
         
@@ -60,7 +76,7 @@ def handleCSV(filename, estimate):
     return getResultString(['', TOTALTOKENS, None], end - start, 'TOTAL')
 
 def openFiles(filename, writeFile):
-    with open('files/' + filename, 'r', encoding='utf-8') as readFile, writeFile:
+    with open(os.path.join(INPUTDIR, filename), 'r', encoding='utf-8') as readFile, writeFile:
         translatedData = parseCSV(readFile, writeFile, filename)
 
     return translatedData
@@ -80,6 +96,7 @@ def getResultString(translatedData, translationTime, filename):
         try:
             raise translatedData[2]
         except Exception as e:
+            addFailure(filename, e)
             errorString = str(e) + '|' + translatedData[3] + Fore.RED
             return filename + ': ' + tokenString + timeString + Fore.RED + u' \u2717 ' +\
                 errorString + Fore.RESET
@@ -87,17 +104,11 @@ def getResultString(translatedData, translationTime, filename):
 def parseCSV(readFile, writeFile, filename):
     totalTokens = 0
     totalLines = 0
-    textHistory = []
+    textHistory = History()
     global LOCK
 
-    format = ''
-    while format == '':
-        format = input('\n\nSelect the CSV Format:\n\n1. Translator++\n2. Translate All\n')
-        match format:
-            case '1':
-                format = '1'
-            case '2':
-                format = '2'
+    # Picked once before the file threads start, never ask from inside a worker
+    format = FORMAT
 
     # Get total for progress bar
     totalLines = len(readFile.readlines())
@@ -120,7 +131,6 @@ def parseCSV(readFile, writeFile, filename):
 
 def translateCSV(row, pbar, writer, textHistory, format):
     translatedText = ''
-    maxHistory = MAXHISTORY
     tokens = 0
     global LOCK, ESTIMATE
 
@@ -151,10 +161,7 @@ def translateCSV(row, pbar, writer, textHistory, format):
                     # Set Data
                     row[1] = translatedText
 
-                    # Keep textHistory list at length maxHistory
                     with LOCK:
-                        if len(textHistory) > maxHistory:
-                            textHistory.pop(0)
                         if not ESTIMATE:
                             writer.writerow(row)
                         pbar.update(1)
@@ -207,11 +214,6 @@ def translateCSV(row, pbar, writer, textHistory, format):
                         row[i] = re.sub(rf':name\[({re.escape(speaker)}),', f':name[{translatedSpeaker},', row[i])
                         row[i] = row[i].replace(text, translatedText)
 
-                        # Keep History at fixed length.
-                        with LOCK:
-                            if len(textHistory) > maxHistory:
-                                textHistory.pop(0)
-
                     with LOCK:
                         if not ESTIMATE:
                             writer.writerow(row)
@@ -225,114 +227,16 @@ def translateCSV(row, pbar, writer, textHistory, format):
     return tokens
     
 
-def subVars(jaString):
-    jaString = jaString.replace('\u3000', ' ')
-
-    # Icons
-    count = 0
-    iconList = re.findall(r'[\\]+[iI]\[[0-9]+\]', jaString)
-    iconList = set(iconList)
-    if len(iconList) != 0:
-        for icon in iconList:
-            jaString = jaString.replace(icon, '<I' + str(count) + '>')
-            count += 1
-
-    # Colors
-    count = 0
-    colorList = re.findall(r'[\\]+[cC]\[[0-9]+\]', jaString)
-    colorList = set(colorList)
-    if len(colorList) != 0:
-        for color in colorList:
-            jaString = jaString.replace(color, '<C' + str(count) + '>')
-            count += 1
-
-    # Names
-    count = 0
-    nameList = re.findall(r'[\\]+[nN]\[[0-9]+\]', jaString)
-    nameList = set(nameList)
-    if len(nameList) != 0:
-        for name in nameList:
-            jaString = jaString.replace(name, '<N' + str(count) + '>')
-            count += 1
-
-    # Variables
-    count = 0
-    varList = re.findall(r'[\\]+[vV]\[[0-9]+\]', jaString)
-    varList = set(varList)
-    if len(varList) != 0:
-        for var in varList:
-            jaString = jaString.replace(var, '<V' + str(count) + '>')
-            count += 1
-
-    # Formatting
-    count = 0
-    formatList = re.findall(r'[\\]+[!.]', jaString)
-    formatList = set(formatList)
-    if len(formatList) != 0:
-        for format in formatList:
-            jaString = jaString.replace(format, '<F' + str(count) + '>')
-            count += 1
-
-    # Put all lists in list and return
-    allList = [iconList, colorList, nameList, varList, formatList]
-    return [jaString, allList]
-
-def resubVars(translatedText, allList):
-    # Fix Spacing and ChatGPT Nonsense
-    matchList = re.findall(r'<\s?.+?\s?>', translatedText)
-    if len(matchList) > 0:
-        for match in matchList:
-            text = match.strip()
-            translatedText = translatedText.replace(match, text)
-
-    # Icons
-    count = 0
-    if len(allList[0]) != 0:
-        for var in allList[0]:
-            translatedText = translatedText.replace('<I' + str(count) + '>', var)
-            count += 1
-
-    # Colors
-    count = 0
-    if len(allList[1]) != 0:
-        for var in allList[1]:
-            translatedText = translatedText.replace('<C' + str(count) + '>', var)
-            count += 1
-
-    # Names
-    count = 0
-    if len(allList[2]) != 0:
-        for var in allList[2]:
-            translatedText = translatedText.replace('<N' + str(count) + '>', var)
-            count += 1
-
-    # Vars
-    count = 0
-    if len(allList[3]) != 0:
-        for var in allList[3]:
-            translatedText = translatedText.replace('<V' + str(count) + '>', var)
-            count += 1
-    
-    # Formatting
-    count = 0
-    if len(allList[4]) != 0:
-        for var in allList[4]:
-            translatedText = translatedText.replace('<F' + str(count) + '>', var)
-            count += 1
-
-    return translatedText
-
-@retry(exceptions=Exception, tries=5, delay=5)
+@retryPolicy
 def translateGPT(t, history, fullPromptFlag):
+    # Sub Vars
+    varResponse = TOKENIZER.subVars(t)
+    subbedT = varResponse[0]
+
     # If ESTIMATE is True just count this as an execution and return.
     if ESTIMATE:
-        enc = tiktoken.encoding_for_model(MODEL)
-        tokens = len(enc.encode(t)) * 2 + len(enc.encode(str(history))) + len(enc.encode(PROMPT))
+        tokens = sum(estimateRequest(t, history, subbedT))
         return (t, tokens)
-    
-    # Sub Vars
-    varResponse = subVars(t)
-    subbedT = varResponse[0]
 
     # If there isn't any Japanese in the text just skip
     if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', subbedT):
@@ -367,21 +271,28 @@ def translateGPT(t, history, fullPromptFlag):
         msg.append({"role": "user", "content": history})
     msg.append({"role": "user", "content": user})
 
-    response = openai.ChatCompletion.create(
-        temperature=0.1,
-        frequency_penalty=0.2,
-        presence_penalty=0.2,
-        model=MODEL,
-        messages=msg,
-        request_timeout=TIMEOUT,
-    )
-
-    # Save Translated Text
-    translatedText = response.choices[0].message.content
-    tokens = response.usage.total_tokens
+    # Translation Memory
+    cachedText = getCache(subbedT, system, history, msg)
+    if cachedText is not None:
+        translatedText = cachedText
+        tokens = 0
+    else:
+        response = createCompletion(
+            temperature=0.1,
+            frequency_penalty=0.2,
+            presence_penalty=0.2,
+            model=MODEL,
+            messages=msg,
+            request_timeout=TIMEOUT,
+        )
+
+        # Save Translated Text
+        translatedText = response.choices[0].message.content
+        tokens = response.usage.total_tokens
+    rawText = translatedText
 
     # Resub Vars
-    translatedText = resubVars(translatedText, varResponse[1])
+    translatedText = TOKENIZER.resubVars(translatedText, varResponse[1])
 
     # Remove Placeholder Text
     translatedText = translatedText.replace(LANGUAGE +' Translation: ', '')
@@ -399,6 +310,7 @@ def translateGPT(t, history, fullPromptFlag):
 
     # Return Translation
     if len(translatedText) > 15 * len(t) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
-        raise Exception
+        raise BadTranslation('Bad reply: ' + translatedText[:100])
     else:
+        setCache(subbedT, system, history, rawText)
         return [translatedText, tokens]
@@ -0,0 +1,111 @@
+# Deduplication
+# Games repeat the same string thousands of times (choices, stock lines like 「……」, shop prompts, item
+# descriptions shared by Armors and Weapons). The estimate pass groups every request by its subbed text
+# and reports what the repeats would cost. During a translation only the first thread to reach a string
+# sends it, any other thread after the same string waits for that reply instead of sending its own, and
+# the Translation Memory hands it to every later occurrence. A string is the same when its source text and
+# fixed instruction are, whatever context was sent along with it.
+import os
+import re
+import threading
+import time
+
+from colorama import Fore
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+DEDUP = os.getenv('dedup', 'true').lower() in ['true', '1', 'yes']
+WAIT = int(os.getenv('dedupWait', os.getenv('timeout', '120')))  # Seconds before a waiter gives up and sends it itself
+LOCK = threading.Lock()
+INFLIGHT = {}   # Key -> [Owner Thread, Event, Translation, Deadline]
+DONE = set()    # Keys translated during this run
+GROUPS = {}     # Estimate, Subbed Text -> [Occurrences, Input, Output]
+SAVED = [0, 0, 0]  # Requests, Input, Output saved during a translation
+OWNED = threading.local()   # Keys the calling thread claimed and hasn't released yet
+CONTEXT = re.compile(r'Previous (Translated )?text for context:.*?(?=\n\nReply|\Z)', re.IGNORECASE | re.DOTALL)
+
+def getInstruction(history):
+    # A string history without the previous lines that are only there for context
+    return CONTEXT.sub('', history)
+
+def getOwned():
+    if not hasattr(OWNED, 'keys'):
+        OWNED.keys = set()
+    return OWNED.keys
+
+def claim(key, wait=True):
+    # Returns the reply another thread got for this key, or None if the caller should send it
+    if DEDUP is False:
+        return None
+
+    thread = threading.get_ident()
+    while True:
+        with LOCK:
+            entry = INFLIGHT.get(key)
+            if entry is None or entry[3] < time.time():
+                INFLIGHT[key] = [thread, threading.Event(), None, time.time() + WAIT]
+                getOwned().add(key)
+                return None
+            if entry[0] == thread:
+                # Same thread again after a retry
+                entry[3] = time.time() + WAIT
+                return None
+            if wait is False:
+                return None
+
+        # An abandoned key wakes up without a reply, go around and claim it
+        if entry[1].wait(max(entry[3] - time.time(), 0)) and entry[2] is not None:
+            return entry[2]
+
+def release(key, translatedText):
+    getOwned().discard(key)
+    with LOCK:
+        DONE.add(key)
+        entry = INFLIGHT.pop(key, None)
+    if entry is not None:
+        entry[2] = translatedText
+        entry[1].set()
+
+def abandon():
+    # The calling thread's request failed for good, anyone waiting on its keys sends their own
+    thread = threading.get_ident()
+    keys = getOwned()
+    with LOCK:
+        entries = [INFLIGHT.pop(key) for key in keys if key in INFLIGHT and INFLIGHT[key][0] == thread]
+    keys.clear()
+    for entry in entries:
+        entry[1].set()
+
+def isDuplicate(key):
+    # A Translation Memory hit on something this run already translated
+    return key in DONE
+
+def addSaved(inputTokens, outputTokens):
+    with LOCK:
+        SAVED[0] += 1
+        SAVED[1] += inputTokens
+        SAVED[2] += outputTokens
+
+def addEstimate(key, inputTokens, outputTokens):
+    with LOCK:
+        group = GROUPS.get(key)
+        if group is None:
+            GROUPS[key] = [1, inputTokens, outputTokens]
+        else:
+            group[0] += 1
+
+def getDedupString(estimate):
+    with LOCK:
+        if estimate is True:
+            total = sum([group[0] for group in GROUPS.values()])
+            saved = [total - len(GROUPS), 0, 0]
+            for group in GROUPS.values():
+                saved[1] += (group[0] - 1) * group[1]
+                saved[2] += (group[0] - 1) * group[2]
+            header = 'Duplicates: ' + str(total) + ' requests, ' + str(len(GROUPS)) + ' unique. Deduplication saves '
+        else:
+            saved = list(SAVED)
+            header = 'Deduplication saved '
+    return Fore.CYAN + header + str(saved[0]) + ' requests [Input: ' + str(saved[1]) + '][Output: ' + \
+        str(saved[2]) + ']' + Fore.RESET
@@ -0,0 +1,59 @@
+# Async Engine
+# One event loop on its own thread with one pooled keep-alive aiohttp session. Requests made through it
+# share connections instead of opening one per call. The handlers stay thread based, createCompletion
+# waits in run() while the loop does the I/O. createCompletions hands a whole list of requests to the
+# loop from one thread, so lines that don't depend on each other are all in flight together.
+import asyncio
+import os
+import threading
+
+import aiohttp
+import openai
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+ENGINE = os.getenv('engine', 'sync').lower()
+CONNECTIONS = int(os.getenv('connections', '100'))
+LOCK = threading.Lock()
+LOOP = None
+SESSION = None
+
+def getLoop():
+    global LOOP
+    with LOCK:
+        if LOOP is None:
+            LOOP = asyncio.new_event_loop()
+            threading.Thread(target=LOOP.run_forever, name='engine', daemon=True).start()
+    return LOOP
+
+def getSession():
+    # Only ever called on the loop thread
+    global SESSION
+    if SESSION is None or SESSION.closed:
+        connector = aiohttp.TCPConnector(limit=CONNECTIONS, keepalive_timeout=60)
+        SESSION = aiohttp.ClientSession(connector=connector)
+    return SESSION
+
+async def acreate(**kwargs):
+    # aiosession is a ContextVar and every task gets its own copy, so set it each time
+    openai.aiosession.set(getSession())
+    return await openai.ChatCompletion.acreate(**kwargs)
+
+def submit(coroutine):
+    # Starts the coroutine on the engine loop and returns a concurrent.futures.Future for it
+    return asyncio.run_coroutine_threadsafe(coroutine, getLoop())
+
+def run(coroutine):
+    # Sync Wrapper, blocks the calling thread until the coroutine finishes on the engine loop
+    return submit(coroutine).result()
+
+async def closeSession():
+    global SESSION
+    if SESSION is not None:
+        await SESSION.close()
+        SESSION = None
+
+def stop():
+    if LOOP is not None:
+        run(closeSession())
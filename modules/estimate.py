@@ -0,0 +1,84 @@
+# Estimate
+# Cost estimation without calling the API. The encoder is built once, every string's token count is
+# cached (PROMPT, history entries and repeated lines only get encoded the first time), files can be
+# batch encoded up front and the totals are broken down per file and per event code.
+import threading
+from pathlib import Path
+
+from colorama import Fore
+
+from modules.api import getEncoder
+from modules.dedup import addEstimate, getInstruction
+from modules.metrics import getContext
+from modules.speakers import getSourceLine
+
+#Globals
+PROMPT = Path('prompt.txt').read_text(encoding='utf-8')
+TOKENCACHE = {}
+BREAKDOWN = {}  # File -> Code -> [Input, Output, Requests]
+LOCK = threading.Lock()
+
+def countTokens(text):
+    count = TOKENCACHE.get(text)
+    if count is None:
+        count = len(getEncoder().encode(text))
+        TOKENCACHE[text] = count
+    return count
+
+def primeTokens(textList):
+    # Encode everything new in one batched call instead of line by line
+    textList = [text for text in set(textList) if text not in TOKENCACHE]
+    if len(textList) == 0:
+        return
+    for text, tokens in zip(textList, getEncoder().encode_batch(textList)):
+        TOKENCACHE[text] = len(tokens)
+
+def collectStrings(data, stringList):
+    # Every string in a parsed JSON file, for primeTokens
+    if isinstance(data, str):
+        stringList.append(data)
+    elif isinstance(data, list):
+        for item in data:
+            collectStrings(item, stringList)
+    elif isinstance(data, dict):
+        for item in data.values():
+            collectStrings(item, stringList)
+    return stringList
+
+def estimateRequest(t, history, subbedT=None):
+    # History entries are cached so the sliding window only costs a sum
+    if isinstance(history, list):
+        historyTokens = sum([countTokens(line) for line in history])
+    else:
+        historyTokens = countTokens(history)
+
+    inputTotalTokens = historyTokens + countTokens(PROMPT)
+    outputTotalTokens = countTokens(t) * 2   # Estimating 2x the size of the original text
+
+    # Breakdown
+    filename, code = getContext()
+    with LOCK:
+        codeDict = BREAKDOWN.setdefault(filename, {})
+        entry = codeDict.setdefault(code, [0, 0, 0])
+        entry[0] += inputTotalTokens
+        entry[1] += outputTotalTokens
+        entry[2] += 1
+
+    # Group repeats the same way the Translation Memory keys them
+    key = getSourceLine(t if subbedT is None else subbedT)
+    if isinstance(history, str):
+        key += '\x1f' + getInstruction(history)
+    addEstimate(key, inputTotalTokens, outputTotalTokens)
+    return [inputTotalTokens, outputTotalTokens]
+
+def getBreakdownString():
+    breakdownString = ''
+    with LOCK:
+        for filename in sorted(BREAKDOWN):
+            breakdownString += Fore.BLUE + filename + Fore.RESET + '\n'
+            codeDict = BREAKDOWN[filename]
+            for code in sorted(codeDict, key=lambda code: -(codeDict[code][0] + codeDict[code][1])):
+                entry = codeDict[code]
+                breakdownString += '    ' + str(code) + ': ' + Fore.YELLOW + '[Requests: ' + str(entry[2]) + ']'\
+                    '[Input: ' + str(entry[0]) + '][Output: ' + str(entry[1]) + ']' + Fore.RESET + '\n'
+    return breakdownString
@@ -0,0 +1,97 @@
+# Glossary
+# Names and terms the model should translate a fixed way. Pasting the whole list into every request
+# costs more the bigger the game gets, so only the entries whose source text shows up in the line or
+# its history window are sent. Every source term goes into one Aho-Corasick automaton, a line is
+# scanned once no matter how many entries there are. glossary.txt has one entry per line:
+#   Character: アイル == Aeru - Gender: Male
+#   UI: 逃げる == Escape
+# Kind (before the first colon) picks which block the entry goes in, # starts a comment.
+import os
+import re
+from collections import deque
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+GLOSSARYFILE = os.getenv('glossaryFile', 'glossary.txt')
+ENTRY = re.compile(r'^\s*(?:([A-Za-z]+):\s*)?(.+?)\s*==\s*(.*?)\s*$')
+
+class Matcher:
+    # Aho-Corasick over the source terms, find returns the indexes of every term in the text
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for index, term in enumerate(terms):
+            state = 0
+            for char in term:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(index)
+
+        # Breadth first so every failure link points at a state that is already finished
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nextState in self.goto[state].items():
+                queue.append(nextState)
+                fail = self.fail[state]
+                while fail != 0 and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[nextState] = self.goto[fail].get(char, 0) if self.goto[fail].get(char) != nextState else 0
+                self.output[nextState] = self.output[nextState] + self.output[self.fail[nextState]]
+
+    def find(self, text):
+        found = set()
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for char in text:
+            while state != 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+class Glossary:
+    def __init__(self, path=GLOSSARYFILE, default=''):
+        # The file replaces the module's built in entries when it exists
+        text = default
+        if path is not None and os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        self.entries = []   # [Kind, Source, Line, Translation]
+        for line in text.splitlines():
+            if line.strip() == '' or line.strip().startswith('#'):
+                continue
+            match = ENTRY.match(line)
+            if match is not None and match.group(2) != '':
+                translation = match.group(3).split(' - ')[0].strip()
+                self.entries.append([match.group(1) or 'Term', match.group(2), line.strip(), translation])
+        self.matcher = Matcher([entry[1] for entry in self.entries])
+
+        # History lines come back request after request, each one is only scanned the first time
+        self.findCached = lru_cache(maxsize=8192)(self.matcher.find)
+
+    def getTranslations(self, kind):
+        return {entry[1]: entry[3] for entry in self.entries if entry[0] == kind and entry[3] != ''}
+
+    def getEntries(self, textList, kind=None):
+        found = set()
+        for text in textList:
+            if text:
+                found |= self.findCached(text)
+        return [self.entries[index] for index in sorted(found) if kind is None or self.entries[index][0] == kind]
+
+    def getBlock(self, textList, kind=None, header='Glossary:'):
+        # Empty when nothing relevant is in the text, so the message can be left out
+        entries = self.getEntries(textList, kind)
+        if len(entries) == 0:
+            return ''
+        return header + '\n' + '\n'.join([entry[2] for entry in entries])
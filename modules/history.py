@@ -0,0 +1,77 @@
+# History
+# The previous lines sent with every request as context. Instead of the last 10 lines whatever their
+# size, the history keeps as many recent lines as fit in historyTokens, so one huge line can't blow up
+# every prompt after it and short lines get more context. Each entry is encoded once when it's added.
+# With historyMode="summary" the lines that fall out are folded into one short "Earlier:" entry instead
+# of being dropped, still bounded by historySummaryTokens and without any extra requests.
+import os
+import re
+from collections import deque
+
+from dotenv import load_dotenv
+
+from modules.api import getEncoder
+
+#Globals
+load_dotenv()
+BUDGET = int(os.getenv('historyTokens', '600'))
+MODE = os.getenv('historyMode', 'drop').lower()
+SUMMARYBUDGET = int(os.getenv('historySummaryTokens', '150'))
+SUMMARYCHARS = 40   # Each line that falls out keeps about this much in the summary
+
+class History:
+    def __init__(self, budget=BUDGET, mode=MODE, summaryBudget=SUMMARYBUDGET):
+        self.budget = budget
+        self.mode = mode
+        self.summaryBudget = summaryBudget
+        self.entries = deque()  # [Text, Tokens]
+        self.tokens = 0
+        self.summary = deque()  # [Text, Tokens] of the lines that fell out
+        self.summaryTokens = 0
+
+    def append(self, text):
+        tokens = getEncoder().encode(text)
+        if len(tokens) > self.budget:
+            # Bigger than the whole budget on its own, keep the end of it since that's closest to the next line
+            text = getEncoder().decode(tokens[-self.budget:])
+            tokens = tokens[-self.budget:]
+        self.entries.append([text, len(tokens)])
+        self.tokens += len(tokens)
+        while self.tokens > self.budget:
+            entry = self.entries.popleft()
+            self.tokens -= entry[1]
+            if self.mode == 'summary':
+                self.addSummary(entry[0])
+
+    def addSummary(self, text):
+        # First clause of the line, quotes and speaker tags are noise here
+        text = text.strip('"')
+        text = re.split(r'(?<=[.!?。！？])\s', text, 1)[0][:SUMMARYCHARS]
+        tokens = len(getEncoder().encode(text))
+        self.summary.append([text, tokens])
+        self.summaryTokens += tokens
+        while self.summaryTokens > self.summaryBudget and len(self.summary) > 0:
+            self.summaryTokens -= self.summary.popleft()[1]
+
+    def getLines(self):
+        lines = [entry[0] for entry in self.entries]
+        if len(self.summary) > 0:
+            lines.insert(0, 'Earlier: ' + ' / '.join([entry[0] for entry in self.summary]))
+        return lines
+
+    def clear(self):
+        self.entries.clear()
+        self.summary.clear()
+        self.tokens = 0
+        self.summaryTokens = 0
+
+    def __len__(self):
+        return len(self.entries) + (1 if len(self.summary) > 0 else 0)
+
+    def __iter__(self):
+        return iter(self.getLines())
+
+    def __getitem__(self, index):
+        if len(self.summary) == 0:
+            return self.entries[index][0]
+        return self.getLines()[index]
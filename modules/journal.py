@@ -0,0 +1,77 @@
+# Checkpoint Journal
+# Append only JSONL with one record per finished translation unit (file/event/page, command index,
+# source hash, result). A run that crashed replays it on the next start and skips every unit already
+# paid for, even though the output file for it was never written.
+import hashlib
+import json
+import os
+import threading
+
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+JOURNALFILE = os.getenv('journalFile', 'journal.jsonl')
+JOURNAL = os.getenv('journal', 'true').lower() in ['true', '1', 'yes']
+LOCK = threading.Lock()
+ENTRIES = None
+OUTFILE = None
+
+def getHash(source):
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+def loadJournal():
+    global ENTRIES
+    if ENTRIES is not None:
+        return
+    ENTRIES = {}
+    if not os.path.exists(JOURNALFILE):
+        return
+    with open(JOURNALFILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Last line cut off by the crash
+                continue
+            ENTRIES[(entry['unit'], entry['index'])] = [entry['hash'], entry['result']]
+
+def getEntry(unit, index, source):
+    # Result of this unit from an earlier run, None if it's new or the source changed
+    if JOURNAL is False or unit is None:
+        return None
+    with LOCK:
+        loadJournal()
+        entry = ENTRIES.get((unit, index))
+    if entry is None or entry[0] != getHash(source):
+        return None
+    return entry[1]
+
+def addEntry(unit, index, source, result):
+    global OUTFILE
+    if JOURNAL is False or unit is None:
+        return
+    entry = {'unit': unit, 'index': index, 'hash': getHash(source), 'result': result}
+    with LOCK:
+        loadJournal()
+        ENTRIES[(unit, index)] = [entry['hash'], result]
+        if OUTFILE is None:
+            OUTFILE = open(JOURNALFILE, 'a', encoding='utf-8')
+        OUTFILE.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        OUTFILE.flush()
+
+def disableJournal():
+    # Estimates and batch exports hand back untranslated text, keep it out of the journal
+    global JOURNAL
+    JOURNAL = False
+
+def clearJournal():
+    # Whole run finished, nothing left to resume
+    global ENTRIES, OUTFILE
+    with LOCK:
+        if OUTFILE is not None:
+            OUTFILE.close()
+            OUTFILE = None
+        ENTRIES = None
+        if os.path.exists(JOURNALFILE):
+            os.remove(JOURNALFILE)
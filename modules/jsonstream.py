@@ -0,0 +1,168 @@
+# Streaming JSON
+# MV/MZ files are loaded whole, translated in place and dumped at the end, which is fine until a
+# CommonEvents.json is a few hundred MB and several of them are open at once. Reader walks a file one
+# value at a time instead, so a caller can go through the events of a Map or the pages of a
+# CommonEvents file, translate them and write each one out before reading the next. What it writes
+# is byte for byte what json.dump(data, f, ensure_ascii=False) would have. loadJSON and dumpJSON are
+# the whole file path, orjson is used to parse when it's installed (pip install orjson).
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+#Globals
+CHUNKSIZE = 1 << 20
+DECODER = json.JSONDecoder()
+WHITESPACE = ' \t\n\r'
+
+def loadJSON(path):
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        # orjson doesn't skip the BOM some editors leave
+        if raw.startswith(b'\xef\xbb\xbf'):
+            raw = raw[3:]
+        return orjson.loads(raw)
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+def dumpJSON(data, f):
+    # dumps is the C encoder, json.dump falls back to the pure Python one for file output. Top level
+    # items go one at a time so the whole file is never one string on top of the data
+    writer = Writer(f)
+    if isinstance(data, list):
+        writer.start('[')
+        for item in data:
+            writer.item(item)
+        writer.end(']')
+    elif isinstance(data, dict):
+        writer.start('{')
+        for key, value in data.items():
+            writer.key(key)
+            writer.write(dumpValue(value))
+        writer.end('}')
+    else:
+        writer.write(dumpValue(data))
+
+def dumpValue(data):
+    return json.dumps(data, ensure_ascii=False)
+
+class Reader:
+    def __init__(self, f, chunkSize=CHUNKSIZE):
+        self.f = f
+        self.chunkSize = chunkSize
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size):
+        # Drops what's been read, the buffer only ever holds the value being decoded
+        chunk = self.f.read(size)
+        if chunk == '':
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                raise ValueError('Unexpected end of JSON')
+            self.fill(self.chunkSize)
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError('Expected ' + char + ' at ' + repr(self.buffer[self.pos:self.pos + 20]))
+        self.pos += 1
+
+    def readValue(self):
+        self.peek()
+        size = self.chunkSize
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+
+                # A number cut off by the chunk also decodes, it has to be followed by something
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            # Bigger than what's buffered, grow the read so a huge value isn't decoded over and over
+            self.fill(size)
+            size *= 2
+
+    def iterArray(self):
+        # Yields nothing itself, each element has to be read (readValue, iterArray or iterObject) before the next
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError('Expected , or ] in array')
+
+    def iterObject(self):
+        # Yields each key, its value has to be read before the next
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.readValue()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError('Expected , or } in object')
+
+    def iterItems(self):
+        # Top level array elements one by one
+        for _ in self.iterArray():
+            yield self.readValue()
+
+class Writer:
+    # Writes an array or object a piece at a time with json.dump's separators, f None writes nothing
+    def __init__(self, f):
+        self.f = f
+        self.first = []
+
+    def write(self, text):
+        if self.f is not None:
+            self.f.write(text)
+
+    def start(self, char):
+        self.write(char)
+        self.first.append(True)
+
+    def end(self, char):
+        self.first.pop()
+        self.write(char)
+
+    def next(self):
+        if self.first[-1]:
+            self.first[-1] = False
+        else:
+            self.write(', ')
+
+    def key(self, key):
+        self.next()
+        self.write(dumpValue(key) + ': ')
+
+    def item(self, value):
+        self.next()
+        self.write(dumpValue(value))
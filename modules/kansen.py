@@ -6,14 +6,22 @@ import textwrap
 import threading
 import time
 import traceback
-import tiktoken
 
 from colorama import Fore
 from dotenv import load_dotenv
 import openai
-from retry import retry
 from tqdm import tqdm
 
+from modules.api import createCompletion
+from modules.cache import getCache, setCache
+from modules.estimate import estimateRequest
+from modules.concurrency import getThreads
+from modules.history import History
+from modules.placeholders import COLOR, VAR, Tokenizer
+from modules.retrypolicy import BadTranslation, retryPolicy
+from modules.speakers import translateSpeaker
+from modules.status import addFailure
+
 #Globals
 load_dotenv()
 if os.getenv('api').replace(' ', '') != '':
@@ -27,11 +35,18 @@ LANGUAGE=os.getenv('language').capitalize()
 
 APICOST = .002 # Depends on the model https://openai.com/pricing
 PROMPT = Path('prompt.txt').read_text(encoding='utf-8')
-THREADS = int(os.getenv('threads')) # For GPT4 rate limit will be hit if you have more than 1 thread.
+INPUTDIR = os.getenv('inputDir', 'files')
+OUTPUTDIR = os.getenv('outputDir', 'translated')
+THREADS = getThreads('threads') # For GPT4 rate limit will be hit if you have more than 1 thread.
 LOCK = threading.Lock()
+TOKENIZER = Tokenizer([
+    ['Icon', r'[\\]+[iIkKwW]+\[[0-9]+\]'],
+    ['Color', COLOR],
+    ['Name', r'[\\]+[nN]\[[0-9]+\]'],
+    ['Var', VAR],
+], '[', ']', '')
 WIDTH = int(os.getenv('width'))
 LISTWIDTH = int(os.getenv('listWidth'))
-MAXHISTORY = 10
 ESTIMATE = ''
 TOTALCOST = 0
 TOKENS = 0
@@ -67,7 +82,7 @@ def handleKansen(filename, estimate):
     
     else:
         try:
-            with open('translated/' + filename, 'w', encoding='shift_jis', errors='ignore') as outFile:
+            with open(os.path.join(OUTPUTDIR, filename), 'w', encoding='shift_jis', errors='ignore') as outFile:
                 start = time.time()
                 translatedData = openFiles(filename)
 
@@ -80,12 +95,13 @@ def handleKansen(filename, estimate):
                     TOTALTOKENS += translatedData[1]
         except Exception as e:
             traceback.print_exc()
+            addFailure(filename, e)
             return 'Fail'
 
     return getResultString(['', TOTALTOKENS, None], end - start, 'TOTAL')
 
 def openFiles(filename):
-    with open('files/' + filename, 'r', encoding='cp932') as readFile:
+    with open(os.path.join(INPUTDIR, filename), 'r', encoding='cp932') as readFile:
         translatedData = parseTyrano(readFile, filename)
 
         # Delete lines marked for deletion
@@ -117,8 +133,7 @@ def parseTyrano(readFile, filename):
     return [data, totalTokens, None]
 
 def translateTyrano(data, pbar):
-    textHistory = []
-    maxHistory = MAXHISTORY
+    textHistory = History()
     tokens = 0
     currentGroup = []
     syncIndex = 0
@@ -133,7 +148,7 @@ def translateTyrano(data, pbar):
         if '[ns]' in data[i]:
             matchList = re.findall(r'\[ns\](.+?)\[', data[i])
             if len(matchList) != 0:
-                response = translateGPT(matchList[0], 'Reply with only the '+ LANGUAGE +' translation of the NPC name', True)
+                response = getSpeaker(matchList[0])
                 speaker = response[0]
                 tokens += response[1]
                 data[i] = '[ns]' + speaker + '[nse]\n'
@@ -172,7 +187,7 @@ def translateTyrano(data, pbar):
             matchList[0] = matchList[0].replace('」', '')
             currentGroup.append(matchList[0])
             if len(data) > i+1:
-                while '[r]' in data[i+1]:
+                while len(data) > i+1 and '[r]' in data[i+1]:
                     data[i] = '\d\n'    # \d Marks line for deletion
                     i += 1
                     matchList = re.findall(r'(.+?)\[r\]', data[i])
@@ -180,7 +195,8 @@ def translateTyrano(data, pbar):
                         matchList[0] = matchList[0].replace('「', '')
                         matchList[0] = matchList[0].replace('」', '')
                         currentGroup.append(matchList[0])
-                while '[pcms]' in data[i+1]:
+                # A script can end on its [pcms] line
+                while len(data) > i+1 and '[pcms]' in data[i+1]:
                     data[i] = '\d\n'
                     i += 1
                     matchList = re.findall(r'(.+?)\[pcms\]', data[i])
@@ -260,9 +276,6 @@ def translateTyrano(data, pbar):
                 # Set Backup
                 data[i] = translatedText.strip() + '[l][er]\n'
 
-            # Keep textHistory list at length maxHistory
-            if len(textHistory) > maxHistory:
-                textHistory.pop(0)
             currentGroup = [] 
             speaker = ''
         
@@ -343,9 +356,6 @@ def translateTyrano(data, pbar):
                 # Set Backup
                 data[i] = translatedText.strip() + '[l][er]\n'
 
-            # Keep textHistory list at length maxHistory
-            if len(textHistory) > maxHistory:
-                textHistory.pop(0)
             currentGroup = [] 
             speaker = ''
 
@@ -373,107 +383,26 @@ def getResultString(translatedData, translationTime, filename):
         try:
             raise translatedData[2]
         except Exception as e:
+            addFailure(filename, e)
             traceback.print_exc()
             errorString = str(e) + Fore.RED
             return filename + ': ' + tokenString + timeString + Fore.RED + u' \u2717 ' +\
                 errorString + Fore.RESET
         
-def subVars(jaString):
-    jaString = jaString.replace('\u3000', ' ')
-
-    # Icons
-    count = 0
-    iconList = re.findall(r'[\\]+[iIkKwW]+\[[0-9]+\]', jaString)
-    iconList = set(iconList)
-    if len(iconList) != 0:
-        for icon in iconList:
-            jaString = jaString.replace(icon, '[Icon' + str(count) + ']')
-            count += 1
-
-    # Colors
-    count = 0
-    colorList = re.findall(r'[\\]+[cC]\[[0-9]+\]', jaString)
-    colorList = set(colorList)
-    if len(colorList) != 0:
-        for color in colorList:
-            jaString = jaString.replace(color, '[Color' + str(count) + ']')
-            count += 1
-
-    # Names
-    count = 0
-    nameList = re.findall(r'[\\]+[nN]\[[0-9]+\]', jaString)
-    nameList = set(nameList)
-    if len(nameList) != 0:
-        for name in nameList:
-            jaString = jaString.replace(name, '[Name' + str(count) + ']')
-            count += 1
-
-    # Variables
-    count = 0
-    varList = re.findall(r'[\\]+[vV]\[[0-9]+\]', jaString)
-    varList = set(varList)
-    if len(varList) != 0:
-        for var in varList:
-            jaString = jaString.replace(var, '[Var' + str(count) + ']')
-            count += 1
-
-    # Put all lists in list and return
-    allList = [iconList, colorList, nameList, varList]
-    return [jaString, allList]
-
-def resubVars(translatedText, allList):
-    # Fix Spacing and ChatGPT Nonsense
-    matchList = re.findall(r'\[\s?.+?\s?\]', translatedText)
-    if len(matchList) > 0:
-        for match in matchList:
-            text = match.strip()
-            translatedText = translatedText.replace(match, text)
-
-    # Icons
-    count = 0
-    if len(allList[0]) != 0:
-        for var in allList[0]:
-            translatedText = translatedText.replace('[Icon' + str(count) + ']', var)
-            count += 1
-
-    # Colors
-    count = 0
-    if len(allList[1]) != 0:
-        for var in allList[1]:
-            translatedText = translatedText.replace('[Color' + str(count) + ']', var)
-            count += 1
-
-    # Names
-    count = 0
-    if len(allList[2]) != 0:
-        for var in allList[2]:
-            translatedText = translatedText.replace('[Name' + str(count) + ']', var)
-            count += 1
-
-    # Vars
-    count = 0
-    if len(allList[3]) != 0:
-        for var in allList[3]:
-            translatedText = translatedText.replace('[Var' + str(count) + ']', var)
-            count += 1
-
-    # Remove Color Variables Spaces
-    # if '\\c' in translatedText:
-    #     translatedText = re.sub(r'\s*(\\+c\[[1-9]+\])\s*', r' \1', translatedText)
-    #     translatedText = re.sub(r'\s*(\\+c\[0+\])', r'\1', translatedText)
-    return translatedText
-
-@retry(exceptions=Exception, tries=5, delay=5)
+# Each name is only translated once, shared with the other modules through speakers.json
+def getSpeaker(speaker):
+    return translateSpeaker(speaker, lambda name: translateGPT(name, 'Reply with only the '+ LANGUAGE +' translation of the NPC name', True), 0, ESTIMATE)
+
+@retryPolicy
 def translateGPT(t, history, fullPromptFlag):
+    # Sub Vars
+    varResponse = TOKENIZER.subVars(t)
+    subbedT = varResponse[0]
+
     # If ESTIMATE is True just count this as an execution and return.
     if ESTIMATE:
-        enc = tiktoken.encoding_for_model(MODEL)
-        tokens = len(enc.encode(t)) * 2 + len(enc.encode(str(history))) + len(enc.encode(PROMPT))
+        tokens = sum(estimateRequest(t, history, subbedT))
         return (t, tokens)
-    
-    # Sub Vars
-    varResponse = subVars(t)
-    subbedT = varResponse[0]
 
     # If there isn't any Japanese in the text just skip
     if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', subbedT):
@@ -508,21 +437,28 @@ def translateGPT(t, history, fullPromptFlag):
         msg.append({"role": "user", "content": history})
     msg.append({"role": "user", "content": user})
 
-    response = openai.ChatCompletion.create(
-        temperature=0.1,
-        frequency_penalty=0.2,
-        presence_penalty=0.2,
-        model=MODEL,
-        messages=msg,
-        request_timeout=TIMEOUT,
-    )
-
-    # Save Translated Text
-    translatedText = response.choices[0].message.content
-    tokens = response.usage.total_tokens
+    # Translation Memory
+    cachedText = getCache(subbedT, system, history, msg)
+    if cachedText is not None:
+        translatedText = cachedText
+        tokens = 0
+    else:
+        response = createCompletion(
+            temperature=0.1,
+            frequency_penalty=0.2,
+            presence_penalty=0.2,
+            model=MODEL,
+            messages=msg,
+            request_timeout=TIMEOUT,
+        )
+
+        # Save Translated Text
+        translatedText = response.choices[0].message.content
+        tokens = response.usage.total_tokens
+    rawText = translatedText
 
     # Resub Vars
-    translatedText = resubVars(translatedText, varResponse[1])
+    translatedText = TOKENIZER.resubVars(translatedText, varResponse[1])
 
     # Remove Placeholder Text
     translatedText = translatedText.replace(LANGUAGE +' Translation: ', '')
@@ -540,6 +476,7 @@ def translateGPT(t, history, fullPromptFlag):
 
     # Return Translation
     if len(translatedText) > 15 * len(t) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
-        raise Exception
+        raise BadTranslation('Bad reply: ' + translatedText[:100])
     else:
+        setCache(subbedT, system, history, rawText)
         return [translatedText, tokens]
@@ -7,14 +7,21 @@ import textwrap
 import threading
 import time
 import traceback
-import tiktoken
 
 from colorama import Fore
 from dotenv import load_dotenv
 import openai
-from retry import retry
 from tqdm import tqdm
 
+from modules.api import createCompletion
+from modules.cache import getCache, setCache
+from modules.estimate import estimateRequest
+from modules.concurrency import getThreads
+from modules.history import History
+from modules.placeholders import COLOR, NAME, VAR, Tokenizer
+from modules.retrypolicy import BadTranslation, retryPolicy
+from modules.status import addFailure
+
 #Globals
 load_dotenv()
 if os.getenv('api').replace(' ', '') != '':
@@ -29,12 +36,20 @@ LANGUAGE=os.getenv('language').capitalize()
 INPUTAPICOST = .002 # Depends on the model https://openai.com/pricing
 OUTPUTAPICOST = .002
 PROMPT = Path('prompt.txt').read_text(encoding='utf-8')
-THREADS = int(os.getenv('threads')) # Controls how many threads are working on a single file (May have to drop this)
+INPUTDIR = os.getenv('inputDir', 'files')
+OUTPUTDIR = os.getenv('outputDir', 'translated')
+THREADS = getThreads('threads') # Controls how many threads are working on a single file (May have to drop this)
 LOCK = threading.Lock()
+TOKENIZER = Tokenizer([
+    ['Ascii', r'[\\]+[iIkKwW]+\[[0-9]+\]'],
+    ['Color', COLOR],
+    ['N', NAME],
+    ['Var', VAR],
+    ['FCode', r'[\\]+CL'],
+], '[', ']')
 WIDTH = int(os.getenv('width'))
 LISTWIDTH = int(os.getenv('listWidth'))
 NOTEWIDTH = 50
-MAXHISTORY = 10
 ESTIMATE = ''
 totalTokens = [0, 0]
 NAMESLIST = []
@@ -66,7 +81,7 @@ def handleLune(filename, estimate):
     
     else:
         try:
-            with open('translated/' + filename, 'w', encoding='UTF-8') as outFile:
+            with open(os.path.join(OUTPUTDIR, filename), 'w', encoding='UTF-8') as outFile:
                 start = time.time()
                 translatedData = openFiles(filename)
 
@@ -78,12 +93,13 @@ def handleLune(filename, estimate):
                     totalTokens[0] += translatedData[1][0]
                     totalTokens[1] += translatedData[1][1]
         except Exception as e:
+            addFailure(filename, e)
             return 'Fail'
 
     return getResultString(['', totalTokens, None], end - start, 'TOTAL')
 
 def openFiles(filename):
-    with open('files/' + filename, 'r', encoding='UTF-8-sig') as f:
+    with open(os.path.join(INPUTDIR, filename), 'r', encoding='UTF-8-sig') as f:
         data = json.load(f)
 
         # Map Files
@@ -114,6 +130,7 @@ def getResultString(translatedData, translationTime, filename):
         try:
             raise translatedData[2]
         except Exception as e:
+            addFailure(filename, e)
             traceback.print_exc()
             errorString = str(e) + Fore.RED
             return filename + ': ' + totalTokenstring + timeString + Fore.RED + u' \u2717 ' +\
@@ -138,8 +155,7 @@ def parseJSON(data, filename):
     return [data, totalTokens, None]
 
 def translateJSON(data, pbar):
-    textHistory = []
-    maxHistory = MAXHISTORY
+    textHistory = History()
     tokens = [0, 0]
     speaker = 'None'
 
@@ -166,7 +182,7 @@ def translateJSON(data, pbar):
 
                 # Translate
                 if jaString != '':
-                    response = translateGPT(f'{speaker}: {jaString}', textHistory, True)
+                    response = translateGPT(f'{speaker}: {jaString}', list(textHistory), True)
                     tokens[0] += response[1][0]
                     tokens[1] += response[1][1]
                     translatedText = response[0]
@@ -184,137 +200,21 @@ def translateJSON(data, pbar):
                 # Set Data
                 item['message'] = translatedText
 
-                # Keep textHistory list at length maxHistory
-                if len(textHistory) > maxHistory:
-                    textHistory.pop(0)
                 currentGroup = []  
         pbar.update(1)
 
     return tokens           
 
-def subVars(jaString):
-    jaString = jaString.replace('\u3000', ' ')
-
-    # Icons
-    count = 0
-    iconList = re.findall(r'[\\]+[iIkKwW]+\[[0-9]+\]', jaString)
-    iconList = set(iconList)
-    if len(iconList) != 0:
-        for icon in iconList:
-            jaString = jaString.replace(icon, '[Ascii_' + str(count) + ']')
-            count += 1
-
-    # Colors
-    count = 0
-    colorList = re.findall(r'[\\]+[cC]\[[0-9]+\]', jaString)
-    colorList = set(colorList)
-    if len(colorList) != 0:
-        for color in colorList:
-            jaString = jaString.replace(color, '[Color_' + str(count) + ']')
-            count += 1
-
-    # Names
-    count = 0
-    nameList = re.findall(r'[\\]+[nN]\[.+?\]+', jaString)
-    nameList = set(nameList)
-    if len(nameList) != 0:
-        for name in nameList:
-            jaString = jaString.replace(name, '[N_' + str(count) + ']')
-            count += 1
-
-    # Variables
-    count = 0
-    varList = re.findall(r'[\\]+[vV]\[[0-9]+\]', jaString)
-    varList = set(varList)
-    if len(varList) != 0:
-        for var in varList:
-            jaString = jaString.replace(var, '[Var_' + str(count) + ']')
-            count += 1
-
-    # Formatting
-    count = 0
-    if '笑えるよね.' in jaString:
-        print('t')
-    formatList = re.findall(r'[\\]+CL', jaString)
-    formatList = set(formatList)
-    if len(formatList) != 0:
-        for var in formatList:
-            jaString = jaString.replace(var, '[FCode_' + str(count) + ']')
-            count += 1
-
-    # Put all lists in list and return
-    allList = [iconList, colorList, nameList, varList, formatList]
-    return [jaString, allList]
-
-def resubVars(translatedText, allList):
-    # Fix Spacing and ChatGPT Nonsense
-    matchList = re.findall(r'\[\s?.+?\s?\]', translatedText)
-    if len(matchList) > 0:
-        for match in matchList:
-            text = match.strip()
-            translatedText = translatedText.replace(match, text)
-
-    # Icons
-    count = 0
-    if len(allList[0]) != 0:
-        for var in allList[0]:
-            translatedText = translatedText.replace('[Ascii_' + str(count) + ']', var)
-            count += 1
-
-    # Colors
-    count = 0
-    if len(allList[1]) != 0:
-        for var in allList[1]:
-            translatedText = translatedText.replace('[Color_' + str(count) + ']', var)
-            count += 1
-
-    # Names
-    count = 0
-    if len(allList[2]) != 0:
-        for var in allList[2]:
-            translatedText = translatedText.replace('[N_' + str(count) + ']', var)
-            count += 1
-
-    # Vars
-    count = 0
-    if len(allList[3]) != 0:
-        for var in allList[3]:
-            translatedText = translatedText.replace('[Var_' + str(count) + ']', var)
-            count += 1
-    
-    # Formatting
-    count = 0
-    if len(allList[4]) != 0:
-        for var in allList[4]:
-            translatedText = translatedText.replace('[FCode_' + str(count) + ']', var)
-            count += 1
-
-    # Remove Color Variables Spaces
-    # if '\\c' in translatedText:
-    #     translatedText = re.sub(r'\s*(\\+c\[[1-9]+\])\s*', r' \1', translatedText)
-    #     translatedText = re.sub(r'\s*(\\+c\[0+\])', r'\1', translatedText)
-    return translatedText
-
-@retry(exceptions=Exception, tries=5, delay=5)
+@retryPolicy
 def translateGPT(t, history, fullPromptFlag):
+    # Sub Vars
+    varResponse = TOKENIZER.subVars(t)
+    subbedT = varResponse[0]
+
     # If ESTIMATE is True just count this as an execution and return.
     if ESTIMATE:
-        enc = tiktoken.encoding_for_model(MODEL)
-        historyRaw = ''
-        if isinstance(history, list):
-            for line in history:
-                historyRaw += line
-        else:
-            historyRaw = history
-
-        inputTotalTokens = len(enc.encode(historyRaw)) + len(enc.encode(PROMPT))
-        outputTotalTokens = len(enc.encode(t)) * 2   # Estimating 2x the size of the original text
-        totalTokens = [inputTotalTokens, outputTotalTokens]
+        totalTokens = estimateRequest(t, history, subbedT)
         return (t, totalTokens)
-    
-    # Sub Vars
-    varResponse = subVars(t)
-    subbedT = varResponse[0]
 
     # If there isn't any Japanese in the text just skip
     if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', subbedT):
@@ -348,21 +248,28 @@ def translateGPT(t, history, fullPromptFlag):
         msg.append({"role": "user", "content": history})
     msg.append({"role": "user", "content": user})
 
-    response = openai.ChatCompletion.create(
-        temperature=0.1,
-        frequency_penalty=0.2,
-        presence_penalty=0.2,
-        model=MODEL,
-        messages=msg,
-        request_timeout=TIMEOUT,
-    )
-
-    # Save Translated Text
-    translatedText = response.choices[0].message.content
-    totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+    # Translation Memory
+    cachedText = getCache(subbedT, system, history, msg)
+    if cachedText is not None:
+        translatedText = cachedText
+        totalTokens = [0, 0]
+    else:
+        response = createCompletion(
+            temperature=0.1,
+            frequency_penalty=0.2,
+            presence_penalty=0.2,
+            model=MODEL,
+            messages=msg,
+            request_timeout=TIMEOUT,
+        )
+
+        # Save Translated Text
+        translatedText = response.choices[0].message.content
+        totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+    rawText = translatedText
 
     # Resub Vars
-    translatedText = resubVars(translatedText, varResponse[1])
+    translatedText = TOKENIZER.resubVars(translatedText, varResponse[1])
 
     # Remove Placeholder Text
     translatedText = translatedText.replace(LANGUAGE +' Translation: ', '')
@@ -380,6 +287,7 @@ def translateGPT(t, history, fullPromptFlag):
 
     # Return Translation
     if len(translatedText) > 15 * len(t) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
-        raise Exception
+        raise BadTranslation('Bad reply: ' + translatedText[:100])
     else:
+        setCache(subbedT, system, history, rawText)
         return [translatedText, totalTokens]
@@ -1,5 +1,6 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
+import time
 import traceback
 from colorama import Fore
 import os
@@ -15,194 +16,148 @@ from modules.kansen import handleKansen
 from modules.lune2 import handleLuneTxt
 from modules.atelier import handleAtelier
 from modules.anim import handleAnim
+from modules.batch import startExport, stopExport, REQUESTFILE, RESULTFILE
+from modules.cache import importResults
+from modules.concurrency import ADAPTIVE, getLimit
+from modules.dedup import DEDUP, getDedupString
+from modules.engine import stop
+from modules.estimate import getBreakdownString
+from modules.journal import clearJournal, disableJournal
+from modules.metrics import METRICS, METRICSFILE, addFile, setContext, startMetrics, stopMetrics
+from modules.status import addFailure, getFailures
+import modules.csv
 
 # For GPT4 rate limit will be hit if you have more than 1 thread.
 # 1 Thread for each file. Controls how many files are worked on at once.
 THREADS = int(os.getenv('fileThreads'))
+INPUTDIR = os.getenv('inputDir', 'files')
+DELETEFILES = os.getenv('deleteFiles', 'true').lower() in ['true', '1', 'yes']
 
 # Info Message
 tqdm.write(Fore.LIGHTYELLOW_EX + "WARNING: Once a translation starts do not close it unless you want to lose your\
 translated data. If a file fails or gets stuck, translated lines will remain translated so you don't have \
-to worry about being charged twice. You can simply copy the file generated in /translations back over to \
-/files and start the script again. It will skip over any translated text." + Fore.RESET, end='\n\n')
+to worry about being charged twice. Finished lines are kept in the journal and translation memory, so just \
+start the script again with the same /files and it will pick up where it stopped." + Fore.RESET, end='\n\n')
+
+# Version -> [Handler, Extension, Name]
+VERSIONS = {
+    '1': [handleMVMZ, 'json', 'MV/MZ'],
+    '2': [handleACE, 'yaml', 'ACE'],
+    '3': [handleCSV, 'csv', 'CSV (From Translator++)'],
+    '4': [handleTXT, 'txt', 'Text (Custom)'],
+    '5': [handleTyrano, 'ks', 'Tyrano'],
+    '6': [handleJSON, 'json', 'JSON'],
+    '7': [handleKansen, 'ks', 'Kansen'],
+    '8': [handleLuneTxt, 'txt', 'Lune'],
+    '9': [handleAtelier, 'txt', 'Atelier'],
+    '10': [handleAnim, 'json', 'Anim'],
+}
 
 def main():
     estimate = ''
     while estimate == '':
-        estimate = input('Select Translation or Cost Estimation:\n\n1. Translate\n2. Estimate\n')
+        estimate = input('Select Translation or Cost Estimation:\n\n1. Translate\n2. Estimate\n\
+3. Batch Export (Write ' + REQUESTFILE + ')\n4. Batch Import (Read ' + RESULTFILE + ' then Translate)\n')
         match estimate:
             case '1':
-                estimate = False
+                mode = 'translate'
             case '2':
-                estimate = True
+                mode = 'estimate'
+            case '3':
+                mode = 'export'
+            case '4':
+                mode = 'import'
             case _:
                 estimate = ''
 
-    totalCost = 0
     version = ''
     while version == '':
-        version = input('Select the RPGMaker Version:\n\n\
-1. MV/MZ\n\
-2. ACE\n\
-3. CSV (From Translator++)\n\
-4. Text (Custom)\n\
-5. Tyrano\n\
-6. JSON\n\
-7. Kansen\n\
-8. Lune\n\
-9. Atelier\n\
-10. Anim\n'
-        )
-        match version:
-            case '1':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleMVMZ, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('json')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '2':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleACE, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('yaml')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '3':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleCSV, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('csv')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                            
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '4':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleTXT, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('txt')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                            
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '5':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleTyrano, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('ks')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                            
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '6':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleJSON, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('json')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                            
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '7':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleKansen, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('ks')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                            
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '8':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleLuneTxt, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('txt')]
-                    
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-                            
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '9':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleAtelier, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('txt')]
-
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case '10':
-                # Open File (Threads)
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(handleAnim, filename, estimate) \
-                                for filename in os.listdir("files") if filename.endswith('json')]
-
-                    for future in as_completed(futures):
-                        try:
-                            totalCost = future.result()
-
-                        except Exception as e:
-                            tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
-                            tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
-
-            case _:
-                version = ''
-        
+        version = input('Select the RPGMaker Version:\n\n' + \
+            ''.join([key + '. ' + VERSIONS[key][2] + '\n' for key in VERSIONS]))
+        if version not in VERSIONS:
+            version = ''
+
+    # CSV format is asked once here, the file threads never prompt
+    if version == '3' and modules.csv.FORMAT == '':
+        while modules.csv.FORMAT not in ['1', '2']:
+            modules.csv.FORMAT = input('\n\nSelect the CSV Format:\n\n1. Translator++\n2. Translate All\n')
+
+    run(mode, version)
+
+def run(mode, version):
+    # Runs a whole job without asking anything, returns the number of files that failed
+    estimate = mode == 'estimate'
+    export = mode == 'export'
+    match mode:
+        case 'estimate':
+            disableJournal()
+        case 'export':
+            disableJournal()
+            startExport()
+        case 'import':
+            result = importResults()
+            tqdm.write(Fore.GREEN + 'Imported ' + str(result[0]) + ' translations (' + str(result[1]) + \
+                ' unknown custom_id, ' + str(result[2]) + ' bad replies left to translate) [Input: ' + str(result[3][0]) + \
+                '][Output: ' + str(result[3][1]) + ']' + Fore.RESET)
+
+    # Open File (Threads)
+    startMetrics()
+    totalCost = 0
+    handler, extension = VERSIONS[version][0], VERSIONS[version][1]
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        futures = [executor.submit(runFile, handler, filename, estimate) \
+                    for filename in os.listdir(INPUTDIR) if filename.endswith(extension)]
+
+        for future in as_completed(futures):
+            try:
+                totalCost = future.result()
+            except Exception as e:
+                addFailure('', e)
+                tracebackLineNo = str(traceback.extract_tb(sys.exc_info()[2])[-1].lineno)
+                tqdm.write(Fore.RED + str(e) + '|' + tracebackLineNo + Fore.RESET)
+
+    # Close the pooled connections of the async engine
+    stop()
+    stopMetrics()
+    if METRICS is True:
+        tqdm.write(Fore.BLUE + 'Metrics written to ' + METRICSFILE + Fore.RESET)
+
+    if ADAPTIVE is True:
+        tqdm.write(Fore.BLUE + 'Concurrency settled at ' + str(getLimit()) + ' requests in flight' + Fore.RESET)
+
+    if export is True:
+        tqdm.write(Fore.GREEN + str(stopExport()) + ' requests written to ' + REQUESTFILE + \
+            '. Submit it to the Batch API then run Batch Import with the results.' + Fore.RESET)
+
+    if estimate is True:
+        tqdm.write(getBreakdownString())
+
+    if DEDUP is True and export is False:
+        tqdm.write(getDedupString(estimate))
+
+    failures = getFailures()
     if totalCost != 'Fail':
-        if estimate is False:
+        if estimate is False and export is False and len(failures) == 0:
             # This is to encourage people to grab what's in /translated instead
-            deleteFolderFiles('files')
+            if DELETEFILES is True:
+                deleteFolderFiles(INPUTDIR)
+
+            # Nothing left to resume
+            clearJournal()
 
         # Prevent immediately closing of CLI
-        tqdm.write(totalCost)
+        tqdm.write(str(totalCost))
         # input('Done! Press Enter to close.')
+    return len(failures)
+
+def runFile(handler, filename, estimate):
+    # Requests made by this file thread are labelled with the file
+    setContext(filename, 'Other')
+    start = time.time()
+    try:
+        return handler(filename, estimate)
+    finally:
+        addFile(filename, time.time() - start)
 
 def deleteFolderFiles(folderPath):
     for filename in os.listdir(folderPath):
@@ -0,0 +1,218 @@
+# Metrics
+# Every request that goes through createCompletion is recorded with how long it waited for the rate
+# limiter and a concurrency slot, how long the API took, its tokens and cost, and which file and event
+# code it was for. Retries, Translation Memory hits and file times are added by their modules. While a
+# run is going a snapshot is rewritten every metricsInterval seconds, a Prometheus textfile (for the
+# node_exporter textfile collector) or JSON when metricsFile ends in .json.
+import json
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+METRICS = os.getenv('metrics', 'false').lower() in ['true', '1', 'yes']
+METRICSFILE = os.getenv('metricsFile', 'metrics.prom')
+INTERVAL = float(os.getenv('metricsInterval', '10'))
+MODEL = os.getenv('model') or ''
+LOCK = threading.Lock()
+CONTEXT = threading.local()
+SAMPLESIZE = 10000      # Reservoir kept for the percentiles
+QUANTILES = [0.5, 0.9, 0.99]
+START = time.time()
+STOP = threading.Event()
+EXPORTER = []
+
+# Pricing per 1K tokens - Depends on the model https://openai.com/pricing
+if 'gpt-4' in MODEL:
+    INPUTCOST = float(os.getenv('inputCost') or '.01')
+    OUTPUTCOST = float(os.getenv('outputCost') or '.03')
+else:
+    INPUTCOST = float(os.getenv('inputCost') or '.002')
+    OUTPUTCOST = float(os.getenv('outputCost') or '.002')
+
+# File -> Code -> [Requests, Errors, Prompt Tokens, Completion Tokens, Lines, Cached Lines, Latency, Wait]
+LABELS = {}
+FILES = {}      # File -> Seconds
+RETRIES = {}    # Error -> Count
+LATENCY = [[], 0, 0.0]  # [Samples, Count, Sum]
+WAIT = [[], 0, 0.0]
+
+def setContext(filename, code):
+    # What the calling thread is working on, requests and estimates are labelled with it
+    CONTEXT.filename = filename
+    CONTEXT.code = code
+
+def getContext():
+    return [getattr(CONTEXT, 'filename', 'Other'), getattr(CONTEXT, 'code', 'Other')]
+
+def getLabel():
+    # Caller holds LOCK
+    filename, code = getContext()
+    return LABELS.setdefault(filename, {}).setdefault(str(code), [0, 0, 0, 0, 0, 0, 0.0, 0.0])
+
+def addSample(summary, value):
+    # Reservoir sampling keeps the percentiles honest without keeping every request
+    summary[1] += 1
+    summary[2] += value
+    if len(summary[0]) < SAMPLESIZE:
+        summary[0].append(value)
+    else:
+        k = random.randrange(summary[1])
+        if k < SAMPLESIZE:
+            summary[0][k] = value
+
+def addRequest(wait, latency, response, lines, error):
+    if METRICS is False:
+        return
+    with LOCK:
+        label = getLabel()
+        label[0] += 1
+        label[6] += latency
+        label[7] += wait
+        addSample(LATENCY, latency)
+        addSample(WAIT, wait)
+        if error is not None:
+            label[1] += 1
+            return
+        label[2] += response.usage.prompt_tokens
+        label[3] += response.usage.completion_tokens
+        label[4] += lines
+
+def addCached(lines=1):
+    if METRICS is False:
+        return
+    with LOCK:
+        getLabel()[5] += lines
+
+def addRetry(error):
+    if METRICS is False:
+        return
+    with LOCK:
+        name = type(error).__name__
+        RETRIES[name] = RETRIES.get(name, 0) + 1
+
+def addFile(filename, seconds):
+    if METRICS is False:
+        return
+    with LOCK:
+        FILES[filename] = seconds
+
+def getCost(label):
+    return label[2] * .001 * INPUTCOST + label[3] * .001 * OUTPUTCOST
+
+def getQuantiles(summary):
+    samples = sorted(summary[0])
+    if len(samples) == 0:
+        return {str(q): 0 for q in QUANTILES}
+    return {str(q): samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+def getSnapshot():
+    # Caller holds LOCK
+    files = {}
+    for filename, codes in LABELS.items():
+        total = [sum(column) for column in zip(*codes.values())]
+        seconds = FILES.get(filename, time.time() - START)
+        files[filename] = {
+            'seconds': round(seconds, 3),
+            'requests': total[0],
+            'errors': total[1],
+            'promptTokens': total[2],
+            'completionTokens': total[3],
+            'cost': round(getCost(total), 6),
+            'lines': total[4],
+            'cachedLines': total[5],
+            'linesPerSecond': round((total[4] + total[5]) / seconds, 3) if seconds > 0 else 0,
+            'codes': {code: {
+                'requests': label[0],
+                'errors': label[1],
+                'promptTokens': label[2],
+                'completionTokens': label[3],
+                'cost': round(getCost(label), 6),
+                'lines': label[4],
+                'cachedLines': label[5],
+                'latencySeconds': round(label[6], 3),
+                'waitSeconds': round(label[7], 3),
+                # Per second spent in the API, codes share the wall clock with each other
+                'linesPerSecond': round(label[4] / label[6], 3) if label[6] > 0 else 0,
+            } for code, label in codes.items()},
+        }
+    return {
+        'time': time.time(),
+        'uptime': round(time.time() - START, 3),
+        'latency': {'count': LATENCY[1], 'sum': round(LATENCY[2], 3), 'quantiles': getQuantiles(LATENCY)},
+        'wait': {'count': WAIT[1], 'sum': round(WAIT[2], 3), 'quantiles': getQuantiles(WAIT)},
+        'retries': dict(RETRIES),
+        'cost': round(sum([files[filename]['cost'] for filename in files]), 6),
+        'files': files,
+    }
+
+def escapeLabel(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def getPrometheus(snapshot):
+    lines = []
+    for name, summary, description in [['dazed_request_latency_seconds', snapshot['latency'], 'Time spent in the API per request'],
+        ['dazed_queue_wait_seconds', snapshot['wait'], 'Time waiting for the rate limiter and a concurrency slot']]:
+        lines += ['# HELP ' + name + ' ' + description, '# TYPE ' + name + ' summary']
+        lines += [name + '{quantile="' + q + '"} ' + str(value) for q, value in summary['quantiles'].items()]
+        lines += [name + '_sum ' + str(summary['sum']), name + '_count ' + str(summary['count'])]
+
+    counters = [['dazed_requests_total', 'requests', 'Requests sent'],
+        ['dazed_request_errors_total', 'errors', 'Requests that failed'],
+        ['dazed_prompt_tokens_total', 'promptTokens', 'Prompt tokens used'],
+        ['dazed_completion_tokens_total', 'completionTokens', 'Completion tokens used'],
+        ['dazed_cost_dollars_total', 'cost', 'Estimated cost'],
+        ['dazed_lines_total', 'lines', 'Lines translated by the API'],
+        ['dazed_cached_lines_total', 'cachedLines', 'Lines answered by the Translation Memory']]
+    for name, key, description in counters:
+        lines += ['# HELP ' + name + ' ' + description, '# TYPE ' + name + ' counter']
+        for filename, entry in snapshot['files'].items():
+            for code, codeEntry in entry['codes'].items():
+                lines.append(name + '{file="' + escapeLabel(filename) + '",code="' + escapeLabel(code) + '"} ' + str(codeEntry[key]))
+
+    lines += ['# HELP dazed_file_lines_per_second Lines (API and Translation Memory) per second of the file',
+        '# TYPE dazed_file_lines_per_second gauge']
+    lines += ['dazed_file_lines_per_second{file="' + escapeLabel(filename) + '"} ' + str(entry['linesPerSecond'])
+        for filename, entry in snapshot['files'].items()]
+    lines += ['# HELP dazed_retries_total Retries by error', '# TYPE dazed_retries_total counter']
+    lines += ['dazed_retries_total{error="' + escapeLabel(error) + '"} ' + str(count) for error, count in snapshot['retries'].items()]
+    return '\n'.join(lines) + '\n'
+
+def writeSnapshot(path=None):
+    # Written next to the target and renamed so readers never see half a file
+    if METRICS is False:
+        return
+    path = path or METRICSFILE
+    with LOCK:
+        snapshot = getSnapshot()
+    text = json.dumps(snapshot, ensure_ascii=False, indent=4) if path.endswith('.json') else getPrometheus(snapshot)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+def runExporter():
+    while not STOP.wait(INTERVAL):
+        try:
+            writeSnapshot()
+        except OSError:
+            pass
+
+def startMetrics():
+    if METRICS is False or len(EXPORTER) > 0:
+        return
+    STOP.clear()
+    EXPORTER.append(threading.Thread(target=runExporter, name='metrics', daemon=True))
+    EXPORTER[0].start()
+
+def stopMetrics():
+    # Last snapshot with everything in it
+    if METRICS is False:
+        return
+    if len(EXPORTER) > 0:
+        STOP.set()
+        EXPORTER.pop().join()
+    writeSnapshot()
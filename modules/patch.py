@@ -0,0 +1,211 @@
+# Patch
+# When a game updates, carry the old translations forward instead of translating everything again.
+# The new source is compared with the previous source version, and everything unchanged gets what the
+# previous /translated output has at the same place. Places are structural paths for JSON/YAML (file,
+# event, page, command) and rows/lines for text formats. The merged files are written to carryDir and
+# a normal run over them only sends what is new or modified, carried text is English and skipped.
+import copy
+import csv
+import difflib
+import json
+import os
+
+from colorama import Fore
+from ruamel.yaml import YAML
+
+#Globals
+CARRYDIR = os.getenv('carryDir', 'carried')
+DIALOGUE = [401, 405]   # Runs of these get merged into one command by the translation
+STATS = [0, 0, 0]       # Carried, Left to translate, Files that could not be aligned
+
+def getYAML():
+    # Same settings rpgmakerace writes with so carried files look like translated ones
+    yaml = YAML(pure=True)
+    yaml.width = 4096
+    yaml.default_style = "'"
+    return yaml
+
+def countStrings(value):
+    if isinstance(value, str):
+        return 1
+    if isinstance(value, list):
+        return sum([countStrings(item) for item in value])
+    if isinstance(value, dict):
+        return sum([countStrings(item) for item in value.values()])
+    return 0
+
+def getCommandKeys(value):
+    # MV/MZ use code/indent/parameters, ACE (rvpacker) uses c/i/p
+    if not isinstance(value, list) or len(value) == 0:
+        return None
+    for keys in [['code', 'indent'], ['c', 'i']]:
+        if all([isinstance(item, dict) and keys[0] in item for item in value]):
+            return keys
+    return None
+
+def getTokens(commands, keys):
+    # One token per command, except a run of dialogue lines is one token since the translation merges it.
+    # Returns [shape, content, start, end], shape lines up source with translated, content old with new
+    tokens = []
+    i = 0
+    while i < len(commands):
+        code = commands[i][keys[0]]
+        indent = commands[i].get(keys[1])
+        j = i + 1
+        if code in DIALOGUE:
+            while j < len(commands) and commands[j][keys[0]] == code and commands[j].get(keys[1]) == indent:
+                j += 1
+        shape = ('G' if code in DIALOGUE else 'C', code, indent)
+        content = json.dumps(commands[i:j], ensure_ascii=False, sort_keys=True)
+        tokens.append([shape, content, i, j])
+        i = j
+    return tokens
+
+def alignTokens(a, b, index):
+    # {token in a: token in b} for every token in an equal block
+    matcher = difflib.SequenceMatcher(None, [token[index] for token in a], [token[index] for token in b], autojunk=False)
+    aligned = {}
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            aligned[block.a + k] = block.b + k
+    return aligned
+
+def carryCommands(new, old, translated, keys):
+    newTokens = getTokens(new, keys)
+    oldTokens = getTokens(old, keys)
+    translatedTokens = getTokens(translated, keys)
+    oldToTranslated = alignTokens(oldTokens, translatedTokens, 0)
+    newToOld = alignTokens(newTokens, oldTokens, 1)
+
+    commands = []
+    for k, token in enumerate(newTokens):
+        i = newToOld.get(k)
+        j = oldToTranslated.get(i) if i is not None else None
+        if j is None:
+            commands += new[token[2]:token[3]]
+            STATS[1] += countStrings(new[token[2]:token[3]])
+            continue
+        translatedToken = translatedTokens[j]
+        commands += copy.deepcopy(translated[translatedToken[2]:translatedToken[3]])
+        STATS[0] += countStrings(new[token[2]:token[3]])
+    return commands
+
+def carry(new, old, translated):
+    # Walks the three versions together, anything that doesn't line up keeps the new source
+    if isinstance(new, str):
+        if new == old and isinstance(translated, str):
+            STATS[0] += 1
+            return translated
+        STATS[1] += 1
+        return new
+    if isinstance(new, dict):
+        if not isinstance(old, dict) or not isinstance(translated, dict):
+            STATS[1] += countStrings(new)
+            return new
+        for key in new:
+            if key in old and key in translated:
+                new[key] = carry(new[key], old[key], translated[key])
+            else:
+                STATS[1] += countStrings(new[key])
+        return new
+    if isinstance(new, list):
+        if not isinstance(old, list) or not isinstance(translated, list):
+            STATS[1] += countStrings(new)
+            return new
+        keys = getCommandKeys(new)
+        if keys is not None and getCommandKeys(old) == keys and getCommandKeys(translated) == keys:
+            return carryCommands(new, old, translated, keys)
+
+        # Database arrays, events, pages... are indexed by id
+        if len(old) != len(translated):
+            STATS[1] += countStrings(new)
+            return new
+        for i in range(len(new)):
+            if i < len(old):
+                new[i] = carry(new[i], old[i], translated[i])
+            else:
+                STATS[1] += countStrings(new[i])
+        return new
+    return new
+
+def carryLines(newLines, oldLines, translatedLines):
+    # Text formats, a line (or csv row) unchanged from the old source takes the translated line at its index
+    if len(oldLines) != len(translatedLines):
+        return None
+    aligned = alignTokens([[line] for line in newLines], [[line] for line in oldLines], 0)
+    lines = []
+    for k, line in enumerate(newLines):
+        if k in aligned:
+            lines.append(translatedLines[aligned[k]])
+            STATS[0] += 1
+        else:
+            lines.append(line)
+            STATS[1] += 1
+    return lines
+
+def carryFile(filename, newDir, oldDir, translatedDir, carryDir, encoding):
+    # encoding is [Source, Translated], the carried file is read back as a source file
+    extension = filename.rsplit('.', 1)[-1]
+    paths = [os.path.join(folder, filename) for folder in [newDir, oldDir, translatedDir]]
+    encodings = [encoding[0], encoding[0], encoding[1]]
+    outPath = os.path.join(carryDir, filename)
+
+    # Nothing to carry from, the whole file is new
+    if not os.path.exists(paths[1]) or not os.path.exists(paths[2]):
+        with open(paths[0], 'rb') as inFile, open(outPath, 'wb') as outFile:
+            outFile.write(inFile.read())
+        return False
+
+    if extension == 'json':
+        versions = []
+        for path, pathEncoding in zip(paths, encodings):
+            with open(path, 'r', encoding=pathEncoding) as f:
+                versions.append(json.load(f))
+        with open(outPath, 'w', encoding=encoding[0], errors='ignore') as outFile:
+            json.dump(carry(*versions), outFile, ensure_ascii=False)
+        return True
+
+    if extension == 'yaml':
+        yaml = getYAML()
+        versions = []
+        for path, pathEncoding in zip(paths, encodings):
+            with open(path, 'r', encoding=pathEncoding) as f:
+                versions.append(yaml.load(f))
+        with open(outPath, 'w', encoding=encoding[0], errors='ignore') as outFile:
+            yaml.dump(carry(*versions), outFile)
+        return True
+
+    versions = []
+    for path, pathEncoding in zip(paths, encodings):
+        with open(path, 'r', encoding=pathEncoding, newline='') as f:
+            if extension == 'csv':
+                versions.append([tuple(row) for row in csv.reader(f)])
+            else:
+                versions.append(f.readlines())
+    lines = carryLines(*versions)
+    if lines is None:
+        # Translated file has a different number of lines, can't tell which line is which
+        STATS[2] += 1
+        STATS[1] += len(versions[0])
+        lines = versions[0]
+    with open(outPath, 'w', encoding=encoding[0], errors='ignore', newline='') as outFile:
+        if extension == 'csv':
+            csv.writer(outFile, delimiter=',', quotechar='\"').writerows(lines)
+        else:
+            outFile.writelines(lines)
+    return True
+
+def carryForward(newDir, oldDir, translatedDir, extension, encoding, carryDir=CARRYDIR):
+    # Writes every new source file with its carried translations into carryDir, returns [Carried, Left, Unaligned]
+    os.makedirs(carryDir, exist_ok=True)
+    for filename in os.listdir(newDir):
+        if filename.endswith(extension):
+            carryFile(filename, newDir, oldDir, translatedDir, carryDir, encoding)
+    return list(STATS)
+
+def getPatchString(result):
+    patchString = Fore.GREEN + 'Carried ' + str(result[0]) + ' strings forward, ' + str(result[1]) + \
+        ' new or changed left to translate' + Fore.RESET
+    if result[2] > 0:
+        patchString += Fore.YELLOW + ' (' + str(result[2]) + ' files could not be lined up and are sent whole)' + Fore.RESET
+    return patchString
@@ -0,0 +1,300 @@
+# Pipeline
+# Extract, translate and inject as three separate streaming stages instead of one loop per handler.
+#   extract:   a format adapter reads each file and writes one translation unit per line to units.jsonl
+#   translate: reads units.jsonl, translates with its own thread pool and appends results/<file>.jsonl
+#   inject:    reads each source file with its results and writes the translated file
+# A unit is {id, file, path, kind, group, value, context, lines}. Units of one group (a text file) are
+# translated in order so dialogue keeps its history, everything else runs in parallel. MV/MZ units are
+# the pages and record pages the handler works on, translated by the handler's own search functions.
+# Only one file's data (or a handful of groups in the translate stage) is in memory at any time.
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+from modules.concurrency import getThreads
+from modules.jsonstream import dumpJSON, loadJSON
+from modules.metrics import setContext, startMetrics, stopMetrics
+
+#Globals
+load_dotenv()
+PIPELINEDIR = os.getenv('pipelineDir', 'pipeline')
+INPUTDIR = os.getenv('inputDir', 'files')
+OUTPUTDIR = os.getenv('outputDir', 'translated')
+LANGUAGE = os.getenv('language').capitalize()
+THREADS = getThreads('threads')
+LOCK = threading.Lock()
+
+#tqdm Globals
+BAR_FORMAT='{l_bar}{bar:10}{r_bar}{bar:-10b}'
+POSITION = 0
+LEAVE = False
+
+# Database File -> Unit Kind, the same split openFiles makes
+DATABASEFILES = {
+    'Actors': 'names',
+    'Armors': 'names',
+    'Weapons': 'names',
+    'Classes': 'names',
+    'Enemies': 'names',
+    'MapInfos': 'names',
+    'Items': 'things',
+    'Skills': 'ss',
+    'States': 'ss',
+}
+
+def getUnitFile(pipelineDir):
+    return os.path.join(pipelineDir, 'units.jsonl')
+
+def getResultFile(pipelineDir, filename):
+    return os.path.join(pipelineDir, 'results', filename + '.jsonl')
+
+def getUnit(filename, path, kind, value, context='', lines=1, group=None):
+    return {'file': filename, 'path': path, 'kind': kind, 'group': group, 'value': value, 'context': context,
+        'lines': lines}
+
+def getPath(data, path):
+    for key in path:
+        data = data[key]
+    return data
+
+### MV/MZ Adapter
+def getPageUnit(filename, path, page, unit):
+    # context is the journal unit searchCodes gets from parseMap, parseCommonEvents and parseTroops
+    return getUnit(filename, path, 'page', page, unit, len(page['list']))
+
+def extractMVMZ(filename, data):
+    # Loaded here, the handler reads .env and prompt.txt on import
+    from modules.rpgmakermvmz import getPages
+
+    # Map Files
+    if 'Map' in filename and filename != 'MapInfos.json':
+        if data['displayName'] != '':
+            yield getUnit(filename, ['displayName'], 'location', data['displayName'])
+        for e, event in enumerate(data['events']):
+            if event is None:
+                continue
+            if '<namePop:' in event['note']:
+                yield getUnit(filename, ['events', e, 'note'], 'note', event['note'])
+            for p, page in enumerate(event['pages']):
+                if page is not None:
+                    yield getPageUnit(filename, ['events', e, 'pages', p], page, filename + '/' + str(event['id']) + '/' + str(p))
+
+    # CommonEvents Files
+    elif 'CommonEvents' in filename:
+        for c, event in enumerate(data):
+            if event is not None:
+                yield getPageUnit(filename, [c], event, filename + '/' + str(event['id']))
+
+    # Troops File
+    elif 'Troops' in filename:
+        for t, troop in enumerate(data):
+            if troop is None:
+                continue
+            for p, page in enumerate(troop['pages']):
+                if page is not None:
+                    yield getPageUnit(filename, [t, 'pages', p], page, filename + '/' + str(troop['id']) + '/' + str(p))
+
+    # System File
+    elif 'System' in filename:
+        yield getUnit(filename, [], 'system', data, filename, sum([len(value) for value in data['terms'].values()]))
+
+    # Database Files, recordSize records per unit
+    else:
+        for name, kind in DATABASEFILES.items():
+            if name in filename:
+                for page in getPages([k if record is not None else None for k, record in enumerate(data)]):
+                    yield getUnit(filename, page, kind, [data[k] for k in page], name, len(page))
+                break
+
+def injectMVMZ(data, result):
+    # Record pages go back one record at a time, System replaces the whole file
+    path = result['path']
+    if result['kind'] in ['names', 'things', 'ss']:
+        for k, record in zip(path, result['value']):
+            data[k] = record
+    elif len(path) == 0:
+        data = result['value']
+    else:
+        getPath(data, path[:-1])[path[-1]] = result['value']
+    return data
+
+def saveJSON(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        dumpJSON(data, f)
+
+def translateMVMZ(unit, history, pbar):
+    # The handler's functions translate the unit in place and return the tokens
+    from modules import rpgmakermvmz
+    value = unit['value']
+    if unit['kind'] == 'page':
+        tokens = rpgmakermvmz.searchCodes(value, pbar, unit['context'])
+    elif unit['kind'] == 'names':
+        tokens = rpgmakermvmz.searchNames(value, pbar, unit['context'])
+    elif unit['kind'] == 'things':
+        tokens = rpgmakermvmz.searchThings(value, pbar)
+    elif unit['kind'] == 'ss':
+        tokens = rpgmakermvmz.searchSS(value, pbar)
+    elif unit['kind'] == 'system':
+        tokens = rpgmakermvmz.searchSystem(value, pbar, unit['context'])
+    elif unit['kind'] == 'note':
+        event = {'note': value}
+        tokens = rpgmakermvmz.translateNoteOmitSpace(event, r'<namePop:(.*?) [\d]+>')
+        value = event['note']
+        pbar.update(1)
+    else:
+        response = rpgmakermvmz.translateGPT(value, 'Reply with only the '+ LANGUAGE +' translation of the RPG location name', False)
+        tokens = response[1]
+        value = response[0].replace('\"', '')
+        pbar.update(1)
+    return [value, tokens]
+
+def getMVMZTranslator():
+    return translateMVMZ
+
+### Text Adapter
+def extractTXT(filename, data):
+    # The m[N] = "..." groups translateText works on, one group per file so each has the ones before it as history
+    from modules.txt import getGroup
+    i = 0
+    while i < len(data):
+        if re.search(r'm\[[0-9]+\] = \"(.*)\"', data[i]) != None:
+            jaString, end = getGroup(data, i)
+            yield getUnit(filename, [i, end], 'group', jaString, lines=end - i + 1, group=filename)
+            i = end
+        i += 1
+
+def injectTXT(data, result):
+    from modules.txt import setGroup
+    return setGroup(data, result['path'][0], result['path'][1], result['value'])
+
+def loadLines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.readlines()
+
+def saveLines(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(data)
+
+def translateTXT(unit, history, pbar):
+    # Same request and clean up as translateText, setGroup wraps it on inject
+    from modules.txt import translateGPT
+    response = translateGPT(unit['value'], 'Previous Text for Context: ' + ' '.join(history), True)
+    translatedText = re.sub(r'^.+?:\s', '', response[0])
+    history.append('\"' + translatedText + '\"')
+    pbar.update(unit['lines'])
+    return [translatedText, [response[1], 0]]
+
+def getTXTTranslator():
+    return translateTXT
+
+# Engine -> [Extension, Extract, Inject, Load, Save, Get Translator]
+ADAPTERS = {
+    'mvmz': ['json', extractMVMZ, injectMVMZ, loadJSON, saveJSON, getMVMZTranslator],
+    'txt': ['txt', extractTXT, injectTXT, loadLines, saveLines, getTXTTranslator],
+}
+
+### Stages
+def extractFiles(engine, inputDir=INPUTDIR, pipelineDir=PIPELINEDIR):
+    # Stage 1, returns the number of units written
+    adapter = ADAPTERS[engine]
+    os.makedirs(pipelineDir, exist_ok=True)
+    count = 0
+    with open(getUnitFile(pipelineDir), 'w', encoding='utf-8') as outFile:
+        for filename in sorted(os.listdir(inputDir)):
+            if not filename.endswith(adapter[0]):
+                continue
+            data = adapter[3](os.path.join(inputDir, filename))
+            for unit in adapter[1](filename, data):
+                unit['id'] = count
+                outFile.write(json.dumps(unit, ensure_ascii=False) + '\n')
+                count += 1
+    return count
+
+def readGroups(f):
+    # Consecutive units of one group come out together, ungrouped units one at a time
+    group = []
+    for line in f:
+        unit = json.loads(line)
+        if len(group) > 0 and (unit['group'] is None or unit['group'] != group[-1]['group']):
+            yield group
+            group = []
+        group.append(unit)
+        if unit['group'] is None:
+            yield group
+            group = []
+    if len(group) > 0:
+        yield group
+
+def translateGroup(group, translate, pipelineDir, totalTokens, pbar):
+    # Loaded here like the translators, it needs the encoder
+    from modules.history import History
+    history = History()
+    for unit in group:
+        setContext(unit['file'], unit['kind'])
+        value, tokens = translate(unit, history, pbar)
+        result = {'id': unit['id'], 'path': unit['path'], 'kind': unit['kind'], 'value': value}
+        with LOCK:
+            totalTokens[0] += tokens[0]
+            totalTokens[1] += tokens[1]
+            with open(getResultFile(pipelineDir, unit['file']), 'a', encoding='utf-8') as outFile:
+                outFile.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+def translateUnits(translate, threads=THREADS, pipelineDir=PIPELINEDIR):
+    # Stage 2, returns [totalTokens, errors]. Only threads * 2 groups are read ahead of the workers
+    os.makedirs(os.path.join(pipelineDir, 'results'), exist_ok=True)
+    for filename in os.listdir(os.path.join(pipelineDir, 'results')):
+        os.remove(os.path.join(pipelineDir, 'results', filename))
+
+    totalTokens = [0, 0]
+    errors = []
+    slots = threading.BoundedSemaphore(threads * 2)
+
+    def done(future):
+        if future.exception() is not None:
+            with LOCK:
+                errors.append(future.exception())
+        slots.release()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor, \
+        open(getUnitFile(pipelineDir), 'r', encoding='utf-8') as f, \
+        tqdm(bar_format=BAR_FORMAT, position=POSITION, total=0, leave=LEAVE) as pbar:
+        pbar.desc = 'Translate'
+        for group in readGroups(f):
+            slots.acquire()
+            pbar.total += sum([unit['lines'] for unit in group])
+            executor.submit(translateGroup, group, translate, pipelineDir, totalTokens, pbar).add_done_callback(done)
+    return [totalTokens, errors]
+
+def injectFiles(engine, inputDir=INPUTDIR, outputDir=OUTPUTDIR, pipelineDir=PIPELINEDIR):
+    # Stage 3, returns the number of units set. Files without results are written unchanged
+    adapter = ADAPTERS[engine]
+    os.makedirs(outputDir, exist_ok=True)
+    count = 0
+    for filename in sorted(os.listdir(inputDir)):
+        if not filename.endswith(adapter[0]):
+            continue
+        data = adapter[3](os.path.join(inputDir, filename))
+        resultFile = getResultFile(pipelineDir, filename)
+        if os.path.exists(resultFile):
+            with open(resultFile, 'r', encoding='utf-8') as f:
+                for line in f:
+                    data = adapter[2](data, json.loads(line))
+                    count += 1
+        adapter[4](os.path.join(outputDir, filename), data)
+    return count
+
+def runPipeline(engine):
+    # Returns [units, totalTokens, errors]
+    units = extractFiles(engine)
+    startMetrics()
+    try:
+        totalTokens, errors = translateUnits(ADAPTERS[engine][5]())
+    finally:
+        stopMetrics()
+    injectFiles(engine)
+    return [units, totalTokens, errors]
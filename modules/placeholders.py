@@ -0,0 +1,75 @@
+# Placeholders
+# Control codes (\N[1], \C[2], \I[3], \V[4], nested and format codes) are swapped for short placeholders
+# before a line goes to the model and put back afterwards. Every format module used to run one findall
+# and a replace loop per kind of code, this does it with one precompiled scan each way. Each module
+# builds a Tokenizer with its own placeholder style and code list, earlier kinds win when two kinds
+# could match at the same spot (so Nested is listed before the codes it is made of).
+import re
+
+# Code Patterns
+NESTED = r'[\\]+[\w]+\[[\\]+[\w]+\[[0-9]+\]\]'
+ICON = r'[\\]+[iIkKwWaA]+\[[0-9]+\]'
+COLOR = r'[\\]+[cC]\[[0-9]+\]'
+NAME = r'[\\]+[nN]\[.+?\]+'
+VAR = r'[\\]+[vV]\[[0-9]+\]'
+FORMAT = r'[\\]+[\w]+\[.+?\]'
+
+# {Nested_0}, {Ascii_0}, ... used by most RPG Maker style modules
+DEFAULT = [
+    ['Nested', NESTED],
+    ['Ascii', ICON],
+    ['Color', COLOR],
+    ['N', NAME],
+    ['Var', VAR],
+    ['FCode', FORMAT],
+]
+
+class Tokenizer:
+    def __init__(self, kinds, opener='{', closer='}', separator='_'):
+        # kinds is a list of [name, pattern], placeholders look like opener + name + separator + n + closer
+        self.names = [kind[0] for kind in kinds]
+        self.opener = opener
+        self.closer = closer
+        self.separator = separator
+        self.codePattern = re.compile('|'.join('(' + kind[1] + ')' for kind in kinds))
+
+        # The model sometimes pads the inside of a placeholder, accept one space on each side
+        names = sorted(self.names, key=len, reverse=True)
+        self.placeholderPattern = re.compile(re.escape(opener) + r'\s?(' + '|'.join(re.escape(name) for name in names)
+            + ')' + re.escape(separator) + r'([0-9]+)\s?' + re.escape(closer))
+
+    def getPlaceholder(self, name, count):
+        return self.opener + name + self.separator + str(count) + self.closer
+
+    def subVars(self, jaString):
+        # Returns [subbedString, codeMap], codeMap is {placeholder: code}
+        jaString = jaString.replace('\u3000', ' ')
+        if '\\' not in jaString:
+            return [jaString, {}]
+
+        codeMap = {}
+        seen = {}
+        counts = [0] * len(self.names)
+
+        def replace(match):
+            code = match.group(0)
+            placeholder = seen.get(code)
+            if placeholder is None:
+                kind = match.lastindex - 1
+                placeholder = self.getPlaceholder(self.names[kind], counts[kind])
+                counts[kind] += 1
+                seen[code] = placeholder
+                codeMap[placeholder] = code
+            return placeholder
+
+        return [self.codePattern.sub(replace, jaString), codeMap]
+
+    def resubVars(self, translatedText, codeMap):
+        if len(codeMap) == 0:
+            return translatedText
+
+        def replace(match):
+            placeholder = self.getPlaceholder(match.group(1), match.group(2))
+            return codeMap.get(placeholder, match.group(0))
+
+        return self.placeholderPattern.sub(replace, translatedText)
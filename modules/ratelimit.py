@@ -0,0 +1,61 @@
+# Rate Limiter
+# One token bucket for requests and one for tokens, shared by every file and page thread so the whole
+# process stays just under the org limits instead of bouncing off 429s. A limit of 0 turns that bucket off.
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+RPM = int(os.getenv('rpm', '0'))
+TPM = int(os.getenv('tpm', '0'))
+HEADROOM = float(os.getenv('rateHeadroom', '0.95'))    # Fraction of the limits we actually use
+LOCK = threading.Lock()
+
+# [Capacity, Level, Refill Per Second, Last Refill]
+REQUESTBUCKET = [RPM * HEADROOM, RPM * HEADROOM, RPM * HEADROOM / 60, time.monotonic()]
+TOKENBUCKET = [TPM * HEADROOM, TPM * HEADROOM, TPM * HEADROOM / 60, time.monotonic()]
+
+def refill(bucket, now):
+    bucket[1] = min(bucket[0], bucket[1] + (now - bucket[3]) * bucket[2])
+    bucket[3] = now
+
+def tryAcquire(tokens):
+    # Debits both buckets if they can cover the request, otherwise returns the seconds to wait
+    with LOCK:
+        now = time.monotonic()
+        wait = 0
+        if RPM > 0:
+            refill(REQUESTBUCKET, now)
+            if REQUESTBUCKET[1] < 1:
+                wait = max(wait, (1 - REQUESTBUCKET[1]) / REQUESTBUCKET[2])
+        if TPM > 0:
+            refill(TOKENBUCKET, now)
+
+            # A request bigger than the whole bucket only waits for a full bucket
+            needed = min(tokens, TOKENBUCKET[0])
+            if TOKENBUCKET[1] < needed:
+                wait = max(wait, (needed - TOKENBUCKET[1]) / TOKENBUCKET[2])
+
+        if wait == 0:
+            if RPM > 0:
+                REQUESTBUCKET[1] -= 1
+            if TPM > 0:
+                TOKENBUCKET[1] -= tokens
+        return wait
+
+def acquire(tokens):
+    # Blocks until both buckets can cover the request, returns what was debited
+    wait = tryAcquire(tokens)
+    while wait > 0:
+        time.sleep(wait)
+        wait = tryAcquire(tokens)
+    return tokens
+
+def correct(estimated, actual):
+    # Swap the estimate for what response.usage says was used, the level can go negative and that debt is paid by waiting
+    if TPM > 0:
+        with LOCK:
+            TOKENBUCKET[1] -= actual - estimated
@@ -0,0 +1,101 @@
+# Retry Policy
+# Replaces the fixed @retry(tries=5, delay=5) on translateGPT. Errors are sorted into retryable and
+# fatal, waits grow exponentially with jitter and follow Retry-After when the server sends it, and each
+# line has a budget of tries and seconds so a bad line fails fast instead of stalling a thread.
+import functools
+import os
+import random
+import threading
+import time
+
+import openai
+from dotenv import load_dotenv
+
+from modules import dedup
+from modules.metrics import addRetry
+
+#Globals
+load_dotenv()
+TRIES = int(os.getenv('retryTries', '5'))
+BUDGET = float(os.getenv('retryBudget', '180'))    # Seconds a single line may spend waiting on retries
+BASEDELAY = 1
+MAXDELAY = 60
+BADTRIES = 2    # Bad replies at temperature 0 rarely fix themselves, one more try is enough
+LOCAL = threading.local()
+
+class BadTranslation(Exception):
+    # The reply came back but is unusable (too long, refusal, wrong count)
+    pass
+
+def isRetryable(e):
+    if isinstance(e, BadTranslation):
+        return True
+    if isinstance(e, (openai.error.RateLimitError, openai.error.Timeout, openai.error.APIConnectionError,
+                      openai.error.ServiceUnavailableError, openai.error.TryAgain)):
+        return True
+    if isinstance(e, (openai.error.InvalidRequestError, openai.error.AuthenticationError,
+                      openai.error.PermissionError)):
+        return False
+    if isinstance(e, openai.error.APIError):
+        # 5xx or no status at all is the server's problem, anything else won't change on retry
+        return e.http_status is None or e.http_status >= 500
+    return False
+
+def getRetryAfter(e):
+    headers = getattr(e, 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms') is not None:
+            return float(headers.get('retry-after-ms')) / 1000
+        if headers.get('retry-after') is not None:
+            return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        # HTTP date format, fall back to our own backoff
+        return None
+    return None
+
+def getDelay(e, attempt):
+    # Full jitter exponential backoff, the server's Retry-After wins when it asks for longer
+    delay = random.uniform(0, min(MAXDELAY, BASEDELAY * 2 ** attempt))
+    retryAfter = getRetryAfter(e)
+    if retryAfter is not None:
+        delay = max(delay, retryAfter)
+    return delay
+
+def retryPolicy(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Only the outermost call on a thread retries. A batch falling back to single lines would
+        # otherwise retry every line inside every retry of the batch
+        if getattr(LOCAL, 'active', False):
+            return func(*args, **kwargs)
+        LOCAL.active = True
+        try:
+            return retryCall(func, args, kwargs)
+        finally:
+            # Keys this call claimed and never answered (it failed, or only estimated) go back to the waiters
+            dedup.abandon()
+            LOCAL.active = False
+    return wrapper
+
+def retryCall(func, args, kwargs):
+    start = time.monotonic()
+    attempt = 0
+    badAttempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            attempt += 1
+            if isinstance(e, BadTranslation):
+                badAttempt += 1
+            if not isRetryable(e) or attempt >= TRIES or badAttempt >= BADTRIES:
+                raise
+
+            # Out of budget for this line
+            delay = getDelay(e, attempt)
+            if time.monotonic() - start + delay > BUDGET:
+                raise
+            addRetry(e)
+            time.sleep(delay)
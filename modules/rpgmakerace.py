@@ -1,4 +1,4 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 import json
 import os
 from pathlib import Path
@@ -8,15 +8,24 @@ import textwrap
 import threading
 import time
 import traceback
-import tiktoken
-from ruamel.yaml import YAML
 
 from colorama import Fore
 from dotenv import load_dotenv
 import openai
-from retry import retry
 from tqdm import tqdm
 
+from modules.aceyaml import dumpYAML, loadYAML
+from modules.api import createCompletion
+from modules.cache import getCache, setCache
+from modules.estimate import estimateRequest
+from modules.history import History
+from modules.metrics import getContext, setContext
+from modules.placeholders import COLOR, ICON, NAME, NESTED, VAR, Tokenizer
+from modules.retrypolicy import BadTranslation, retryPolicy
+from modules.scheduler import cancelAll, submit
+from modules.speakers import translateSpeaker
+from modules.status import addFailure
+
 #Globals
 load_dotenv()
 if os.getenv('api').replace(' ', '') != '':
@@ -31,12 +40,20 @@ LANGUAGE=os.getenv('language').capitalize()
 INPUTAPICOST = .002 # Depends on the model https://openai.com/pricing
 OUTPUTAPICOST = .002
 PROMPT = Path('prompt.txt').read_text(encoding='utf-8')
-THREADS = int(os.getenv('threads')) # Controls how many threads are working on a single file (May have to drop this)
+INPUTDIR = os.getenv('inputDir', 'files')
+OUTPUTDIR = os.getenv('outputDir', 'translated')
 LOCK = threading.Lock()
+TOKENIZER = Tokenizer([
+    ['Nested', NESTED],
+    ['Ascii', ICON],
+    ['Color', COLOR],
+    ['N', NAME],
+    ['Var', VAR],
+    ['FCode', r'[\\]+CL'],
+])
 WIDTH = int(os.getenv('width'))
 LISTWIDTH = int(os.getenv('listWidth'))
 NOTEWIDTH = 50
-MAXHISTORY = 10
 ESTIMATE = ''
 totalTokens = [0, 0]
 NAMESLIST = []
@@ -87,32 +104,26 @@ def handleACE(filename, estimate):
     
     else:
         try:
-            with open('translated/' + filename, 'w', encoding='UTF-8') as outFile:
+            with open(os.path.join(OUTPUTDIR, filename), 'w', encoding='UTF-8') as outFile:
                 start = time.time()
                 translatedData = openFiles(filename)
 
                 # Print Result
                 end = time.time()
-                yaml=YAML(pure=True)
-                yaml.width = 4096
-                yaml.default_style = "'"
-                yaml.dump(translatedData[0], outFile)
+                dumpYAML(translatedData[0], outFile)
                 tqdm.write(getResultString(translatedData, end - start, filename))
                 with LOCK:
                     totalTokens[0] += translatedData[1][0]
                     totalTokens[1] += translatedData[1][1]
         except Exception as e:
+            addFailure(filename, e)
             return 'Fail'
 
     return getResultString(['', totalTokens, None], end - start, 'TOTAL')
 
 def openFiles(filename):
-    yaml=YAML(pure=True)   # Need a yaml instance per thread.
-    yaml.width = 4096
-    yaml.default_style = "'"
-
-    with open('files/' + filename, 'r', encoding='UTF-8') as f:
-        data = yaml.load(f)
+    with open(os.path.join(INPUTDIR, filename), 'r', encoding='UTF-8') as f:
+        data = loadYAML(f)
 
         # Map Files
         if 'Map' in filename and filename != 'MapInfos.json':
@@ -194,6 +205,7 @@ def getResultString(translatedData, translationTime, filename):
         try:
             raise translatedData[2]
         except Exception as e:
+            addFailure(filename, e)
             errorString = str(e) + Fore.RED
             return filename + ': ' + totalTokenstring + timeString + Fore.RED + u' \u2717 ' +\
                 errorString + Fore.RESET
@@ -220,21 +232,22 @@ def parseMap(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
-        with ThreadPoolExecutor(max_workers=THREADS) as executor:
-            for key in events:
-                if key is not None:
-                    # This translates text above items on the map.
-                    # if 'LB:' in event['note']:
-                        # totalTokens += translateNote(event, r'(?<=LB:)[^u0000-u0080]+')
-
-                    futures = [executor.submit(searchCodes, page, pbar) for page in events[key]['pages'] if page is not None]
-                    for future in as_completed(futures):
-                        try:
-                            totalTokensFuture = future.result()
-                            totalTokens[0] += totalTokensFuture[0]
-                            totalTokens[1] += totalTokensFuture[1]
-                        except Exception as e:
-                            return [data, totalTokens, e]
+        futures = []
+        for key in events:
+            if key is not None:
+                # This translates text above items on the map.
+                # if 'LB:' in event['note']:
+                    # totalTokens += translateNote(event, r'(?<=LB:)[^u0000-u0080]+')
+
+                futures += [submit(filename, len(page['list']), searchCodes, page, pbar) for page in events[key]['pages'] if page is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
 
 def translateNote(event, regex):
@@ -272,15 +285,15 @@ def parseCommonEvents(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
-        with ThreadPoolExecutor(max_workers=THREADS) as executor:
-            futures = [executor.submit(searchCodes, page, pbar) for page in data if page is not None]
-            for future in as_completed(futures):
-                try:
-                    totalTokensFuture = future.result()
-                    totalTokens[0] += totalTokensFuture[0]
-                    totalTokens[1] += totalTokensFuture[1]
-                except Exception as e:
-                    return [data, totalTokens, e]
+        futures = [submit(filename, len(page['list']), searchCodes, page, pbar) for page in data if page is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
 
 def parseTroops(data, filename):
@@ -297,17 +310,18 @@ def parseTroops(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
+        futures = []
         for troop in data:
             if troop is not None:
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(searchCodes, page, pbar) for page in troop['pages'] if page is not None]
-                    for future in as_completed(futures):
-                        try:
-                            totalTokensFuture = future.result()
-                            totalTokens[0] += totalTokensFuture[0]
-                            totalTokens[1] += totalTokensFuture[1]
-                        except Exception as e:
-                            return [data, totalTokens, e]
+                futures += [submit(filename, len(page['list']), searchCodes, page, pbar) for page in troop['pages'] if page is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
     
 def parseNames(data, filename, context):
@@ -401,15 +415,15 @@ def parseScenario(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
-        with ThreadPoolExecutor(max_workers=THREADS) as executor:
-            futures = [executor.submit(searchCodes, page[1], pbar) for page in data.items() if page[1] is not None]
-            for future in as_completed(futures):
-                try:
-                    totalTokensFuture = future.result()
-                    totalTokens[0] += totalTokensFuture[0]
-                    totalTokens[1] += totalTokensFuture[1]
-                except Exception as e:
-                    return [data, totalTokens, e]
+        futures = [submit(filename, len(page[1]), searchCodes, page[1], pbar) for page in data.items() if page[1] is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
 
 def searchThings(name, pbar):
@@ -532,8 +546,7 @@ def searchNames(name, pbar, context):
 def searchCodes(page, pbar):
     translatedText = ''
     currentGroup = []
-    textHistory = []
-    maxHistory = MAXHISTORY
+    textHistory = History()
     totalTokens = [0, 0]
     speaker = ''
     speakerVar = ''
@@ -556,6 +569,7 @@ def searchCodes(page, pbar):
                 pbar.update(1)
                 if len(codeList) <= i:
                     break
+            setContext(getContext()[0], codeList[i]['c'])
 
             ### All the codes are here which translate specific functions in the MAP files.
             ### IF these crash or fail your game will do the same. Use the flags to skip codes.
@@ -577,10 +591,7 @@ def searchCodes(page, pbar):
                 # If there isn't any Japanese in the text just skip
                 if IGNORETLTEXT == True:
                     if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', jaString):
-                        # Keep textHistory list at length maxHistory
                         textHistory.append('\"' + jaString + '\"')
-                        if len(textHistory) > maxHistory:
-                            textHistory.pop(0)
                         currentGroup = []  
                         continue
 
@@ -610,26 +621,26 @@ def searchCodes(page, pbar):
                     # Color Regex: ^([\\]+[cC]\[[0-9]\]+(.+?)[\\]+[cC]\[[0]\])
                     matchList = re.findall(r'(.*?([\\]+[nN]<(.+?)>).*)', finalJAString)
                     if len(matchList) > 0:  
-                        response = translateGPT(matchList[0][2], 'Reply with only the '+ LANGUAGE +' translation of the NPC name', False)
+                        response = getSpeaker(matchList[0][2])
                         totalTokens[0] += response[1][0]
                         totalTokens[1] += response[1][1]
-                        speaker = response[0].strip('.')
+                        speaker = response[0]
                         nametag = matchList[0][1].replace(matchList[0][2], speaker)
                         finalJAString = finalJAString.replace(matchList[0][1], '')
 
                         # Set next item as dialogue
                         if (codeList[j + 1]['c'] == -1 and len(codeList[j + 1]['p']) > 0) or codeList[j + 1]['c'] == -1:
                             # Set name var to top of list
-                            codeList[j]['p'][0] = nametag
+                            codeList[j]['p'] = [nametag]
                             codeList[j]['c'] = code
 
                             j += 1
-                            codeList[j]['p'][0] = finalJAString
+                            codeList[j]['p'] = [finalJAString]
                             codeList[j]['c'] = code
                             nametag = ''
                         else:
                             # Set nametag in string
-                            codeList[j]['p'][0] = nametag + finalJAString
+                            codeList[j]['p'] = [nametag + finalJAString]
                             codeList[j]['c'] = code
                         
                         # Put names in list
@@ -659,15 +670,15 @@ def searchCodes(page, pbar):
                         matchList = re.findall(r'(\\+nc<(.*?)>)(.+)?', finalJAString)    
                         if len(matchList) != 0:    
                             # Translate Speaker  
-                            response = translateGPT(matchList[0][1], 'Reply with only the '+ LANGUAGE +' translation of the NPC name', True)
+                            response = getSpeaker(matchList[0][1])
                             totalTokens[0] += response[1][0]
                             totalTokens[1] += response[1][1]
-                            speaker = response[0].strip('.')
+                            speaker = response[0]
                             nametag = matchList[0][0].replace(matchList[0][1], speaker)
                             finalJAString = finalJAString.replace(matchList[0][0], '')
 
                             # Set dialogue
-                            codeList[j]['p'][0] = matchList[0][2]
+                            codeList[j]['p'] = [matchList[0][2]]
                             codeList[j]['c'] = 401
 
                             # Remove nametag from final string
@@ -675,10 +686,10 @@ def searchCodes(page, pbar):
                     elif '\\nw' in finalJAString or '\\NW' in finalJAString:
                         matchList = re.findall(r'([\\]+[nN][wW]\[(.+?)\]+)(.+)', finalJAString)    
                         if len(matchList) != 0:    
-                            response = translateGPT(matchList[0][1], 'Reply with only the '+ LANGUAGE +' translation of the NPC name', True)
+                            response = getSpeaker(matchList[0][1])
                             totalTokens[0] += response[1][0]
                             totalTokens[1] += response[1][1]
-                            speaker = response[0].strip('.')
+                            speaker = response[0]
 
                             # Set Nametag and Remove from Final String
                             nametag = matchList[0][0].replace(matchList[0][1], speaker)
@@ -696,7 +707,7 @@ def searchCodes(page, pbar):
                         #     nametag = ''
                         # else:
                         # Set nametag in string
-                        codeList[j]['p'][0] = nametag + finalJAString
+                        codeList[j]['p'] = [nametag + finalJAString]
                         codeList[j]['c'] = code
                     ### Only for Specific games where name is surrounded by brackets.
                     # elif '【' in finalJAString:
@@ -780,7 +791,7 @@ def searchCodes(page, pbar):
 
                     # Translate
                     if speaker == '' and finalJAString != '':
-                        response = translateGPT(finalJAString, textHistory, True)
+                        response = translateGPT(finalJAString, list(textHistory), True)
                         totalTokens[0] += response[1][0]
                         totalTokens[1] += response[1][1]
                         translatedText = response[0]
@@ -789,11 +800,11 @@ def searchCodes(page, pbar):
                         translatedText = re.sub(r'(^.+?)\s?[|:]\s?', '\g<1>: ', translatedText)
 
                         # Sub Vars
-                        varResponse = subVars(translatedText)
+                        varResponse = TOKENIZER.subVars(translatedText)
                         subbedT = varResponse[0]
                         textHistory.append('\"' + varResponse[0] + '\"')
                     elif finalJAString != '':
-                        response = translateGPT(speaker + ': ' + finalJAString, textHistory, True)
+                        response = translateGPT(speaker + ': ' + finalJAString, list(textHistory), True)
                         totalTokens[0] += response[1][0]
                         totalTokens[1] += response[1][1]
                         translatedText = response[0]
@@ -802,7 +813,7 @@ def searchCodes(page, pbar):
                         translatedText = re.sub(r'(^.+?)\s?[|:]\s?', '', translatedText)
 
                         # Sub Vars
-                        varResponse = subVars(translatedText)
+                        varResponse = TOKENIZER.subVars(translatedText)
                         subbedT = varResponse[0]
                         textHistory.append('\"' + speaker + ': ' + varResponse[0] + '\"')   
                         speaker = ''             
@@ -833,9 +844,6 @@ def searchCodes(page, pbar):
                     match = []
                     syncIndex = i + 1
 
-                    # Keep textHistory list at length maxHistory
-                    if len(textHistory) > maxHistory:
-                        textHistory.pop(0)
                     currentGroup = []              
 
             ## Event Code: 122 [Set Variables]
@@ -1475,10 +1483,11 @@ def searchCodes(page, pbar):
         page['list'] = codeListFinal
 
     except IndexError as e:
-        # This is part of the logic so we just pass it
+        # This is part of the logic so we just pass it, but the rest of the page is left as it is
         traceback.print_exc()
         print(len(codeList))
         print(i+1)
+        addFailure(getContext()[0], 'Page stopped at line ' + str(i+1) + ': ' + str(e))
         # raise Exception(str(e) + '|Line:' + tracebackLineNo)  
     except Exception as e:
         traceback.print_exc()
@@ -1506,9 +1515,6 @@ def searchCodes(page, pbar):
         speaker = ''
         match = []
 
-        # Keep textHistory list at length maxHistory
-        if len(textHistory) > maxHistory:
-            textHistory.pop(0)
         currentGroup = []    
 
     return totalTokens
@@ -1593,6 +1599,7 @@ def searchSS(state, pbar):
     return totalTokens
 
 def searchSystem(data, pbar):
+    # rvpacker's System.yaml keys (game_title, armor_types, ...), not the MV/MZ System.json ones
     totalTokens = [0, 0]
     context = 'UI Text Items:\
     "逃げる" == "Escape"\
@@ -1609,10 +1616,10 @@ def searchSystem(data, pbar):
     Reply with only the '+ LANGUAGE +' translation of the UI textbox."'
 
     # Title
-    response = translateGPT(data['gameTitle'], ' Reply with the '+ LANGUAGE +' translation of the game title name', False)
+    response = translateGPT(data['game_title'], ' Reply with the '+ LANGUAGE +' translation of the game title name', False)
     totalTokens[0] += response[1][0]
     totalTokens[1] += response[1][1]
-    # data['gameTitle'] = response[0].strip('.')
+    # data['game_title'] = response[0].strip('.')
     pbar.update(1)
     
     # Terms
@@ -1629,26 +1636,26 @@ def searchSystem(data, pbar):
 
     # Armor Types
     for i in range(len(data['armor_types'])):
-        response = translateGPT(data['armorTypes'][i], 'Reply with only the '+ LANGUAGE +' translation of the armor type', False)
+        response = translateGPT(data['armor_types'][i], 'Reply with only the '+ LANGUAGE +' translation of the armor type', False)
         totalTokens[0] += response[1][0]
         totalTokens[1] += response[1][1]
-        data['armorTypes'][i] = response[0].replace('\"', '').strip()
+        data['armor_types'][i] = response[0].replace('\"', '').strip()
         pbar.update(1)
 
     # Skill Types
     for i in range(len(data['skill_types'])):
-        response = translateGPT(data['skillTypes'][i], 'Reply with only the '+ LANGUAGE +' translation', False)
+        response = translateGPT(data['skill_types'][i], 'Reply with only the '+ LANGUAGE +' translation', False)
         totalTokens[0] += response[1][0]
         totalTokens[1] += response[1][1]
-        data['skillTypes'][i] = response[0].replace('\"', '').strip()
+        data['skill_types'][i] = response[0].replace('\"', '').strip()
         pbar.update(1)
 
-    # Equip Types
-    for i in range(len(data['equip_types'])):
-        response = translateGPT(data['equipTypes'][i], 'Reply with only the '+ LANGUAGE +' translation of the equipment type. No disclaimers.', False)
+    # Weapon Types, equipment types are terms.etypes in ACE
+    for i in range(len(data['weapon_types'])):
+        response = translateGPT(data['weapon_types'][i], 'Reply with only the '+ LANGUAGE +' translation of the weapon type. No disclaimers.', False)
         totalTokens[0] += response[1][0]
         totalTokens[1] += response[1][1]
-        data['equipTypes'][i] = response[0].replace('\"', '').strip()
+        data['weapon_types'][i] = response[0].replace('\"', '').strip()
         pbar.update(1)
 
     # Variables (Optional ususally)
@@ -1659,8 +1666,8 @@ def searchSystem(data, pbar):
     #     data['variables'][i] = response[0].replace('\"', '').strip()
     #     pbar.update(1)
 
-    # Messages
-    messages = (data['terms']['messages'])
+    # Messages, only in projects that added them to the terms
+    messages = data['terms'].get('messages', {})
     for key, value in messages.items():
         response = translateGPT(value, 'Reply with only the '+ LANGUAGE +' translation of the battle text.\nTranslate "常時ダッシュ" as "Always Dash"\nTranslate "次の%1まで" as Next %1.', False)
         translatedText = response[0]
@@ -1677,145 +1684,20 @@ def searchSystem(data, pbar):
     
     return totalTokens
 
-def subVars(jaString):
-    jaString = jaString.replace('\u3000', ' ')
-
-    # Nested
-    count = 0
-    nestedList = re.findall(r'[\\]+[\w]+\[[\\]+[\w]+\[[0-9]+\]\]', jaString)
-    nestedList = set(nestedList)
-    if len(nestedList) != 0:
-        for icon in nestedList:
-            jaString = jaString.replace(icon, '{Nested_' + str(count) + '}')
-            count += 1
-
-    # Icons
-    count = 0
-    iconList = re.findall(r'[\\]+[iIkKwWaA]+\[[0-9]+\]', jaString)
-    iconList = set(iconList)
-    if len(iconList) != 0:
-        for icon in iconList:
-            jaString = jaString.replace(icon, '{Ascii_' + str(count) + '}')
-            count += 1
-
-    # Colors
-    count = 0
-    colorList = re.findall(r'[\\]+[cC]\[[0-9]+\]', jaString)
-    colorList = set(colorList)
-    if len(colorList) != 0:
-        for color in colorList:
-            jaString = jaString.replace(color, '{Color_' + str(count) + '}')
-            count += 1
-
-    # Names
-    count = 0
-    nameList = re.findall(r'[\\]+[nN]\[.+?\]+', jaString)
-    nameList = set(nameList)
-    if len(nameList) != 0:
-        for name in nameList:
-            jaString = jaString.replace(name, '{N_' + str(count) + '}')
-            count += 1
-
-    # Variables
-    count = 0
-    varList = re.findall(r'[\\]+[vV]\[[0-9]+\]', jaString)
-    varList = set(varList)
-    if len(varList) != 0:
-        for var in varList:
-            jaString = jaString.replace(var, '{Var_' + str(count) + '}')
-            count += 1
-
-    # Formatting
-    count = 0
-    if '笑えるよね.' in jaString:
-        print('t')
-    formatList = re.findall(r'[\\]+CL', jaString)
-    formatList = set(formatList)
-    if len(formatList) != 0:
-        for var in formatList:
-            jaString = jaString.replace(var, '{FCode_' + str(count) + '}')
-            count += 1
-
-    # Put all lists in list and return
-    allList = [nestedList, iconList, colorList, nameList, varList, formatList]
-    return [jaString, allList]
-
-def resubVars(translatedText, allList):
-    # Fix Spacing and ChatGPT Nonsense
-    matchList = re.findall(r'\[\s?.+?\s?\]', translatedText)
-    if len(matchList) > 0:
-        for match in matchList:
-            text = match.strip()
-            translatedText = translatedText.replace(match, text)
-
-    # Nested
-    count = 0
-    if len(allList[0]) != 0:
-        for var in allList[0]:
-            translatedText = translatedText.replace('{Nested_' + str(count) + '}', var)
-            count += 1
-
-    # Icons
-    count = 0
-    if len(allList[1]) != 0:
-        for var in allList[1]:
-            translatedText = translatedText.replace('{Ascii_' + str(count) + '}', var)
-            count += 1
-
-    # Colors
-    count = 0
-    if len(allList[2]) != 0:
-        for var in allList[2]:
-            translatedText = translatedText.replace('{Color_' + str(count) + '}', var)
-            count += 1
-
-    # Names
-    count = 0
-    if len(allList[3]) != 0:
-        for var in allList[3]:
-            translatedText = translatedText.replace('{N_' + str(count) + '}', var)
-            count += 1
-
-    # Vars
-    count = 0
-    if len(allList[4]) != 0:
-        for var in allList[4]:
-            translatedText = translatedText.replace('{Var_' + str(count) + '}', var)
-            count += 1
-    
-    # Formatting
-    count = 0
-    if len(allList[5]) != 0:
-        for var in allList[5]:
-            translatedText = translatedText.replace('{FCode_' + str(count) + '}', var)
-            count += 1
-
-    # Remove Color Variables Spaces
-    # if '\\c' in translatedText:
-    #     translatedText = re.sub(r'\s*(\\+c\[[1-9]+\])\s*', r' \1', translatedText)
-    #     translatedText = re.sub(r'\s*(\\+c\[0+\])', r'\1', translatedText)
-    return translatedText
-
-@retry(exceptions=Exception, tries=5, delay=5)
+# Each name is only translated once, shared with the other modules through speakers.json
+def getSpeaker(speaker):
+    return translateSpeaker(speaker, lambda name: translateGPT(name, 'Reply with only the '+ LANGUAGE +' translation of the NPC name', False), [0, 0], ESTIMATE)
+
+@retryPolicy
 def translateGPT(t, history, fullPromptFlag):
+    # Sub Vars
+    varResponse = TOKENIZER.subVars(t)
+    subbedT = varResponse[0]
+
     # If ESTIMATE is True just count this as an execution and return.
     if ESTIMATE:
-        enc = tiktoken.encoding_for_model(MODEL)
-        historyRaw = ''
-        if isinstance(history, list):
-            for line in history:
-                historyRaw += line
-        else:
-            historyRaw = history
-
-        inputTotalTokens = len(enc.encode(historyRaw)) + len(enc.encode(PROMPT))
-        outputTotalTokens = len(enc.encode(t)) * 2   # Estimating 2x the size of the original text
-        totalTokens = [inputTotalTokens, outputTotalTokens]
+        totalTokens = estimateRequest(t, history, subbedT)
         return (t, totalTokens)
-    
-    # Sub Vars
-    varResponse = subVars(t)
-    subbedT = varResponse[0]
 
     # If there isn't any Japanese in the text just skip
     if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', subbedT):
@@ -1851,21 +1733,28 @@ def translateGPT(t, history, fullPromptFlag):
         msg.append({"role": "user", "content": history})
     msg.append({"role": "user", "content": user})
 
-    response = openai.ChatCompletion.create(
-        temperature=0,
-        frequency_penalty=0.2,
-        presence_penalty=0.2,
-        model=MODEL,
-        messages=msg,
-        request_timeout=TIMEOUT,
-    )
-
-    # Save Translated Text
-    translatedText = response.choices[0].message.content
-    totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+    # Translation Memory
+    cachedText = getCache(subbedT, system, history, msg)
+    if cachedText is not None:
+        translatedText = cachedText
+        totalTokens = [0, 0]
+    else:
+        response = createCompletion(
+            temperature=0,
+            frequency_penalty=0.2,
+            presence_penalty=0.2,
+            model=MODEL,
+            messages=msg,
+            request_timeout=TIMEOUT,
+        )
+
+        # Save Translated Text
+        translatedText = response.choices[0].message.content
+        totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+    rawText = translatedText
 
     # Resub Vars
-    translatedText = resubVars(translatedText, varResponse[1])
+    translatedText = TOKENIZER.resubVars(translatedText, varResponse[1])
 
     # Remove Placeholder Text
     translatedText = translatedText.replace(LANGUAGE +' Translation: ', '')
@@ -1882,6 +1771,7 @@ def translateGPT(t, history, fullPromptFlag):
 
     # Return Translation
     if len(translatedText) > 15 * len(t) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
-        raise Exception
+        raise BadTranslation('Bad reply: ' + translatedText[:100])
     else:
+        setCache(subbedT, system, history, rawText)
         return [translatedText, totalTokens]
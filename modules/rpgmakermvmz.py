@@ -1,12 +1,27 @@
 # Libraries
-import json, os, re, textwrap, threading, time, traceback, tiktoken, openai
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import json, os, re, textwrap, threading, time, traceback, openai
+from collections import deque
+from concurrent.futures import as_completed
 from pathlib import Path
 from colorama import Fore
 from dotenv import load_dotenv
-from retry import retry
 from tqdm import tqdm
 
+from modules.api import createCompletion, createCompletions
+from modules.cache import getCache, setCache
+from modules.estimate import collectStrings, estimateRequest, primeTokens
+from modules.glossary import Glossary
+from modules.history import History
+from modules.journal import addEntry, getEntry
+from modules.jsonstream import Reader, Writer, dumpJSON, dumpValue, loadJSON
+from modules.metrics import addCached, getContext, setContext
+from modules.placeholders import DEFAULT, Tokenizer
+from modules.retrypolicy import BadTranslation, retryPolicy
+from modules.scheduler import cancelAll, submit
+from modules.speakers import seedSpeakers, translateSpeaker
+from modules.status import addFailure
+from modules.terms import getTerm
+
 # Open AI
 load_dotenv()
 if os.getenv('api').replace(' ', '') != '':
@@ -19,12 +34,17 @@ MODEL = os.getenv('model')
 TIMEOUT = int(os.getenv('timeout'))
 LANGUAGE = os.getenv('language').capitalize()
 PROMPT = Path('prompt.txt').read_text(encoding='utf-8')
-THREADS = int(os.getenv('threads')) # Controls how many threads are working on a single file (May have to drop this)
+INPUTDIR = os.getenv('inputDir', 'files')
+OUTPUTDIR = os.getenv('outputDir', 'translated')
 LOCK = threading.Lock()
+TOKENIZER = Tokenizer(DEFAULT)
 WIDTH = int(os.getenv('width'))
 LISTWIDTH = int(os.getenv('listWidth'))
 NOTEWIDTH = 40
-MAXHISTORY = 10
+BATCHSIZE = int(os.getenv('batchSize', '1'))  # Dialogue lines sent per request, 1 turns batching off
+RECORDSIZE = int(os.getenv('recordSize', '1'))    # Database records (Skills, Items, Actors...) sent per request
+STREAMSIZE = float(os.getenv('streamSize', '100')) * 1024 * 1024   # Map, CommonEvents and Troops files this big are streamed
+STREAMWINDOW = 64   # Events read ahead while streaming, the rest of the file stays on disk
 ESTIMATE = ''
 TOKENS = [0, 0]
 NAMESLIST = []
@@ -70,6 +90,33 @@ CODE324 = False
 CODE111 = False
 CODE108 = False
 
+# Glossary - Only the entries found in the line and its history are sent, glossary.txt replaces these
+CHARACTERS = [
+    'Character: アイル == Aeru - Gender: Male',
+    'Character: リラ == Lira - Gender: Female',
+    'Character: アザミ == Azami - Gender: Female',
+    'Character: マーガレット == Margaret - Gender: Female',
+    'Character: ミール == Miiru - Gender: Female',
+    'Character: ライト == Light - Gender: Male',
+    'Character: エスカ == Esuka',
+    'Character: シュウ == Shuu',
+    'Character: ワルチン総統 == President Waltin',
+]
+UITERMS = [
+    'UI: 逃げる == Escape',
+    'UI: 大事なもの == Key Items',
+    'UI: 最強装備 == Optimize',
+    'UI: 攻撃力 == Attack',
+    'UI: 最大ＨＰ == Max HP',
+    'UI: 経験値 == EXP',
+    'UI: 購入する == Buy',
+    'UI: 魔力攻撃 == M. Attack',
+    'UI: 魔力防御 == M. Defense',
+    'UI: %1 の%2を獲得！ == Gained %1 %2',
+]
+GLOSSARY = Glossary(default='\n'.join(CHARACTERS + UITERMS))
+seedSpeakers(GLOSSARY.getTranslations('Character'))
+
 def handleMVMZ(filename, estimate):
     global ESTIMATE, TOKENS
     ESTIMATE = estimate
@@ -91,87 +138,172 @@ def handleMVMZ(filename, estimate):
     
     else:
         try:
-            with open('translated/' + filename, 'w', encoding='utf-8') as outFile:
+            with open(os.path.join(OUTPUTDIR, filename), 'w', encoding='utf-8') as outFile:
                 start = time.time()
-                translatedData = openFiles(filename)
+                translatedData = openFiles(filename, outFile)
 
                 # Print Result
                 end = time.time()
-                json.dump(translatedData[0], outFile, ensure_ascii=False)
+                if translatedData[0] is not None:
+                    dumpJSON(translatedData[0], outFile)
                 tqdm.write(getResultString(translatedData, end - start, filename))
                 with LOCK:
                     TOKENS[0] += translatedData[1][0]
                     TOKENS[1] += translatedData[1][1]
-        except Exception:
+        except Exception as e:
+            addFailure(filename, e)
             return 'Fail'
 
     return getResultString(['', TOKENS, None], end - start, 'TOTAL')
 
-def openFiles(filename):
-    with open('files/' + filename, 'r', encoding='utf-8-sig') as f:
-        data = json.load(f)
+def openFiles(filename, outFile=None):
+    # Big event files are streamed and written as they go, everything else is loaded whole
+    if re.search(r'^Map[0-9]+\.json$|CommonEvents|Troops', filename) and os.path.getsize(os.path.join(INPUTDIR, filename)) >= STREAMSIZE:
+        setContext(filename, 'Database')
+        return streamFile(filename, outFile)
 
-        # Map Files
-        if 'Map' in filename and filename != 'MapInfos.json':
-            translatedData = parseMap(data, filename)
+    data = loadJSON(os.path.join(INPUTDIR, filename))
 
-        # CommonEvents Files
-        elif 'CommonEvents' in filename:
-            translatedData = parseCommonEvents(data, filename)
+    # Encode every string in the file at once for the estimate
+    if ESTIMATE:
+        primeTokens(collectStrings(data, []))
+    setContext(filename, 'Database')
 
-        # Actor File
-        elif 'Actors' in filename:
-            translatedData = parseNames(data, filename, 'Actors')
+    # Map Files
+    if 'Map' in filename and filename != 'MapInfos.json':
+        translatedData = parseMap(data, filename)
 
-        # Armor File
-        elif 'Armors' in filename:
-            translatedData = parseNames(data, filename, 'Armors')
+    # CommonEvents Files
+    elif 'CommonEvents' in filename:
+        translatedData = parseCommonEvents(data, filename)
 
-        # Weapons File
-        elif 'Weapons' in filename:
-            translatedData = parseNames(data, filename, 'Weapons')
-        
-        # Classes File
-        elif 'Classes' in filename:
-            translatedData = parseNames(data, filename, 'Classes')
+    # Actor File
+    elif 'Actors' in filename:
+        translatedData = parseNames(data, filename, 'Actors')
 
-        # Enemies File
-        elif 'Enemies' in filename:
-            translatedData = parseNames(data, filename, 'Enemies')
+    # Armor File
+    elif 'Armors' in filename:
+        translatedData = parseNames(data, filename, 'Armors')
 
-        # Items File
-        elif 'Items' in filename:
-            translatedData = parseThings(data, filename)
+    # Weapons File
+    elif 'Weapons' in filename:
+        translatedData = parseNames(data, filename, 'Weapons')
+    
+    # Classes File
+    elif 'Classes' in filename:
+        translatedData = parseNames(data, filename, 'Classes')
 
-        # MapInfo File
-        elif 'MapInfos' in filename:
-            translatedData = parseNames(data, filename, 'MapInfos')
+    # Enemies File
+    elif 'Enemies' in filename:
+        translatedData = parseNames(data, filename, 'Enemies')
 
-        # Skills File
-        elif 'Skills' in filename:
-            translatedData = parseSS(data, filename)
+    # Items File
+    elif 'Items' in filename:
+        translatedData = parseThings(data, filename)
 
-        # Troops File
-        elif 'Troops' in filename:
-            translatedData = parseTroops(data, filename)
+    # MapInfo File
+    elif 'MapInfos' in filename:
+        translatedData = parseNames(data, filename, 'MapInfos')
 
-        # States File
-        elif 'States' in filename:
-            translatedData = parseSS(data, filename)
+    # Skills File
+    elif 'Skills' in filename:
+        translatedData = parseSS(data, filename)
 
-        # System File
-        elif 'System' in filename:
-            translatedData = parseSystem(data, filename)
+    # Troops File
+    elif 'Troops' in filename:
+        translatedData = parseTroops(data, filename)
 
-        # Scenario File
-        elif 'Scenario' in filename:
-            translatedData = parseScenario(data, filename)
+    # States File
+    elif 'States' in filename:
+        translatedData = parseSS(data, filename)
+
+    # System File
+    elif 'System' in filename:
+        translatedData = parseSystem(data, filename)
+
+    # Scenario File
+    elif 'Scenario' in filename:
+        translatedData = parseScenario(data, filename)
+
+    else:
+        raise NameError(filename + ' Not Supported')
 
-        else:
-            raise NameError(filename + ' Not Supported')
-    
     return translatedData
 
+def streamFile(filename, outFile):
+    # Map, CommonEvents and Troops read, translated and written one event at a time
+    totalTokens = [0, 0]
+    error = []
+    pending = deque()   # [Event, Futures] in file order
+    writer = Writer(outFile)
+
+    def getFutures(event, pbar):
+        # Same units parseMap, parseCommonEvents and parseTroops submit
+        if event is None or len(error) > 0:
+            return []
+        if ESTIMATE:
+            primeTokens(collectStrings(event, []))
+        if 'pages' not in event:
+            pbar.total += len(event['list'])
+            return [submit(filename, len(event['list']), searchCodes, event, pbar, filename + '/' + str(event['id']))]
+        if '<namePop:' in event.get('note', ''):
+            noteTokens = translateNoteOmitSpace(event, r'<namePop:(.*?) [\d]+>')
+            totalTokens[0] += noteTokens[0]
+            totalTokens[1] += noteTokens[1]
+        pages = [p for p in range(len(event['pages'])) if event['pages'][p] is not None]
+        pbar.total += sum([len(event['pages'][p]['list']) for p in pages])
+        return [submit(filename, len(event['pages'][p]['list']), searchCodes, event['pages'][p], pbar, \
+                filename + '/' + str(event['id']) + '/' + str(p)) for p in pages]
+
+    def finishEvent():
+        event, futures = pending.popleft()
+        for future in futures:
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                # Whatever is left is written untranslated, the same as a failed parse
+                if len(error) == 0:
+                    error.append(e)
+                    cancelAll([future for entry in pending for future in entry[1]])
+        writer.item(event)
+
+    def streamEvents(reader, pbar):
+        writer.start('[')
+        for event in reader.iterItems():
+            pending.append([event, getFutures(event, pbar)])
+            while len(pending) > STREAMWINDOW:
+                finishEvent()
+        while len(pending) > 0:
+            finishEvent()
+        writer.end(']')
+
+    with open(os.path.join(INPUTDIR, filename), 'r', encoding='utf-8-sig') as f, \
+        tqdm(bar_format=BAR_FORMAT, position=POSITION, total=0, leave=LEAVE) as pbar:
+        pbar.desc=filename
+        reader = Reader(f)
+        if 'Map' in filename:
+            writer.start('{')
+            for key in reader.iterObject():
+                writer.key(key)
+                if key == 'events':
+                    streamEvents(reader, pbar)
+                    continue
+                value = reader.readValue()
+
+                # Translate displayName for Map files
+                if key == 'displayName' and len(error) == 0:
+                    response = translateGPT(value, 'Reply with only the '+ LANGUAGE +' translation of the RPG location name', False)
+                    totalTokens[0] += response[1][0]
+                    totalTokens[1] += response[1][1]
+                    value = response[0].replace('\"', '')
+                writer.write(dumpValue(value))
+            writer.end('}')
+        else:
+            streamEvents(reader, pbar)
+    return [None, totalTokens, error[0] if len(error) > 0 else None]
+
 def getResultString(translatedData, translationTime, filename):
     # File Print String
     totalTokenstring =\
@@ -191,6 +323,7 @@ def getResultString(translatedData, translationTime, filename):
         try:
             raise translatedData[2]
         except Exception as e:
+            addFailure(filename, e)
             errorString = str(e) + Fore.RED
             return filename + ': ' + totalTokenstring + timeString + Fore.RED + u' \u2717 ' +\
                 errorString + Fore.RESET
@@ -217,25 +350,28 @@ def parseMap(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
-        with ThreadPoolExecutor(max_workers=THREADS) as executor:
-            for event in events:
-                if event is not None:
-                    # This translates ID of events. (May break the game)
-                    if '<namePop:' in event['note']:
-                        totalTokens[0] += translateNoteOmitSpace(event, r'<namePop:(.*?) [\d]+>')[0]
-                        totalTokens[1] += translateNoteOmitSpace(event, r'<namePop:(.*?) [\d]+>')[1]
-
-                    futures = [executor.submit(searchCodes, page, pbar) for page in event['pages'] if page is not None]
-                    for future in as_completed(futures):
-                        try:
-                            totalTokensFuture = future.result()
-                            totalTokens[0] += totalTokensFuture[0]
-                            totalTokens[1] += totalTokensFuture[1]
-                        except Exception as e:
-                            return [data, totalTokens, e]
+        futures = []
+        for event in events:
+            if event is not None:
+                # This translates ID of events. (May break the game)
+                if '<namePop:' in event['note']:
+                    noteTokens = translateNoteOmitSpace(event, r'<namePop:(.*?) [\d]+>')
+                    totalTokens[0] += noteTokens[0]
+                    totalTokens[1] += noteTokens[1]
+
+                futures += [submit(filename, len(event['pages'][p]['list']), searchCodes, event['pages'][p], pbar, \
+                            filename + '/' + str(event['id']) + '/' + str(p)) for p in range(len(event['pages'])) if event['pages'][p] is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
 
-def translateNote(event, regex):
+def translateNoteOmitSpace(event, regex):
     # Regex that only matches text inside LB.
     jaString = event['note']
 
@@ -249,33 +385,22 @@ def translateNote(event, regex):
         response = translateGPT(jaString, 'Reply with the '+ LANGUAGE +' translation of the location name.', True)
         translatedText = response[0]
 
-        # Textwrap
-        translatedText = textwrap.fill(translatedText, width=NOTEWIDTH)
-
         translatedText = translatedText.replace('\"', '')
+        translatedText = translatedText.replace(' ', '_')
         event['note'] = event['note'].replace(oldJAString, translatedText)
         return response[1]
     return [0,0]
 
-def translateNoteOmitSpace(event, regex):
-    # Regex that only matches text inside LB.
-    jaString = event['note']
-
-    match = re.findall(regex, jaString, re.DOTALL)
+def addNoteField(fields, key, event, regex):
+    # Note tag text as a record field, the original is kept to put the translation back in its place
+    match = re.findall(regex, event['note'], re.DOTALL)
     if match:
-        oldJAString = match[0]
-        # Remove any textwrap
-        jaString = re.sub(r'\n', ' ', oldJAString)
-
-        # Translate
-        response = translateGPT(jaString, 'Reply with the '+ LANGUAGE +' translation of the location name.', True)
-        translatedText = response[0]
+        fields[key] = [re.sub(r'\n', ' ', match[0]), 'Reply with only the '+ LANGUAGE +' translation of the note text.', match[0]]
 
-        translatedText = translatedText.replace('\"', '')
-        translatedText = translatedText.replace(' ', '_')
-        event['note'] = event['note'].replace(oldJAString, translatedText)
-        return response[1]
-    return [0,0]
+def setNoteField(fields, translations, key, event):
+    if key in fields:
+        translatedText = textwrap.fill(translations[key], width=NOTEWIDTH)
+        event['note'] = event['note'].replace(fields[key][2], translatedText.replace('\"', ''))
 
 def parseCommonEvents(data, filename):
     totalTokens = [0, 0]
@@ -290,15 +415,15 @@ def parseCommonEvents(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
-        with ThreadPoolExecutor(max_workers=THREADS) as executor:
-            futures = [executor.submit(searchCodes, page, pbar) for page in data if page is not None]
-            for future in as_completed(futures):
-                try:
-                    totalTokensFuture = future.result()
-                    totalTokens[0] += totalTokensFuture[0]
-                    totalTokens[1] += totalTokensFuture[1]
-                except Exception as e:
-                    return [data, totalTokens, e]
+        futures = [submit(filename, len(page['list']), searchCodes, page, pbar, filename + '/' + str(page['id'])) for page in data if page is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
 
 def parseTroops(data, filename):
@@ -315,19 +440,26 @@ def parseTroops(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
+        futures = []
         for troop in data:
             if troop is not None:
-                with ThreadPoolExecutor(max_workers=THREADS) as executor:
-                    futures = [executor.submit(searchCodes, page, pbar) for page in troop['pages'] if page is not None]
-                    for future in as_completed(futures):
-                        try:
-                            totalTokensFuture = future.result()
-                            totalTokens[0] += totalTokensFuture[0]
-                            totalTokens[1] += totalTokensFuture[1]
-                        except Exception as e:
-                            return [data, totalTokens, e]
+                futures += [submit(filename, len(troop['pages'][p]['list']), searchCodes, troop['pages'][p], pbar, \
+                            filename + '/' + str(troop['id']) + '/' + str(p)) for p in range(len(troop['pages'])) if troop['pages'][p] is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
     
+def getPages(data):
+    # recordSize records per request
+    records = [record for record in data if record is not None]
+    return [records[k:k + RECORDSIZE] for k in range(0, len(records), RECORDSIZE)]
+
 def parseNames(data, filename, context):
     totalTokens = [0, 0]
     totalLines = 0
@@ -336,15 +468,14 @@ def parseNames(data, filename, context):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
             pbar.desc=filename
             pbar.total=totalLines
-            for name in data:
-                if name is not None:
-                    try:
-                        result = searchNames(name, pbar, context)       
-                        totalTokens[0] += result[0]
-                        totalTokens[1] += result[1]
-                    except Exception as e:
-                        traceback.print_exc()
-                        return [data, totalTokens, e]
+            for page in getPages(data):
+                try:
+                    result = searchNames(page, pbar, context)
+                    totalTokens[0] += result[0]
+                    totalTokens[1] += result[1]
+                except Exception as e:
+                    traceback.print_exc()
+                    return [data, totalTokens, e]
     return [data, totalTokens, None]
 
 def parseThings(data, filename):
@@ -355,14 +486,13 @@ def parseThings(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
             pbar.desc=filename
             pbar.total=totalLines
-            for name in data:
-                if name is not None:
-                    try:
-                        result = searchThings(name, pbar)       
-                        totalTokens[0] += result[0]
-                        totalTokens[1] += result[1]
-                    except Exception as e:
-                        return [data, totalTokens, e]
+            for page in getPages(data):
+                try:
+                    result = searchThings(page, pbar)
+                    totalTokens[0] += result[0]
+                    totalTokens[1] += result[1]
+                except Exception as e:
+                    return [data, totalTokens, e]
     return [data, totalTokens, None]
 
 def parseSS(data, filename):
@@ -373,14 +503,13 @@ def parseSS(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
             pbar.desc=filename
             pbar.total=totalLines
-            for ss in data:
-                if ss is not None:
-                    try:
-                        result = searchSS(ss, pbar)       
-                        totalTokens[0] += result[0]
-                        totalTokens[1] += result[1]
-                    except Exception as e:
-                        return [data, totalTokens, e]
+            for page in getPages(data):
+                try:
+                    result = searchSS(page, pbar)
+                    totalTokens[0] += result[0]
+                    totalTokens[1] += result[1]
+                except Exception as e:
+                    return [data, totalTokens, e]
     return [data, totalTokens, None]
 
 def parseSystem(data, filename):
@@ -402,7 +531,7 @@ def parseSystem(data, filename):
         pbar.desc=filename
         pbar.total=totalLines
         try:
-            result = searchSystem(data, pbar)       
+            result = searchSystem(data, pbar, filename)       
             totalTokens[0] += result[0]
             totalTokens[1] += result[1]
         except Exception as e:
@@ -421,64 +550,52 @@ def parseScenario(data, filename):
     with tqdm(bar_format=BAR_FORMAT, position=POSITION, total=totalLines, leave=LEAVE) as pbar:
         pbar.desc=filename
         pbar.total=totalLines
-        with ThreadPoolExecutor(max_workers=THREADS) as executor:
-            futures = [executor.submit(searchCodes, page[1], pbar) for page in data.items() if page[1] is not None]
-            for future in as_completed(futures):
-                try:
-                    totalTokensFuture = future.result()
-                    totalTokens[0] += totalTokensFuture[0]
-                    totalTokens[1] += totalTokensFuture[1]
-                except Exception as e:
-                    return [data, totalTokens, e]
+        futures = [submit(filename, len(page[1]), searchCodes, page[1], pbar, filename + '/' + page[0]) for page in data.items() if page[1] is not None]
+        for future in as_completed(futures):
+            try:
+                totalTokensFuture = future.result()
+                totalTokens[0] += totalTokensFuture[0]
+                totalTokens[1] += totalTokensFuture[1]
+            except Exception as e:
+                cancelAll(futures)
+                return [data, totalTokens, e]
     return [data, totalTokens, None]
 
-def searchThings(name, pbar):
-    totalTokens = [0, 0]
+def searchThings(nameList, pbar):
+    fields = {}
+    for k, name in enumerate(nameList):
+        # If there isn't any Japanese in the text just skip
+        if IGNORETLTEXT is True:
+            if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', name['name']) and re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', name['description']):
+                continue
+
+        # Name, Description and Note
+        if 'name' in name:
+            fields[str(k) + '/name'] = [name['name'], 'Reply with only the '+ LANGUAGE +' translation of the RPG item name.']
+        if 'description' in name:
+            fields[str(k) + '/description'] = [name['description'], 'Reply with only the '+ LANGUAGE +' translation of the description.']
+        addNoteField(fields, str(k) + '/sgDescription', name, r'<SG説明:(.*?)>')
+        addNoteField(fields, str(k) + '/sgCategory', name, r'<SGカテゴリ:(.*?)>')
 
-    # If there isn't any Japanese in the text just skip
-    if IGNORETLTEXT is True:
-        if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', name['name']) and re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', name['description']):
-            pbar.update(1)
-            return totalTokens
-
-    # Name
-    nameResponse = translateGPT(name['name'], 'Reply with only the '+ LANGUAGE +' translation of the RPG item name.', False) if 'name' in name else ''
-
-    # Description
-    descriptionResponse = translateGPT(name['description'], 'Reply with only the '+ LANGUAGE +' translation of the description.', False) if 'description' in name else ''
-
-    # Note
-    if '<SG説明:' in name['note']:
-        totalTokens[0] += translateNote(name, r'<SG説明:(.*?)>')[0]
-        totalTokens[1] += translateNote(name, r'<SG説明:(.*?)>')[1]
-    if '<SGカテゴリ':
-        totalTokens[0] += translateNote(name, r'<SGカテゴリ:(.*?)>')[0]
-        totalTokens[1] += translateNote(name, r'<SGカテゴリ:(.*?)>')[1]
-
-    # Count totalTokens
-    totalTokens[0] += nameResponse[1][0] if nameResponse != '' else 0
-    totalTokens[1] += nameResponse[1][1] if nameResponse != '' else 0
-    totalTokens[0] += descriptionResponse[1][0] if descriptionResponse != '' else 0
-    totalTokens[1] += descriptionResponse[1][1] if descriptionResponse != '' else 0
+    response = translateRecord(fields)
+    translations = response[0]
 
     # Set Data
-    if 'name' in name:
-        name['name'] = nameResponse[0].replace('\"', '')
-    if 'description' in name:
-        description = descriptionResponse[0]
-
-        # Remove Textwrap
-        description = description.replace('\n', ' ')
-        description = textwrap.fill(descriptionResponse[0], LISTWIDTH)
-        name['description'] = description.replace('\"', '')
-
-    pbar.update(1)
-    return totalTokens
-
-def searchNames(name, pbar, context):
-    totalTokens = [0, 0]
+    for k, name in enumerate(nameList):
+        if str(k) + '/name' in translations:
+            name['name'] = translations[str(k) + '/name'].replace('\"', '')
+        if str(k) + '/description' in translations:
+            description = translations[str(k) + '/description'].replace('\n', ' ')
+            description = textwrap.fill(description, LISTWIDTH)
+            name['description'] = description.replace('\"', '')
+        setNoteField(fields, translations, str(k) + '/sgDescription', name)
+        setNoteField(fields, translations, str(k) + '/sgCategory', name)
+        pbar.update(1)
+    return response[1]
 
+def searchNames(nameList, pbar, context):
     # Set the context of what we are translating
+    newContext = 'Reply with only the '+ LANGUAGE +' translation'
     if 'Actors' in context:
         newContext = 'Reply with only the '+ LANGUAGE +' translation of the NPC name'
     if 'Armors' in context:
@@ -493,73 +610,57 @@ def searchNames(name, pbar, context):
         newContext = 'Reply with only the '+ LANGUAGE +' translation of the RPG weapon name'
 
     # Extract Data
-    responseList = []
-    responseList.append(translateGPT(name['name'], newContext, True))
-    if 'Actors' in context:
-        responseList.append(translateGPT(name['profile'], '', True))
-        responseList.append(translateGPT(name['nickname'], 'Reply with ONLY the '+ LANGUAGE +' translation of the NPC nickname', True))
-
-    if 'Armors' in context or 'Weapons' in context:
-        if 'description' in name:
-            responseList.append(translateGPT(name['description'], '', True))
-        else:
-            responseList.append(['', 0])
-        if 'hint' in name['note']:
-            totalTokens[0] += translateNote(name, r'<hint:(.*?)>')[0]
-            totalTokens[1] += translateNote(name, r'<hint:(.*?)>')[1]
-
-    if 'Enemies' in context:
-        if 'variable_update_skill' in name['note']:
-            totalTokens[0] += translateNote(name, r'111:(.+?)\n')[0]
-            totalTokens[1] += translateNote(name, r'111:(.+?)\n')[1]
-
-        if 'desc2' in name['note']:
-            totalTokens[0] += translateNote(name, r'<desc2:([^>]*)>')[0]
-            totalTokens[1] += translateNote(name, r'<desc2:([^>]*)>')[1]
-
-        if 'desc3' in name['note']:
-            totalTokens[0] += translateNote(name, r'<desc3:([^>]*)>')[0]
-            totalTokens[1] += translateNote(name, r'<desc3:([^>]*)>')[1]
-
-    # Extract all our translations in a list from response
-    for i in range(len(responseList)):
-        totalTokens[0] += responseList[i][1][0]
-        totalTokens[1] += responseList[i][1][1]
-        responseList[i] = responseList[i][0]
+    fields = {}
+    for k, name in enumerate(nameList):
+        fields[str(k) + '/name'] = [name['name'], newContext]
+        if 'Actors' in context:
+            fields[str(k) + '/profile'] = [name['profile'], 'Reply with only the '+ LANGUAGE +' translation of the character profile']
+            fields[str(k) + '/nickname'] = [name['nickname'], 'Reply with ONLY the '+ LANGUAGE +' translation of the NPC nickname']
+            addNoteField(fields, str(k) + '/trait', name, r'<特徴1:([^>]*)>')
+
+        if 'Armors' in context or 'Weapons' in context:
+            if 'description' in name:
+                fields[str(k) + '/description'] = [name['description'], 'Reply with only the '+ LANGUAGE +' translation of the description']
+                if '<SG説明:' in name['note']:
+                    addNoteField(fields, str(k) + '/infoText', name, r'<Info Text Bottom>\n([\s\S]*?)\n</Info Text Bottom>')
+            addNoteField(fields, str(k) + '/hint', name, r'<hint:(.*?)>')
+
+        if 'Enemies' in context:
+            if 'variable_update_skill' in name['note']:
+                addNoteField(fields, str(k) + '/skill', name, r'111:(.+?)\n')
+            addNoteField(fields, str(k) + '/desc2', name, r'<desc2:([^>]*)>')
+            addNoteField(fields, str(k) + '/desc3', name, r'<desc3:([^>]*)>')
+
+    response = translateRecord(fields)
+    translations = response[0]
 
     # Set Data
-    name['name'] = responseList[0].replace('\"', '')
-    if 'Actors' in context:
-        translatedText = textwrap.fill(responseList[1], LISTWIDTH)
-        name['profile'] = translatedText.replace('\"', '')
-        translatedText = textwrap.fill(responseList[2], LISTWIDTH)
-        name['nickname'] = translatedText.replace('\"', '')
-        if '<特徴1:' in name['note']:
-            totalTokens[0] += translateNote(name, r'<特徴1:([^>]*)>')[0]
-            totalTokens[1] += translateNote(name, r'<特徴1:([^>]*)>')[1]
-
-    if 'Armors' in context or 'Weapons' in context:
-        translatedText = textwrap.fill(responseList[1], LISTWIDTH)
-        if 'description' in name:
+    for k, name in enumerate(nameList):
+        name['name'] = translations[str(k) + '/name'].replace('\"', '')
+        if 'Actors' in context:
+            translatedText = textwrap.fill(translations[str(k) + '/profile'], LISTWIDTH)
+            name['profile'] = translatedText.replace('\"', '')
+            translatedText = textwrap.fill(translations[str(k) + '/nickname'], LISTWIDTH)
+            name['nickname'] = translatedText.replace('\"', '')
+        if str(k) + '/description' in translations:
+            translatedText = textwrap.fill(translations[str(k) + '/description'], LISTWIDTH)
             name['description'] = translatedText.replace('\"', '')
-            if '<SG説明:' in name['note']:
-                totalTokens[0] += translateNote(name, r'<Info Text Bottom>\n([\s\S]*?)\n</Info Text Bottom>')[0]
-                totalTokens[1] += translateNote(name, r'<Info Text Bottom>\n([\s\S]*?)\n</Info Text Bottom>')[1]
-    pbar.update(1)
-
-    return totalTokens
+        for key in ['trait', 'infoText', 'hint', 'skill', 'desc2', 'desc3']:
+            setNoteField(fields, translations, str(k) + '/' + key, name)
+        pbar.update(1)
+    return response[1]
 
-def searchCodes(page, pbar):
+def searchCodes(page, pbar, unit=None):
     translatedText = ''
     currentGroup = []
-    textHistory = []
-    maxHistory = MAXHISTORY
+    textHistory = History()
     totalTokens = [0, 0]
     speaker = ''
     nametag = ''
     match = []
     syncIndex = 0
     CLFlag = False
+    batch = []
     global LOCK
     global NAMESLIST
 
@@ -575,6 +676,7 @@ def searchCodes(page, pbar):
                 pbar.update(1)
                 if len(codeList) <= i:
                     break
+            setContext(unit.split('/')[0] if unit is not None else getContext()[0], codeList[i]['code'])
 
             ### All the codes are here which translate specific functions in the MAP files.
             ### IF these crash or fail your game will do the same. Use the flags to skip codes.
@@ -595,10 +697,7 @@ def searchCodes(page, pbar):
                 # If there isn't any Japanese in the text just skip
                 if IGNORETLTEXT is True:
                     if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', jaString):
-                        # Keep textHistory list at length maxHistory
                         textHistory.append('\"' + jaString + '\"')
-                        if len(textHistory) > maxHistory:
-                            textHistory.pop(0)
                         currentGroup = []  
                         continue
 
@@ -629,26 +728,26 @@ def searchCodes(page, pbar):
                     # Color Regex: ^([\\]+[cC]\[[0-9]\]+(.+?)[\\]+[cC]\[[0]\])
                     matchList = re.findall(r'(.*?([\\]+[nN]<(.+?)>).*)', finalJAString)
                     if len(matchList) > 0:  
-                        response = translateGPT(matchList[0][2], 'Reply with only the '+ LANGUAGE +' translation of the NPC name', False)
+                        response = getSpeaker(matchList[0][2])
                         totalTokens[0] += response[1][0]
                         totalTokens[1] += response[1][1]
-                        speaker = response[0].strip('.')
+                        speaker = response[0]
                         nametag = matchList[0][1].replace(matchList[0][2], speaker)
                         finalJAString = finalJAString.replace(matchList[0][1], '')
 
                         # Set next item as dialogue
                         if (codeList[j + 1]['code'] == -1 and len(codeList[j + 1]['parameters']) > 0) or codeList[j + 1]['code'] == -1:
                             # Set name var to top of list
-                            codeList[j]['parameters'][0] = nametag
+                            codeList[j]['parameters'] = [nametag]
                             codeList[j]['code'] = code
 
                             j += 1
-                            codeList[j]['parameters'][0] = finalJAString
+                            codeList[j]['parameters'] = [finalJAString]
                             codeList[j]['code'] = code
                             nametag = ''
                         else:
                             # Set nametag in string
-                            codeList[j]['parameters'][0] = nametag + finalJAString
+                            codeList[j]['parameters'] = [nametag + finalJAString]
                             codeList[j]['code'] = code
                         
                         # Put names in list
@@ -671,7 +770,7 @@ def searchCodes(page, pbar):
                             finalJAString = finalJAString.replace(matchList[0][0], '')
 
                             # Set dialogue
-                            codeList[j]['parameters'][0] = matchList[0][2]
+                            codeList[j]['parameters'] = [matchList[0][2]]
                             codeList[j]['code'] = 401
 
                             # Remove nametag from final string
@@ -690,7 +789,7 @@ def searchCodes(page, pbar):
                             # Set Nametag and Remove from Final String
                             nametag = matchList[0][0].replace(matchList[0][1], speaker)
                             finalJAString = finalJAString.replace(matchList[0][0], '')
-                        codeList[j]['parameters'][0] = nametag + finalJAString
+                        codeList[j]['parameters'] = [nametag + finalJAString]
                         codeList[j]['code'] = code
 
                     ### Only for Specific games where name is surrounded by brackets.
@@ -779,9 +878,34 @@ def searchCodes(page, pbar):
                         finalJAString = finalJAString.replace('\\CL', '')
                         CLFlag = True
 
+                    # Batch Mode, queue the line and set it once the whole batch comes back
+                    if BATCHSIZE > 1 and finalJAString != '':
+                        batch.append([finalJAString, speaker, nametag, soundEffectString, CLFlag, code, j, unit])
+                        codeList[i]['parameters'] = []
+                        codeList[i]['code'] = -1
+                        if len(batch) >= BATCHSIZE:
+                            response = translateBatch(batch, codeList, textHistory)
+                            totalTokens[0] += response[0]
+                            totalTokens[1] += response[1]
+                        CLFlag = False
+                        nametag = ''
+                        speaker = ''
+                        match = []
+                        syncIndex = i + 1
+                        currentGroup = []
+                        continue
+
+                    # Journal, finished before a crash so reuse it
+                    oldSpeaker = speaker
+                    journalEntry = getEntry(unit, j, speaker + '|' + finalJAString)
+                    if journalEntry is not None:
+                        translatedText = journalEntry[0]
+                        textHistory.append(journalEntry[1])
+                        speaker = ''
+
                     # Translate
-                    if speaker == '' and finalJAString != '':
-                        response = translateGPT(finalJAString, textHistory, True)
+                    elif speaker == '' and finalJAString != '':
+                        response = translateGPT(finalJAString, list(textHistory), True)
                         totalTokens[0] += response[1][0]
                         totalTokens[1] += response[1][1]
                         translatedText = response[0]
@@ -790,10 +914,10 @@ def searchCodes(page, pbar):
                         translatedText = re.sub(r'(^.+?)\s?[|:]\s?', '\g<1>||| ', translatedText)
 
                         # Sub Vars
-                        varResponse = subVars(translatedText)
+                        varResponse = TOKENIZER.subVars(translatedText)
                         textHistory.append('\"' + varResponse[0] + '\"')
                     elif finalJAString != '':
-                        response = translateGPT(speaker + ': ' + finalJAString, textHistory, True)
+                        response = translateGPT(speaker + ': ' + finalJAString, list(textHistory), True)
                         totalTokens[0] += response[1][0]
                         totalTokens[1] += response[1][1]
                         translatedText = response[0]
@@ -802,11 +926,13 @@ def searchCodes(page, pbar):
                         translatedText = re.sub(r'(^.+?)\s?[|:]\s?', '', translatedText)
 
                         # Sub Vars
-                        varResponse = subVars(translatedText)
+                        varResponse = TOKENIZER.subVars(translatedText)
                         textHistory.append('\"' + speaker + ': ' + varResponse[0] + '\"')   
                         speaker = ''             
                     else:
                         translatedText = finalJAString    
+                    if journalEntry is None and finalJAString != '':
+                        addEntry(unit, j, oldSpeaker + '|' + finalJAString, [translatedText, textHistory[-1]])
 
                     # Textwrap
                     if FIXTEXTWRAP is True:
@@ -832,9 +958,6 @@ def searchCodes(page, pbar):
                     match = []
                     syncIndex = i + 1
 
-                    # Keep textHistory list at length maxHistory
-                    if len(textHistory) > maxHistory:
-                        textHistory.pop(0)
                     currentGroup = []              
 
             ## Event Code: 122 [Set Variables]
@@ -983,24 +1106,6 @@ def searchCodes(page, pbar):
                 if not isinstance(jaString, str):
                     continue
 
-                # Force Speaker
-                matchList = re.findall(r'(\w+)\\?', jaString)
-                if len(matchList) > 0:
-                    if 'エスカ' in jaString:
-                        speaker = 'Esuka'
-                        codeList[i]['parameters'][4] = jaString.replace(matchList[0], speaker)
-                        continue
-                    elif 'シュウ' in jaString:
-                        speaker = 'Shuu'
-                        codeList[i]['parameters'][4] = jaString.replace(matchList[0], speaker)
-                        continue
-                    elif 'ワルチン総統' in jaString:
-                        speaker = 'President Waltin'
-                        codeList[i]['parameters'][4] = jaString.replace(matchList[0], speaker)
-                        continue
-                    else:
-                        speaker = ''
-                
                 # Definitely don't want to mess with files
                 if '_' in jaString:
                     continue
@@ -1021,7 +1126,7 @@ def searchCodes(page, pbar):
                 else: endString = endString.group()
 
                 # Translate
-                response = translateGPT(jaString, 'Reply with only the '+ LANGUAGE +' translation of the NPC name.', False)
+                response = getSpeaker(jaString)
                 totalTokens[0] += response[1][0]
                 totalTokens[1] += response[1][1]
                 translatedText = response[0]
@@ -1443,6 +1548,12 @@ def searchCodes(page, pbar):
 
             ### Event Code: 102 Show Choice
             if codeList[i]['code'] == 102 and CODE102 is True:
+                # Choices use the last line for context so finish the batch first
+                if len(batch) > 0:
+                    response = translateBatch(batch, codeList, textHistory)
+                    totalTokens[0] += response[0]
+                    totalTokens[1] += response[1]
+
                 for choice in range(len(codeList[i]['parameters'][0])):
                     jaString = codeList[i]['parameters'][0][choice]
                     jaString = jaString.replace(' 。', '.')
@@ -1538,6 +1649,12 @@ def searchCodes(page, pbar):
                 # Set Data
                 codeList[i]['parameters'][1] = translatedText
 
+        # Finish Batch
+        if len(batch) > 0:
+            response = translateBatch(batch, codeList, textHistory)
+            totalTokens[0] += response[0]
+            totalTokens[1] += response[1]
+
         # Delete all -1 codes
         codeListFinal = []
         for i in range(len(codeList)):
@@ -1546,14 +1663,21 @@ def searchCodes(page, pbar):
         page['list'] = codeListFinal
 
     except IndexError as e:
-        # This is part of the logic so we just pass it
+        # This is part of the logic so we just pass it, but the rest of the page is left as it is
         traceback.print_exc()
         print(len(codeList))
         print(i+1)
+        addFailure(unit if unit is not None else getContext()[0], 'Page stopped at line ' + str(i+1) + ': ' + str(e))
         # raise Exception(str(e) + '|Line:' + tracebackLineNo)  
     except Exception as e:
         traceback.print_exc()
         raise Exception(str(e) + 'Failed to translate: ' + oldjaString) from None
+
+    # Finish Batch (IndexError skips the one above)
+    if len(batch) > 0:
+        response = translateBatch(batch, codeList, textHistory)
+        totalTokens[0] += response[0]
+        totalTokens[1] += response[1]
                 
     # Append leftover groups in 401
     if len(currentGroup) > 0:
@@ -1577,321 +1701,190 @@ def searchCodes(page, pbar):
         speaker = ''
         match = []
 
-        # Keep textHistory list at length maxHistory
-        if len(textHistory) > maxHistory:
-            textHistory.pop(0)
         currentGroup = []    
 
     return totalTokens
 
-def searchSS(state, pbar):
+def searchSS(stateList, pbar):
+    fields = {}
+    for k, state in enumerate(stateList):
+        # Name and Description
+        if 'name' in state:
+            fields[str(k) + '/name'] = [state['name'], 'Reply with only the '+ LANGUAGE +' translation of the RPG Skill name.']
+        if 'description' in state:
+            fields[str(k) + '/description'] = [state['description'], 'Reply with only the '+ LANGUAGE +' translation of the description.']
+
+        # Messages
+        for message in ['message1', 'message2', 'message3', 'message4']:
+            if message in state:
+                if len(state[message]) > 0 and state[message][0] in ['は', 'を', 'の', 'に', 'が']:
+                    fields[str(k) + '/' + message] = ['Taro' + state[message], 'reply with only the gender neutral '+ LANGUAGE +' translation of the action log. Always start the sentence with Taro. For example,\
+Translate \'Taroを倒した！\' as \'Taro was defeated!\'']
+                else:
+                    fields[str(k) + '/' + message] = [state[message], 'reply with only the gender neutral '+ LANGUAGE +' translation']
+
+        # Note
+        addNoteField(fields, str(k) + '/help', state, r'<help:([^>]*)>')
+
+    response = translateRecord(fields)
+    translations = response[0]
+
+    # Set Data
+    for k, state in enumerate(stateList):
+        if 'name' in state:
+            state['name'] = translations[str(k) + '/name'].replace('\"', '')
+        if 'description' in state:
+            # Textwrap
+            translatedText = translations[str(k) + '/description']
+            translatedText = textwrap.fill(translatedText, width=LISTWIDTH)
+            state['description'] = translatedText.replace('\"', '')
+        for message in ['message1', 'message2', 'message3', 'message4']:
+            if message in state:
+                state[message] = translations[str(k) + '/' + message].replace('\"', '').replace('Taro', '')
+        setNoteField(fields, translations, str(k) + '/help', state)
+        pbar.update(1)
+    return response[1]
+
+def searchSystem(data, pbar, filename):
     totalTokens = [0, 0]
+    context = 'Reply with only the '+ LANGUAGE +' translation of the UI textbox.'
 
-    # Name
-    nameResponse = translateGPT(state['name'], 'Reply with only the '+ LANGUAGE +' translation of the RPG Skill name.', True) if 'name' in state else ''
+    # One request per category, the reply is matched back by key
+    groups = []
 
-    # Description
-    descriptionResponse = translateGPT(state['description'], 'Reply with only the '+ LANGUAGE +' translation of the description.', True) if 'description' in state else ''
+    # Title
+    groups.append({'gameTitle': [data['gameTitle'], ' Reply with the '+ LANGUAGE +' translation of the game title name']})
 
-    # Messages
-    message1Response = ''
-    message4Response = ''
-    message2Response = ''
-    message3Response = ''
-    
-    if 'message1' in state:
-        if len(state['message1']) > 0 and state['message1'][0] in ['は', 'を', 'の', 'に', 'が']:
-            message1Response = translateGPT('Taro' + state['message1'], 'reply with only the gender neutral '+ LANGUAGE +' translation of the action log. Always start the sentence with Taro. For example,\
-Translate \'Taroを倒した！\' as \'Taro was defeated!\'', True)
-        else:
-            message1Response = translateGPT(state['message1'], 'reply with only the gender neutral '+ LANGUAGE +' translation', True)
+    # Terms
+    for term in data['terms']:
+        if term != 'messages':
+            groups.append(getListFields(data['terms'][term], 'terms/' + term, context))
 
-    if 'message2' in state:
-        if len(state['message2']) > 0 and state['message2'][0] in ['は', 'を', 'の', 'に', 'が']:
-            message2Response = translateGPT('Taro' + state['message2'], 'reply with only the gender neutral '+ LANGUAGE +' translation of the action log. Always start the sentence with Taro. For example,\
-Translate \'Taroを倒した！\' as \'Taro was defeated!\'', True)
-        else:
-            message2Response = translateGPT(state['message2'], 'reply with only the gender neutral '+ LANGUAGE +' translation', True)
+    # Armor, Skill and Equip Types
+    fields = getListFields(data['armorTypes'], 'armorTypes', 'Reply with only the '+ LANGUAGE +' translation of the armor type')
+    fields.update(getListFields(data['skillTypes'], 'skillTypes', 'Reply with only the '+ LANGUAGE +' translation'))
+    fields.update(getListFields(data['equipTypes'], 'equipTypes', 'Reply with only the '+ LANGUAGE +' translation of the equipment type. No disclaimers.'))
+    groups.append(fields)
 
-    if 'message3' in state:
-        if len(state['message3']) > 0 and state['message3'][0] in ['は', 'を', 'の', 'に', 'が']:
-            message3Response = translateGPT('Taro' + state['message3'], 'reply with only the gender neutral '+ LANGUAGE +' translation of the action log. Always start the sentence with Taro. For example,\
-Translate \'Taroを倒した！\' as \'Taro was defeated!\'', True)
-        else:
-            message3Response = translateGPT(state['message3'], 'reply with only the gender neutral '+ LANGUAGE +' translation', True)
+    # Variables (Optional ususally)
+    # groups.append(getListFields(data['variables'], 'variables', 'Reply with only the '+ LANGUAGE +' translation of the title'))
 
-    if 'message4' in state:
-        if len(state['message4']) > 0 and state['message4'][0] in ['は', 'を', 'の', 'に', 'が']:
-            message4Response = translateGPT('Taro' + state['message4'], 'reply with only the gender neutral '+ LANGUAGE +' translation of the action log. Always start the sentence with Taro. For example,\
-Translate \'Taroを倒した！\' as \'Taro was defeated!\'', True)
-        else:
-            message4Response = translateGPT(state['message4'], 'reply with only the gender neutral '+ LANGUAGE +' translation', True)
+    # Messages
+    messages = data['terms']['messages']
+    groups.append({'messages/' + key: [value, 'Reply with only the '+ LANGUAGE +' translation of the battle text.'] for key, value in messages.items()})
 
-    # if 'note' in state:
-    if 'help' in state['note']:
-        totalTokens[0] += translateNote(state, r'<help:([^>]*)>')[0]
-        totalTokens[1] += translateNote(state, r'<help:([^>]*)>')[1]
-    
-    # Count totalTokens
-    totalTokens[0] += nameResponse[1][0] if nameResponse != '' else 0
-    totalTokens[1] += nameResponse[1][1] if nameResponse != '' else 0
-    totalTokens[0] += descriptionResponse[1][0] if descriptionResponse != '' else 0
-    totalTokens[1] += descriptionResponse[1][1] if descriptionResponse != '' else 0
-    totalTokens[0] += message1Response[1][0] if message1Response != '' else 0
-    totalTokens[1] += message1Response[1][1] if message1Response != '' else 0
-    totalTokens[0] += message2Response[1][0] if message2Response != '' else 0
-    totalTokens[1] += message2Response[1][1] if message2Response != '' else 0
-    totalTokens[0] += message3Response[1][0] if message3Response != '' else 0
-    totalTokens[1] += message3Response[1][1] if message3Response != '' else 0
-    totalTokens[0] += message4Response[1][0] if message4Response != '' else 0
-    totalTokens[1] += message4Response[1][1] if message4Response != '' else 0
+    futures = [submit(filename, len(fields), translateTerms, fields, pbar) for fields in groups if len(fields) > 0]
+    translations = {}
+    for future in as_completed(futures):
+        try:
+            response = future.result()
+        except Exception:
+            cancelAll(futures)
+            raise
+        translations.update(response[0])
+        totalTokens[0] += response[1][0]
+        totalTokens[1] += response[1][1]
 
     # Set Data
-    if 'name' in state:
-        state['name'] = nameResponse[0].replace('\"', '')
-    if 'description' in state:
-        # Textwrap
-        translatedText = descriptionResponse[0]
-        translatedText = textwrap.fill(translatedText, width=LISTWIDTH)
-        state['description'] = translatedText.replace('\"', '')
-    if 'message1' in state:
-        state['message1'] = message1Response[0].replace('\"', '').replace('Taro', '')
-    if 'message2' in state:
-        state['message2'] = message2Response[0].replace('\"', '').replace('Taro', '')
-    if 'message3' in state:
-        state['message3'] = message3Response[0].replace('\"', '').replace('Taro', '')
-    if 'message4' in state:
-        state['message4'] = message4Response[0].replace('\"', '').replace('Taro', '')
-
-    pbar.update(1)
+    for key, translatedText in translations.items():
+        path = key.split('/')
+        if path[0] == 'gameTitle':
+            data['gameTitle'] = translatedText.strip('.')
+        elif path[0] == 'messages':
+            # Remove characters that may break scripts
+            charList = ['.', '\"', '\\n']
+            for char in charList:
+                translatedText = translatedText.replace(char, '')
+            messages[path[1]] = translatedText
+        elif path[0] == 'terms':
+            data['terms'][path[1]][int(path[2])] = translatedText.replace('\"', '').strip()
+        else:
+            data[path[0]][int(path[1])] = translatedText.replace('\"', '').strip()
     return totalTokens
 
-def searchSystem(data, pbar):
+def getListFields(termList, prefix, instruction):
+    return {prefix + '/' + str(i): [termList[i], instruction] for i in range(len(termList)) if isinstance(termList[i], str) and termList[i] != ''}
+
+def translateTerms(fields, pbar):
+    response = translateRecord(fields)
+    pbar.update(len(fields))
+    return response
+
+def translateBatch(batch, codeList, textHistory):
     totalTokens = [0, 0]
-    context = 'UI Text Items:\
-    "逃げる" == "Escape"\
-    "大事なもの" == "Key Items"\
-    "最強装備" == "Optimize"\
-    "攻撃力" == "Attack"\
-    "最大ＨＰ" == "Max HP"\
-    "経験値" == "EXP"\
-    "購入する" == "Buy"\
-    "魔力攻撃" == "M. Attack\
-    "魔力防御" == "M. Defense\
-    "%1 の%2を獲得！" == "Gained %1 %2"\
-    "お金を %1\\G 手に入れた！" == ""\
-    Reply with only the '+ LANGUAGE +' translation of the UI textbox."'
 
-    # Title
-    response = translateGPT(data['gameTitle'], ' Reply with the '+ LANGUAGE +' translation of the game title name', False)
-    totalTokens[0] += response[1][0]
-    totalTokens[1] += response[1][1]
-    data['gameTitle'] = response[0].strip('.')
-    pbar.update(1)
-    
-    # Terms
-    for term in data['terms']:
-        if term != 'messages':
-            termList = data['terms'][term]
-            for i in range(len(termList)):  # Last item is a messages object
-                if termList[i] is not None:
-                    response = translateGPT(termList[i], context, False)
-                    totalTokens[0] += response[1][0]
-                    totalTokens[1] += response[1][1]
-                    termList[i] = response[0].replace('\"', '').strip()
-                    pbar.update(1)
+    # Journal hits are done already, the speaker goes in front of the rest same as the single line path
+    journalList = []
+    tList = []
+    for item in batch:
+        journalList.append(getEntry(item[7], item[6], item[1] + '|' + item[0]))
+        if journalList[-1] is not None:
+            continue
+        if item[1] != '':
+            tList.append(item[1] + ': ' + item[0])
+        else:
+            tList.append(item[0])
 
-    # Armor Types
-    for i in range(len(data['armorTypes'])):
-        response = translateGPT(data['armorTypes'][i], 'Reply with only the '+ LANGUAGE +' translation of the armor type', False)
+    # Translate
+    translatedList = []
+    if len(tList) > 0:
+        response = translateGPTBatch(tList, list(textHistory), True)
         totalTokens[0] += response[1][0]
         totalTokens[1] += response[1][1]
-        data['armorTypes'][i] = response[0].replace('\"', '').strip()
-        pbar.update(1)
+        translatedList = response[0]
 
-    # Skill Types
-    for i in range(len(data['skillTypes'])):
-        response = translateGPT(data['skillTypes'][i], 'Reply with only the '+ LANGUAGE +' translation', False)
-        totalTokens[0] += response[1][0]
-        totalTokens[1] += response[1][1]
-        data['skillTypes'][i] = response[0].replace('\"', '').strip()
-        pbar.update(1)
+    for k in range(len(batch)):
+        finalJAString, speaker, nametag, soundEffectString, CLFlag, code, j, unit = batch[k]
 
-    # Equip Types
-    for i in range(len(data['equipTypes'])):
-        response = translateGPT(data['equipTypes'][i], 'Reply with only the '+ LANGUAGE +' translation of the equipment type. No disclaimers.', False)
-        totalTokens[0] += response[1][0]
-        totalTokens[1] += response[1][1]
-        data['equipTypes'][i] = response[0].replace('\"', '').strip()
-        pbar.update(1)
+        if journalList[k] is not None:
+            translatedText = journalList[k][0]
+            textHistory.append(journalList[k][1])
+        elif speaker == '':
+            translatedText = translatedList.pop(0)
 
-    # Variables (Optional ususally)
-    # for i in range(len(data['variables'])):
-    #     response = translateGPT(data['variables'][i], 'Reply with only the '+ LANGUAGE +' translation of the title', False)
-    #     totalTokens[0] += response[1][0]
-    #     totalTokens[1] += response[1][1]
-    #     data['variables'][i] = response[0].replace('\"', '').strip()
-    #     pbar.update(1)
+            # Change added speaker
+            translatedText = re.sub(r'(^.+?)\s?[|:]\s?', '\g<1>||| ', translatedText)
 
-    # Messages
-    messages = (data['terms']['messages'])
-    for key, value in messages.items():
-        response = translateGPT(value, 'Reply with only the '+ LANGUAGE +' translation of the battle text.\nTranslate "常時ダッシュ" as "Always Dash"\nTranslate "次の%1まで" as Next %1.', False)
-        translatedText = response[0]
+            # Sub Vars
+            varResponse = TOKENIZER.subVars(translatedText)
+            textHistory.append('\"' + varResponse[0] + '\"')
+        else:
+            # Remove added speaker
+            translatedText = re.sub(r'(^.+?)\s?[|:]\s?', '', translatedList.pop(0))
 
-        # Remove characters that may break scripts
-        charList = ['.', '\"', '\\n']
-        for char in charList:
-            translatedText = translatedText.replace(char, '')
+            # Sub Vars
+            varResponse = TOKENIZER.subVars(translatedText)
+            textHistory.append('\"' + speaker + ': ' + varResponse[0] + '\"')
+        if journalList[k] is None:
+            addEntry(unit, j, speaker + '|' + finalJAString, [translatedText, textHistory[-1]])
 
-        totalTokens[0] += response[1][0]
-        totalTokens[1] += response[1][1]
-        messages[key] = translatedText
-        pbar.update(1)
-    
+        # Textwrap
+        if FIXTEXTWRAP is True:
+            translatedText = textwrap.fill(translatedText, width=WIDTH)
+            if BRFLAG is True:
+                translatedText = translatedText.replace('\n', '<br>')
+
+        # Add Beginning Text
+        if CLFlag:
+            translatedText = '\\CL' + translatedText
+        translatedText = soundEffectString + nametag + translatedText
+
+        # Set Data
+        translatedText = translatedText.replace('\"', '')
+        codeList[j]['parameters'] = [translatedText]
+        codeList[j]['code'] = code
+
+    batch.clear()
     return totalTokens
 
-# Save some money and enter the character before translation
+# Each name is only translated once, known ones come from the glossary and speakers.json
 def getSpeaker(speaker):
-    match speaker:
-        case 'アイル':
-            return 'Aeru'
-        case 'リラ':
-            return 'Lira'
-        case 'アザミ':
-            return 'Azami'
-        case 'マーガレット':
-            return 'Margaret'
-        case 'ミール':
-            return 'Miiru'
-        case 'ライト':
-            return 'Light'
-        case _:
-            return translateGPT(speaker, 'Reply with only the '+ LANGUAGE +' translation of the NPC name', False)
-
-def subVars(jaString):
-    jaString = jaString.replace('\u3000', ' ')
-
-    # Nested
-    count = 0
-    nestedList = re.findall(r'[\\]+[\w]+\[[\\]+[\w]+\[[0-9]+\]\]', jaString)
-    nestedList = set(nestedList)
-    if len(nestedList) != 0:
-        for icon in nestedList:
-            jaString = jaString.replace(icon, '{Nested_' + str(count) + '}')
-            count += 1
-
-    # Icons
-    count = 0
-    iconList = re.findall(r'[\\]+[iIkKwWaA]+\[[0-9]+\]', jaString)
-    iconList = set(iconList)
-    if len(iconList) != 0:
-        for icon in iconList:
-            jaString = jaString.replace(icon, '{Ascii_' + str(count) + '}')
-            count += 1
-
-    # Colors
-    count = 0
-    colorList = re.findall(r'[\\]+[cC]\[[0-9]+\]', jaString)
-    colorList = set(colorList)
-    if len(colorList) != 0:
-        for color in colorList:
-            jaString = jaString.replace(color, '{Color_' + str(count) + '}')
-            count += 1
-
-    # Names
-    count = 0
-    nameList = re.findall(r'[\\]+[nN]\[.+?\]+', jaString)
-    nameList = set(nameList)
-    if len(nameList) != 0:
-        for name in nameList:
-            jaString = jaString.replace(name, '{N_' + str(count) + '}')
-            count += 1
-
-    # Variables
-    count = 0
-    varList = re.findall(r'[\\]+[vV]\[[0-9]+\]', jaString)
-    varList = set(varList)
-    if len(varList) != 0:
-        for var in varList:
-            jaString = jaString.replace(var, '{Var_' + str(count) + '}')
-            count += 1
-
-    # Formatting
-    count = 0
-    if '笑えるよね.' in jaString:
-        print('t')
-    formatList = re.findall(r'[\\]+[\w]+\[.+?\]', jaString)
-    formatList = set(formatList)
-    if len(formatList) != 0:
-        for var in formatList:
-            jaString = jaString.replace(var, '{FCode_' + str(count) + '}')
-            count += 1
-
-    # Put all lists in list and return
-    allList = [nestedList, iconList, colorList, nameList, varList, formatList]
-    return [jaString, allList]
-
-def resubVars(translatedText, allList):
-    # Fix Spacing and ChatGPT Nonsense
-    matchList = re.findall(r'\[\s?.+?\s?\]', translatedText)
-    if len(matchList) > 0:
-        for match in matchList:
-            text = match.strip()
-            translatedText = translatedText.replace(match, text)
-
-    # Nested
-    count = 0
-    if len(allList[0]) != 0:
-        for var in allList[0]:
-            translatedText = translatedText.replace('{Nested_' + str(count) + '}', var)
-            count += 1
-
-    # Icons
-    count = 0
-    if len(allList[1]) != 0:
-        for var in allList[1]:
-            translatedText = translatedText.replace('{Ascii_' + str(count) + '}', var)
-            count += 1
-
-    # Colors
-    count = 0
-    if len(allList[2]) != 0:
-        for var in allList[2]:
-            translatedText = translatedText.replace('{Color_' + str(count) + '}', var)
-            count += 1
-
-    # Names
-    count = 0
-    if len(allList[3]) != 0:
-        for var in allList[3]:
-            translatedText = translatedText.replace('{N_' + str(count) + '}', var)
-            count += 1
-
-    # Vars
-    count = 0
-    if len(allList[4]) != 0:
-        for var in allList[4]:
-            translatedText = translatedText.replace('{Var_' + str(count) + '}', var)
-            count += 1
-    
-    # Formatting
-    count = 0
-    if len(allList[5]) != 0:
-        for var in allList[5]:
-            translatedText = translatedText.replace('{FCode_' + str(count) + '}', var)
-            count += 1
-
-    # Remove Color Variables Spaces
-    # if '\\c' in translatedText:
-    #     translatedText = re.sub(r'\s*(\\+c\[[1-9]+\])\s*', r' \1', translatedText)
-    #     translatedText = re.sub(r'\s*(\\+c\[0+\])', r'\1', translatedText)
-    return translatedText
+    return translateSpeaker(speaker, lambda name: translateGPT(name, 'Reply with only the '+ LANGUAGE +' translation of the NPC name', False), [0, 0], ESTIMATE)
 
-@retry(exceptions=Exception, tries=5, delay=5)
+@retryPolicy
 def translateGPT(t, history, fullPromptFlag):
     # Sub Vars
-    varResponse = subVars(t)
+    varResponse = TOKENIZER.subVars(t)
     subbedT = varResponse[0]
 
     # If there isn't any Japanese in the text just skip
@@ -1900,29 +1893,36 @@ def translateGPT(t, history, fullPromptFlag):
 
     # If ESTIMATE is True just count this as an execution and return.
     if ESTIMATE:
-        enc = tiktoken.encoding_for_model(MODEL)
-        historyRaw = ''
-        if isinstance(history, list):
-            for line in history:
-                historyRaw += line
-        else:
-            historyRaw = history
-
-        inputTotalTokens = len(enc.encode(historyRaw)) + len(enc.encode(PROMPT))
-        outputTotalTokens = len(enc.encode(t)) * 2   # Estimating 2x the size of the original text
-        totalTokens = [inputTotalTokens, outputTotalTokens]
+        totalTokens = estimateRequest(t, history, subbedT)
         return (t, totalTokens)
 
-    # Characters
-    context = 'Game Characters:\
-        Character: アイル == Aeru - Gender: Male\
-        Character: リラ == Lira - Gender: Female\
-        Character: アザミ == Azami - Gender: Female\
-        Character: マーガレット == Margaret - Gender: Female\
-        Character: ミール == Miiru - Gender: Female\
-        Character: ライト == Light - Gender: Male'
-
     # Prompt
+    system, msg = getMessages(t, subbedT, history, fullPromptFlag)
+
+    # Translation Memory
+    cachedText = getCache(subbedT, system, history, msg)
+    if cachedText is not None:
+        translatedText = cachedText
+        totalTokens = [0, 0]
+    else:
+        response = createCompletion(
+            temperature=0,
+            frequency_penalty=0.2,
+            presence_penalty=0.2,
+            model=MODEL,
+            messages=msg,
+            request_timeout=TIMEOUT,
+        )
+
+        # Save Translated Text
+        translatedText = response.choices[0].message.content
+        totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+
+    # Return Translation
+    return [checkTranslation(t, varResponse, system, history, translatedText), totalTokens]
+
+def getMessages(t, subbedT, history, fullPromptFlag):
+    # Returns [system, msg] for one line
     if fullPromptFlag:
         system = PROMPT
         user = 'Line to Translate = ' + subbedT
@@ -1933,31 +1933,258 @@ def translateGPT(t, history, fullPromptFlag):
     # Create Message List
     msg = []
     msg.append({"role": "system", "content": system})
-    msg.append({"role": "user", "content": context})
+    glossary = GLOSSARY.getBlock([t] + (history if isinstance(history, list) else [history]))
+    if glossary != '':
+        msg.append({"role": "user", "content": glossary})
     if isinstance(history, list):
         for line in history:
             msg.append({"role": "user", "content": line})
     else:
         msg.append({"role": "user", "content": history})
     msg.append({"role": "user", "content": user})
+    return [system, msg]
 
-    response = openai.ChatCompletion.create(
+def checkTranslation(t, varResponse, system, history, rawText):
+    # Resub Vars
+    translatedText = TOKENIZER.resubVars(rawText, varResponse[1])
+
+    # Remove Placeholder Text
+    translatedText = cleanTranslation(translatedText)
+
+    # Return Translation
+    if len(translatedText) > 15 * len(t) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
+        raise BadTranslation('Bad reply: ' + translatedText[:100])
+    setCache(varResponse[0], system, history, rawText)
+    return translatedText
+
+def translateGPTList(requestList):
+    # [t, history, fullPromptFlag] for each line, same as translateGPT but every line that misses the
+    # Translation Memory goes out together through createCompletions. Returns [translatedText, tokens] per line
+    responseList = []
+    pendingList = []
+    for t, history, fullPromptFlag in requestList:
+        varResponse = TOKENIZER.subVars(t)
+        responseList.append([t, [0, 0]])
+
+        # If there isn't any Japanese in the text just skip
+        if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', varResponse[0]):
+            continue
+
+        system, msg = getMessages(t, varResponse[0], history, fullPromptFlag)
+        cachedText = getCache(varResponse[0], system, history, msg, wait=False)
+        if cachedText is not None:
+            responseList[-1][0] = checkTranslation(t, varResponse, system, history, cachedText)
+        else:
+            pendingList.append([len(responseList) - 1, varResponse, system, msg])
+    if len(pendingList) == 0:
+        return responseList
+
+    responses = createCompletions([{
+        'temperature': 0,
+        'frequency_penalty': 0.2,
+        'presence_penalty': 0.2,
+        'model': MODEL,
+        'messages': msg,
+        'request_timeout': TIMEOUT,
+    } for k, varResponse, system, msg in pendingList])
+    for [k, varResponse, system, msg], response in zip(pendingList, responses):
+        t, history, fullPromptFlag = requestList[k]
+        translatedText = checkTranslation(t, varResponse, system, history, response.choices[0].message.content)
+        responseList[k] = [translatedText, [response.usage.prompt_tokens, response.usage.completion_tokens]]
+    return responseList
+
+@retryPolicy
+def translateGPTBatch(tList, history, fullPromptFlag):
+    totalTokens = [0, 0]
+    translatedList = list(tList)
+    varResponseList = []
+    pendingList = []
+
+    # Sub Vars and check Translation Memory, only what's left goes to the API
+    system = PROMPT if fullPromptFlag else 'Output ONLY the '+ LANGUAGE +' translation in the following format: `Translation: <'+ LANGUAGE.upper() +'_TRANSLATION>`'
+    for k in range(len(tList)):
+        varResponse = TOKENIZER.subVars(tList[k])
+        varResponseList.append(varResponse)
+
+        # If there isn't any Japanese in the text just skip
+        if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', varResponse[0]):
+            continue
+
+        cachedText = getCache(varResponse[0], system, history, wait=False)
+        if cachedText is not None:
+            translatedList[k] = cleanTranslation(TOKENIZER.resubVars(cachedText, varResponse[1]))
+        else:
+            pendingList.append(k)
+
+    if len(pendingList) == 0:
+        return [translatedList, totalTokens]
+    subbedList = [varResponseList[k][0] for k in pendingList]
+
+    # If ESTIMATE is True just count this as an execution and return.
+    if ESTIMATE:
+        totalTokens = estimateRequest(json.dumps(subbedList, ensure_ascii=False), history)
+        return [translatedList, totalTokens]
+
+    # Create Message List
+    msg = []
+    msg.append({"role": "system", "content": system})
+    glossary = GLOSSARY.getBlock(subbedList + (history if isinstance(history, list) else [history]))
+    if glossary != '':
+        msg.append({"role": "user", "content": glossary})
+    if isinstance(history, list):
+        for line in history:
+            msg.append({"role": "user", "content": line})
+    else:
+        msg.append({"role": "user", "content": history})
+    msg.append({"role": "user", "content": 'Translate every line in the following JSON array. Reply with ONLY a JSON array of the '\
+        + LANGUAGE + ' translations in the same order, ' + str(len(subbedList)) + ' items long.'})
+    msg.append({"role": "user", "content": 'Lines to Translate = ' + json.dumps(subbedList, ensure_ascii=False)})
+
+    response = createCompletion(
         temperature=0,
         frequency_penalty=0.2,
         presence_penalty=0.2,
         model=MODEL,
         messages=msg,
         request_timeout=TIMEOUT,
+        lines=len(subbedList),
     )
-
-    # Save Translated Text
-    translatedText = response.choices[0].message.content
     totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
 
-    # Resub Vars
-    translatedText = resubVars(translatedText, varResponse[1])
+    # Map the reply back to the lines
+    replyList = None
+    content = response.choices[0].message.content
+    matchList = re.findall(r'\[.*\]', content, re.DOTALL)
+    if len(matchList) > 0:
+        try:
+            replyList = json.loads(matchList[0])
+        except ValueError:
+            replyList = None
+    if not isinstance(replyList, list) or len(replyList) != len(subbedList):
+        # Count is off, fall back to one request per line so nothing gets misplaced
+        replyList = [None] * len(pendingList)
+
+    redoList = []
+    for k, rawText in zip(pendingList, replyList):
+        if rawText is None:
+            redoList.append(k)
+            continue
+        rawText = str(rawText)
+        translatedText = cleanTranslation(TOKENIZER.resubVars(rawText, varResponseList[k][1]))
+
+        # Bad line, redo just that one
+        if len(translatedText) > 15 * len(tList[k]) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
+            redoList.append(k)
+            continue
+
+        setCache(varResponseList[k][0], system, history, rawText)
+        translatedList[k] = translatedText
+
+    # Redone lines don't depend on each other, they go out together
+    for k, lineResponse in zip(redoList, translateGPTList([[tList[k], history, fullPromptFlag] for k in redoList])):
+        translatedList[k] = lineResponse[0]
+        totalTokens[0] += lineResponse[1][0]
+        totalTokens[1] += lineResponse[1][1]
+    return [translatedList, totalTokens]
+
+@retryPolicy
+def translateRecord(fields):
+    # fields is Key -> [Text, Instruction], every field of a page of records goes out as one JSON object
+    totalTokens = [0, 0]
+    translations = {key: field[0] for key, field in fields.items()}
+    varResponses = {}
+    pendingList = []
+
+    # Same keys as translateGPT(text, instruction, False), fields share the Translation Memory with single lines
+    system = 'Output ONLY the '+ LANGUAGE +' translation in the following format: `Translation: <'+ LANGUAGE.upper() +'_TRANSLATION>`'
+    for key, field in fields.items():
+        varResponse = TOKENIZER.subVars(field[0])
+        varResponses[key] = varResponse
+
+        # Default RPG Maker terms already have a translation
+        term = getTerm(field[0])
+        if term is not None:
+            translations[key] = term
+            addCached()
+            continue
+
+        # If there isn't any Japanese in the text just skip
+        if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', varResponse[0]):
+            continue
+
+        cachedText = getCache(varResponse[0], system, field[1], wait=False)
+        if cachedText is not None:
+            translations[key] = cleanTranslation(TOKENIZER.resubVars(cachedText, varResponse[1]))
+        else:
+            pendingList.append(key)
 
-    # Remove Placeholder Text
+    if len(pendingList) == 0:
+        return [translations, totalTokens]
+    subbedRecord = {key: varResponses[key][0] for key in pendingList}
+
+    # If ESTIMATE is True just count this as an execution and return.
+    if ESTIMATE:
+        totalTokens = estimateRequest(json.dumps(subbedRecord, ensure_ascii=False), [fields[key][1] for key in pendingList])
+        return [translations, totalTokens]
+
+    # Create Message List
+    msg = []
+    msg.append({"role": "system", "content": system})
+    glossary = GLOSSARY.getBlock(list(subbedRecord.values()))
+    if glossary != '':
+        msg.append({"role": "user", "content": glossary})
+    msg.append({"role": "user", "content": 'Translate every value in the following JSON object. Reply with ONLY a JSON object with the same keys and the '\
+        + LANGUAGE + ' translations as values. How to translate each key:\n' + '\n'.join([key + ': ' + fields[key][1] for key in pendingList])})
+    msg.append({"role": "user", "content": 'Record to Translate = ' + json.dumps(subbedRecord, ensure_ascii=False)})
+
+    response = createCompletion(
+        temperature=0,
+        frequency_penalty=0.2,
+        presence_penalty=0.2,
+        model=MODEL,
+        messages=msg,
+        request_timeout=TIMEOUT,
+        lines=len(pendingList),
+    )
+    totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+
+    # Map the reply back to the fields
+    reply = None
+    content = response.choices[0].message.content
+    matchList = re.findall(r'\{.*\}', content, re.DOTALL)
+    if len(matchList) > 0:
+        try:
+            reply = json.loads(matchList[0])
+        except ValueError:
+            reply = None
+    if not isinstance(reply, dict) or any([key not in reply for key in pendingList]):
+        # Keys are off, fall back to one request per field so nothing gets misplaced
+        reply = {}
+
+    redoList = []
+    for key in pendingList:
+        if key not in reply:
+            redoList.append(key)
+            continue
+        rawText = str(reply[key])
+        translatedText = cleanTranslation(TOKENIZER.resubVars(rawText, varResponses[key][1]))
+
+        # Bad field, redo just that one
+        if len(translatedText) > 15 * len(fields[key][0]) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
+            redoList.append(key)
+            continue
+
+        setCache(varResponses[key][0], system, fields[key][1], rawText)
+        translations[key] = translatedText
+
+    # Redone fields don't depend on each other, they go out together
+    for key, fieldResponse in zip(redoList, translateGPTList([[fields[key][0], fields[key][1], False] for key in redoList])):
+        translations[key] = fieldResponse[0]
+        totalTokens[0] += fieldResponse[1][0]
+        totalTokens[1] += fieldResponse[1][1]
+    return [translations, totalTokens]
+
+def cleanTranslation(translatedText):
     translatedText = translatedText.replace(LANGUAGE +' Translation: ', '')
     translatedText = translatedText.replace('Translation: ', '')
     translatedText = translatedText.replace('Line to Translate = ', '')
@@ -1975,9 +2202,4 @@ def translateGPT(t, history, fullPromptFlag):
     translatedText = translatedText.replace('、', ',')
     translatedText = translatedText.replace('？', '?')
     translatedText = translatedText.replace('！', '!')
-
-    # Return Translation
-    if len(translatedText) > 15 * len(t) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
-        raise Exception
-    else:
-        return [translatedText, totalTokens]
+    return translatedText
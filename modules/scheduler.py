@@ -0,0 +1,71 @@
+# Scheduler
+# One worker pool for every file instead of a ThreadPoolExecutor per file (or per troop). Files queue
+# their pages here and workers always take the biggest page of the file with the most work left, so a
+# run with one huge CommonEvents.json and many tiny maps ends when the total work is done.
+import heapq
+import itertools
+import os
+import threading
+from concurrent.futures import Future, wait
+
+from dotenv import load_dotenv
+
+from modules.concurrency import getThreads
+from modules.metrics import setContext
+
+#Globals
+load_dotenv()
+WORKERS = int(os.getenv('workers', '0')) or getThreads('threads') * int(os.getenv('fileThreads'))
+CONDITION = threading.Condition()
+QUEUES = {}     # File -> Heap of [-Weight, Order, Future, Function, Args]
+REMAINING = {}  # File -> Weight queued or running
+ORDER = itertools.count()
+WORKERLIST = []
+
+def startWorkers():
+    # Caller holds CONDITION
+    while len(WORKERLIST) < WORKERS:
+        worker = threading.Thread(target=runWorker, name='scheduler' + str(len(WORKERLIST)), daemon=True)
+        WORKERLIST.append(worker)
+        worker.start()
+
+def submit(group, weight, fn, *args):
+    future = Future()
+    with CONDITION:
+        startWorkers()
+        heapq.heappush(QUEUES.setdefault(group, []), (-weight, next(ORDER), future, fn, args))
+        REMAINING[group] = REMAINING.get(group, 0) + weight
+        CONDITION.notify()
+    return future
+
+def cancelAll(futures):
+    # Drop what hasn't started and wait for the rest so nothing touches the data after we return
+    for future in futures:
+        future.cancel()
+    wait(futures)
+
+def nextTask():
+    # Caller holds CONDITION, largest remaining file first then its largest page
+    group = max([group for group in QUEUES if len(QUEUES[group]) > 0], key=lambda group: REMAINING[group])
+    return group, heapq.heappop(QUEUES[group])
+
+def runWorker():
+    while True:
+        with CONDITION:
+            while not any(QUEUES.values()):
+                CONDITION.wait()
+            group, task = nextTask()
+        negativeWeight, order, future, fn, args = task
+
+        if future.set_running_or_notify_cancel():
+            setContext(group, 'Other')
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        with CONDITION:
+            REMAINING[group] += negativeWeight
+            if len(QUEUES[group]) == 0 and REMAINING[group] <= 0:
+                del QUEUES[group]
+                del REMAINING[group]
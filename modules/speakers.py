@@ -0,0 +1,93 @@
+# Speakers
+# Every distinct speaker name is translated once and the result is reused for every line after it,
+# across files, threads and modules, so a name can't come back spelled differently halfway through a
+# game. Names are saved to speakersFile as they're learned and loaded again on the next run. The file
+# is plain JSON with a section per model and language ({"gpt-4/English": {"アイル": "Aeru"}}), edit it
+# or write one by hand before a run to fix a spelling. Export and estimate runs only read it.
+import json
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from modules import batch
+
+#Globals
+load_dotenv()
+SPEAKERSFILE = os.getenv('speakersFile', 'speakers.json')
+SECTION = os.getenv('model') + '/' + os.getenv('language').capitalize()
+LOCK = threading.Lock()
+SPEAKERS = None # Section -> {Source -> Translation}, the whole file
+NAMES = None    # Source -> Translation, this model and language
+PENDING = {}    # Source -> Event, only one thread translates a new name
+
+def loadSpeakers():
+    # Caller holds LOCK
+    global SPEAKERS, NAMES
+    if NAMES is not None:
+        return
+    SPEAKERS = {}
+    if os.path.exists(SPEAKERSFILE):
+        with open(SPEAKERSFILE, 'r', encoding='utf-8') as f:
+            SPEAKERS.update(json.load(f))
+
+    # A flat file of names from before the sections belongs to the current model and language
+    if any([isinstance(value, str) for value in SPEAKERS.values()]):
+        SPEAKERS = {SECTION: SPEAKERS}
+    NAMES = SPEAKERS.setdefault(SECTION, {})
+
+def saveSpeakers():
+    # Caller holds LOCK, written next to the file and renamed so a crash can't leave half of it
+    with open(SPEAKERSFILE + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(SPEAKERS, f, ensure_ascii=False, indent=4)
+    os.replace(SPEAKERSFILE + '.tmp', SPEAKERSFILE)
+
+def seedSpeakers(names):
+    # Fixed names from the module (glossary Character entries), an entry in speakersFile wins over them
+    # so a spelling fixed by hand there sticks
+    with LOCK:
+        loadSpeakers()
+        for name, speaker in names.items():
+            NAMES.setdefault(name, speaker)
+
+def getSourceLine(text):
+    # A 'Speaker: line' request with the speaker put back to the source name. Exports send the line
+    # before the name is learned and the import run after, both have to find the same memory row
+    index = text.find(': ')
+    if index <= 0:
+        return text
+    with LOCK:
+        loadSpeakers()
+        for source, speaker in NAMES.items():
+            if speaker == text[:index]:
+                return source + text[index:]
+    return text
+
+def translateSpeaker(name, translate, empty, estimate=False):
+    # translate(name) is the module's translateGPT call, empty is its zero token count and estimate
+    # its ESTIMATE flag
+    while True:
+        with LOCK:
+            loadSpeakers()
+            if name in NAMES:
+                return [NAMES[name], empty]
+            event = PENDING.get(name)
+            if event is None:
+                event = PENDING[name] = threading.Event()
+                break
+        # Another thread is translating it, if that one fails this one tries
+        event.wait()
+
+    try:
+        response = translate(name)
+        speaker = response[0].strip().strip('."')
+
+        # Estimates, exports (the source with placeholders) and non Japanese names aren't translations
+        if speaker != name and speaker != '' and not estimate and batch.EXPORT is False:
+            with LOCK:
+                NAMES[name] = speaker
+                saveSpeakers()
+    finally:
+        with LOCK:
+            PENDING.pop(name).set()
+    return [speaker, response[1]]
@@ -0,0 +1,16 @@
+# Run Status
+# Every handler reports files that failed here so the end of a run (and the exit code of a headless
+# run) knows about them, not just the ✗ line printed to the console.
+import threading
+
+#Globals
+LOCK = threading.Lock()
+FAILURES = []  # [Filename, Error]
+
+def addFailure(filename, error):
+    with LOCK:
+        FAILURES.append([filename, str(error)])
+
+def getFailures():
+    with LOCK:
+        return list(FAILURES)
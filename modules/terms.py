@@ -0,0 +1,135 @@
+# Standard Terms
+# RPG Maker MV/MZ ship the same default Japanese System.json terms in almost every game (commands,
+# parameters, battle messages, equipment types). They already have an official translation, so
+# they're filled in from here and never sent. Only games that kept the defaults benefit, anything
+# changed by the developer goes to the API as usual. Set termPack="false" to send everything.
+import os
+
+from dotenv import load_dotenv
+
+#Globals
+load_dotenv()
+TERMPACK = os.getenv('termPack', 'true').lower() in ['true', '1', 'yes']
+LANGUAGE = (os.getenv('language') or '').capitalize()
+
+TERMS = {
+    'English': {
+        # Basic
+        'レベル': 'Level',
+        'ＨＰ': 'HP',
+        'ＭＰ': 'MP',
+        'ＴＰ': 'TP',
+        '経験値': 'EXP',
+
+        # Commands
+        '戦う': 'Fight',
+        '逃げる': 'Escape',
+        '攻撃': 'Attack',
+        '防御': 'Guard',
+        'アイテム': 'Item',
+        'スキル': 'Skill',
+        '装備': 'Equip',
+        'ステータス': 'Status',
+        '並び替え': 'Formation',
+        'セーブ': 'Save',
+        'ゲーム終了': 'Game End',
+        'オプション': 'Options',
+        '武器': 'Weapon',
+        '防具': 'Armor',
+        '大事なもの': 'Key Item',
+        '最強装備': 'Optimize',
+        '全て外す': 'Clear',
+        'ニューゲーム': 'New Game',
+        'コンティニュー': 'Continue',
+        'タイトルへ': 'To Title',
+        'やめる': 'Cancel',
+        '購入する': 'Buy',
+        '売却する': 'Sell',
+
+        # Parameters
+        '最大ＨＰ': 'Max HP',
+        '最大ＭＰ': 'Max MP',
+        '攻撃力': 'Attack',
+        '防御力': 'Defense',
+        '魔法力': 'M.Attack',
+        '魔法防御': 'M.Defense',
+        '敏捷性': 'Agility',
+        '運': 'Luck',
+        '命中率': 'Hit',
+        '回避率': 'Evasion',
+
+        # Types
+        '一般防具': 'General Armor',
+        '魔法防具': 'Magic Armor',
+        '軽装防具': 'Light Armor',
+        '重装防具': 'Heavy Armor',
+        '軽装備': 'Light Armor',
+        '重装備': 'Heavy Armor',
+        '小型盾': 'Small Shield',
+        '大型盾': 'Large Shield',
+        '盾': 'Shield',
+        '頭': 'Head',
+        '身体': 'Body',
+        '装飾品': 'Accessory',
+        '魔法': 'Magic',
+        '必殺技': 'Special',
+
+        # Messages
+        '常時ダッシュ': 'Always Dash',
+        'コマンド記憶': 'Command Remember',
+        'タッチUI': 'Touch UI',
+        'BGM 音量': 'BGM Volume',
+        'BGS 音量': 'BGS Volume',
+        'ME 音量': 'ME Volume',
+        'SE 音量': 'SE Volume',
+        '持っている数': 'Possession',
+        '現在の%1': 'Current %1',
+        '次の%1まで': 'To Next %1',
+        'どのファイルにセーブしますか？': 'Save to which file?',
+        'どのファイルをロードしますか？': 'Load which file?',
+        'ファイル': 'File',
+        'オートセーブ': 'Autosave',
+        '%1たち': "%1's Party",
+        '%1が出現！': '%1 emerged!',
+        '%1は先手を取った！': '%1 got the upper hand!',
+        '%1は不意をつかれた！': '%1 was surprised!',
+        '%1は逃げ出した！': '%1 has started to escape!',
+        'しかし逃げることはできなかった！': 'However, it was unable to escape!',
+        '%1の勝利！': '%1 was victorious!',
+        '%1は戦いに敗れた。': '%1 was defeated',
+        '%1 の%2を獲得！': '%1 %2 received!',
+        'お金を %1\\G 手に入れた！': '%1\\G found!',
+        '%1を手に入れた！': '%1 found!',
+        '%1は%2 %3 に上がった！': '%1 is now %2 %3!',
+        '%1を覚えた！': '%1 learned!',
+        '%1は%2を使った！': '%1 uses %2!',
+        '会心の一撃！！': 'An excellent hit!!',
+        '痛恨の一撃！！': 'A painful blow!!',
+        '%1は %2 のダメージを受けた！': '%1 took %2 damage!',
+        '%1の%2が %3 回復した！': '%1 recovered %2 %3!',
+        '%1の%2が %3 増えた！': '%1 gained %2 %3!',
+        '%1の%2が %3 減った！': '%1 lost %2 %3!',
+        '%1は%2を %3 奪われた！': '%1 was drained of %2 %3!',
+        '%1はダメージを受けていない！': '%1 took no damage!',
+        'ミス！　%1はダメージを受けていない！': 'Miss! %1 took no damage!',
+        '%1に %2 のダメージを与えた！': '%1 took %2 damage!',
+        '%1の%2を %3 奪った！': '%1 was drained of %2 %3!',
+        '%1にダメージを与えられない！': '%1 took no damage!',
+        'ミス！　%1にダメージを与えられない！': 'Miss! %1 took no damage!',
+        '%1は攻撃をかわした！': '%1 evaded the attack!',
+        '%1は魔法を跳ね返した！': '%1 reflected the magic!',
+        '%1は魔法を打ち消した！': '%1 nullified the magic!',
+        '%1の反撃！': '%1 counterattacked!',
+        '%1が%2をかばった！': '%1 protected %2!',
+        '%1の%2が上がった！': "%1's %2 went up!",
+        '%1の%2が下がった！': "%1's %2 went down!",
+        '%1の%2が元に戻った！': "%1's %2 returned to normal!",
+        '%1には効かなかった！': 'There was no effect on %1!',
+    },
+}
+
+def getTerm(text):
+    # Standard translation of a default term, None if it isn't one or the pack is off
+    if TERMPACK is False or not isinstance(text, str):
+        return None
+    return TERMS.get(LANGUAGE, {}).get(text.strip())
@@ -8,14 +8,21 @@ import textwrap
 import threading
 import time
 import traceback
-import tiktoken
 
 from colorama import Fore
 from dotenv import load_dotenv
 import openai
-from retry import retry
 from tqdm import tqdm
 
+from modules.api import createCompletion
+from modules.cache import getCache, setCache
+from modules.estimate import estimateRequest
+from modules.concurrency import getThreads
+from modules.history import History
+from modules.placeholders import COLOR, VAR, Tokenizer
+from modules.retrypolicy import BadTranslation, retryPolicy
+from modules.status import addFailure
+
 #Globals
 load_dotenv()
 if os.getenv('api').replace(' ', '') != '':
@@ -29,11 +36,19 @@ LANGUAGE=os.getenv('language').capitalize()
 
 APICOST = .002 # Depends on the model https://openai.com/pricing
 PROMPT = Path('prompt.txt').read_text(encoding='utf-8')
-THREADS = int(os.getenv('threads'))
+INPUTDIR = os.getenv('inputDir', 'files')
+OUTPUTDIR = os.getenv('outputDir', 'translated')
+THREADS = getThreads('threads')
 LOCK = threading.Lock()
+TOKENIZER = Tokenizer([
+    ['I', r'[\\]+[iI]\[[0-9]+\]'],
+    ['C', COLOR],
+    ['N', r'[\\]+[nN]\[[0-9]+\]'],
+    ['V', VAR],
+    ['F', r'[\\]+[!.]'],
+], '<', '>', '')
 WIDTH = int(os.getenv('width'))
 LISTWIDTH = int(os.getenv('listWidth'))
-MAXHISTORY = 10
 ESTIMATE = ''
 TOTALCOST = 0
 TOKENS = 0
@@ -74,7 +89,7 @@ def handleTXT(filename, estimate):
         return getResultString(['', TOTALTOKENS, None], end - start, 'TOTAL')
     
     else:
-        with open('translated/' + filename, 'w', encoding='UTF-8') as outFile:
+        with open(os.path.join(OUTPUTDIR, filename), 'w', encoding='UTF-8') as outFile:
             start = time.time()
             translatedData = openFiles(filename)
 
@@ -89,7 +104,7 @@ def handleTXT(filename, estimate):
     return getResultString(['', TOTALTOKENS, None], end - start, 'TOTAL')
 
 def openFiles(filename):
-    with open('files/' + filename, 'r', encoding='UTF-8') as f:
+    with open(os.path.join(INPUTDIR, filename), 'r', encoding='UTF-8') as f:
         translatedData = parseText(f, filename)
     
     return translatedData
@@ -109,6 +124,7 @@ def getResultString(translatedData, translationTime, filename):
         try:
             raise translatedData[2]
         except Exception as e:
+            addFailure(filename, e)
             errorString = str(e) + Fore.RED
             return filename + ': ' + tokenString + timeString + Fore.RED + u' \u2717 ' +\
                 errorString + Fore.RESET
@@ -133,31 +149,22 @@ def parseText(data, filename):
     return [response[0], response[1], None]
 
 def translateText(data, pbar):
-    textHistory = []
-    maxHistory = MAXHISTORY
+    textHistory = History()
     tokens = 0
     speaker = ''
     speakerFlag = False
-    currentGroup = []
     syncIndex = 0
 
     for i in range(len(data)):
         if i != syncIndex:
             continue
 
-        match = re.findall(r'm\[[0-9]+\] = \"(.*)\"', data[i])
-        if len(match) > 0:
-            jaString = match[0]
-
-            ### Translate
-            # Remove any textwrap
-            jaString = re.sub(r'\\n', ' ', jaString)
-
+        if re.search(r'm\[[0-9]+\] = \"(.*)\"', data[i]) != None:
             # Grab Speaker
             speakerMatch = re.findall(r's\[[0-9]+\] = \"(.+?)[／\"]', data[i-1])
             if len(speakerMatch) > 0:
                 # If there isn't any Japanese in the text just skip
-                if re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', jaString) and '_' not in speakerMatch[0]:
+                if re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', data[i]) and '_' not in speakerMatch[0]:
                     speaker = ''
                 else:
                     speaker = ''
@@ -165,15 +172,8 @@ def translateText(data, pbar):
                 speaker = ''
 
             # Grab rest of the messages
-            currentGroup.append(jaString)
             start = i
-            data[i] = re.sub(r'(m\[[0-9]+\]) = \"(.+)\"', rf'\1 = ""', data[i])
-            while (len(data) > i+1 and re.search(r'm\[[0-9]+\] = \"(.*)\"', data[i+1]) != None):
-                i+=1
-                match = re.findall(r'm\[[0-9]+\] = \"(.*)\"', data[i])
-                currentGroup.append(match[0])
-                data[i] = re.sub(r'(m\[[0-9]+\]) = \"(.+)\"', rf'\1 = ""', data[i])
-            finalJAString = ' '.join(currentGroup)
+            finalJAString, i = getGroup(data, i)
             
             # Translate
             if speaker != '':
@@ -193,131 +193,50 @@ def translateText(data, pbar):
             elif speakerFlag == False:
                 textHistory.append('\"' + translatedText + '\"')
 
-            # Keep textHistory list at length maxHistory
-            if len(textHistory) > maxHistory:
-                textHistory.pop(0)
-            currentGroup = []  
-
-            # Textwrap
-            translatedText = translatedText.replace('\"', '\\"')
-            translatedText = textwrap.fill(translatedText, width=WIDTH)
-
             # Write
-            textList = translatedText.split("\n")
-            for t in textList:
-                data[start] = re.sub(r'(m\[[0-9]+\]) = \"(.*)\"', rf'\1 = "{t}"', data[start])
-                start+=1
+            setGroup(data, start, i, translatedText)
                 
         syncIndex = i + 1
         pbar.update()
     return [data, tokens]
+
+def getGroup(data, i):
+    # The m[N] lines in a row from i joined up, returns [jaString, index of the last line]
+    match = re.findall(r'm\[[0-9]+\] = \"(.*)\"', data[i])
+
+    # Remove any textwrap
+    currentGroup = [re.sub(r'\\n', ' ', match[0])]
+    while (len(data) > i+1 and re.search(r'm\[[0-9]+\] = \"(.*)\"', data[i+1]) != None):
+        i+=1
+        match = re.findall(r'm\[[0-9]+\] = \"(.*)\"', data[i])
+        currentGroup.append(match[0])
+    return [' '.join(currentGroup), i]
+
+def setGroup(data, start, end, translatedText):
+    # Empty the group and write the wrapped translation over it from the top
+    for i in range(start, end + 1):
+        data[i] = re.sub(r'(m\[[0-9]+\]) = \"(.+)\"', rf'\1 = ""', data[i])
+
+    # Textwrap
+    translatedText = translatedText.replace('\"', '\\"')
+    translatedText = textwrap.fill(translatedText, width=WIDTH)
+
+    textList = translatedText.split("\n")
+    for t in textList:
+        data[start] = re.sub(r'(m\[[0-9]+\]) = \"(.*)\"', rf'\1 = "{t}"', data[start])
+        start+=1
+    return data
         
-def subVars(jaString):
-    jaString = jaString.replace('\u3000', ' ')
-
-    # Icons
-    count = 0
-    iconList = re.findall(r'[\\]+[iI]\[[0-9]+\]', jaString)
-    iconList = set(iconList)
-    if len(iconList) != 0:
-        for icon in iconList:
-            jaString = jaString.replace(icon, '<I' + str(count) + '>')
-            count += 1
-
-    # Colors
-    count = 0
-    colorList = re.findall(r'[\\]+[cC]\[[0-9]+\]', jaString)
-    colorList = set(colorList)
-    if len(colorList) != 0:
-        for color in colorList:
-            jaString = jaString.replace(color, '<C' + str(count) + '>')
-            count += 1
-
-    # Names
-    count = 0
-    nameList = re.findall(r'[\\]+[nN]\[[0-9]+\]', jaString)
-    nameList = set(nameList)
-    if len(nameList) != 0:
-        for name in nameList:
-            jaString = jaString.replace(name, '<N' + str(count) + '>')
-            count += 1
-
-    # Variables
-    count = 0
-    varList = re.findall(r'[\\]+[vV]\[[0-9]+\]', jaString)
-    varList = set(varList)
-    if len(varList) != 0:
-        for var in varList:
-            jaString = jaString.replace(var, '<V' + str(count) + '>')
-            count += 1
-
-    # Formatting
-    count = 0
-    formatList = re.findall(r'[\\]+[!.]', jaString)
-    formatList = set(formatList)
-    if len(formatList) != 0:
-        for format in formatList:
-            jaString = jaString.replace(format, '<F' + str(count) + '>')
-            count += 1
-
-    # Put all lists in list and return
-    allList = [iconList, colorList, nameList, varList, formatList]
-    return [jaString, allList]
-
-def resubVars(translatedText, allList):
-    # Fix Spacing and ChatGPT Nonsense
-    matchList = re.findall(r'<\s?.+?\s?>', translatedText)
-    if len(matchList) > 0:
-        for match in matchList:
-            text = match.strip()
-            translatedText = translatedText.replace(match, text)
-
-    # Icons
-    count = 0
-    if len(allList[0]) != 0:
-        for var in allList[0]:
-            translatedText = translatedText.replace('<I' + str(count) + '>', var)
-            count += 1
-
-    # Colors
-    count = 0
-    if len(allList[1]) != 0:
-        for var in allList[1]:
-            translatedText = translatedText.replace('<C' + str(count) + '>', var)
-            count += 1
-
-    # Names
-    count = 0
-    if len(allList[2]) != 0:
-        for var in allList[2]:
-            translatedText = translatedText.replace('<N' + str(count) + '>', var)
-            count += 1
-
-    # Vars
-    count = 0
-    if len(allList[3]) != 0:
-        for var in allList[3]:
-            translatedText = translatedText.replace('<V' + str(count) + '>', var)
-            count += 1
-    
-    # Formatting
-    count = 0
-    if len(allList[4]) != 0:
-        for var in allList[4]:
-            translatedText = translatedText.replace('<F' + str(count) + '>', var)
-            count += 1
-
-@retry(exceptions=Exception, tries=5, delay=5)
+@retryPolicy
 def translateGPT(t, history, fullPromptFlag):
+    # Sub Vars
+    varResponse = TOKENIZER.subVars(t)
+    subbedT = varResponse[0]
+
     # If ESTIMATE is True just count this as an execution and return.
     if ESTIMATE:
-        enc = tiktoken.encoding_for_model(MODEL)
-        tokens = len(enc.encode(t)) * 2 + len(enc.encode(str(history))) + len(enc.encode(PROMPT))
+        tokens = sum(estimateRequest(t, history, subbedT))
         return (t, tokens)
-    
-    # Sub Vars
-    varResponse = subVars(t)
-    subbedT = varResponse[0]
 
     # If there isn't any Japanese in the text just skip
     if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴ]+|[\uFF00-\uFFEF]', subbedT):
@@ -352,21 +271,28 @@ def translateGPT(t, history, fullPromptFlag):
         msg.append({"role": "user", "content": history})
     msg.append({"role": "user", "content": user})
 
-    response = openai.ChatCompletion.create(
-        temperature=0.1,
-        frequency_penalty=0.2,
-        presence_penalty=0.2,
-        model=MODEL,
-        messages=msg,
-        request_timeout=TIMEOUT,
-    )
-
-    # Save Translated Text
-    translatedText = response.choices[0].message.content
-    tokens = response.usage.total_tokens
+    # Translation Memory
+    cachedText = getCache(subbedT, system, history, msg)
+    if cachedText is not None:
+        translatedText = cachedText
+        tokens = 0
+    else:
+        response = createCompletion(
+            temperature=0.1,
+            frequency_penalty=0.2,
+            presence_penalty=0.2,
+            model=MODEL,
+            messages=msg,
+            request_timeout=TIMEOUT,
+        )
+
+        # Save Translated Text
+        translatedText = response.choices[0].message.content
+        tokens = response.usage.total_tokens
+    rawText = translatedText
 
     # Resub Vars
-    translatedText = resubVars(translatedText, varResponse[1])
+    translatedText = TOKENIZER.resubVars(translatedText, varResponse[1])
 
     # Remove Placeholder Text
     translatedText = translatedText.replace(LANGUAGE +' Translation: ', '')
@@ -384,6 +310,7 @@ def translateGPT(t, history, fullPromptFlag):
 
     # Return Translation
     if len(translatedText) > 15 * len(t) or "I'm sorry, but I'm unable to assist with that translation" in translatedText:
-        raise Exception
+        raise BadTranslation('Bad reply: ' + translatedText[:100])
     else:
+        setCache(subbedT, system, history, rawText)
         return [translatedText, tokens]
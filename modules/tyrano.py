@@ -7,12 +7,19 @@ import traceback
 from pathlib import Path
 
 import openai
-import tiktoken
 from colorama import Fore
 from dotenv import load_dotenv
-from retry import retry
 from tqdm import tqdm
 
+from modules.api import createCompletion
+from modules.cache import getCache, setCache
+from modules.estimate import estimateRequest
+from modules.concurrency import getThreads
+from modules.history import History
+from modules.placeholders import DEFAULT, Tokenizer
+from modules.retrypolicy import BadTranslation, retryPolicy
+from modules.status import addFailure
+
 # Open AI
 load_dotenv()
 if os.getenv("api").replace(" ", "") != "":
@@ -27,14 +34,16 @@ LANGUAGE = os.getenv("language").capitalize()
 INPUTAPICOST = 0.002  # Depends on the model https://openai.com/pricing
 OUTPUTAPICOST = 0.002
 PROMPT = Path("prompt.txt").read_text(encoding="utf-8")
-THREADS = int(
-    os.getenv("threads")
+INPUTDIR = os.getenv("inputDir", "files")
+OUTPUTDIR = os.getenv("outputDir", "translated")
+THREADS = getThreads(
+    "threads"
 )  # Controls how many threads are working on a single file (May have to drop this)
 LOCK = threading.Lock()
+TOKENIZER = Tokenizer(DEFAULT)
 WIDTH = int(os.getenv("width"))
 LISTWIDTH = int(os.getenv("listWidth"))
 NOTEWIDTH = 40
-MAXHISTORY = 10
 ESTIMATE = ""
 totalTokens = [0, 0]
 NAMESLIST = []
@@ -73,7 +82,7 @@ def handleTyrano(filename, estimate):
 
     else:
         try:
-            with open("translated/" + filename, "w", encoding="utf-8") as outFile:
+            with open(os.path.join(OUTPUTDIR, filename), "w", encoding="utf-8") as outFile:
                 start = time.time()
                 translatedData = openFiles(filename)
                 outFile.writelines(translatedData[0])
@@ -84,8 +93,9 @@ def handleTyrano(filename, estimate):
                 with LOCK:
                     totalTokens[0] += translatedData[1][0]
                     totalTokens[1] += translatedData[1][1]
-        except Exception:
+        except Exception as e:
             traceback.print_exc()
+            addFailure(filename, e)
             return "Fail"
 
     return getResultString(["", totalTokens, None], end - start, "TOTAL")
@@ -121,6 +131,7 @@ def getResultString(translatedData, translationTime, filename):
         try:
             raise translatedData[2]
         except Exception as e:
+            addFailure(filename, e)
             errorString = str(e) + Fore.RED
             return (
                 filename
@@ -135,7 +146,7 @@ def getResultString(translatedData, translationTime, filename):
 
 
 def openFiles(filename):
-    with open("files/" + filename, "r", encoding="utf-8") as readFile:
+    with open(os.path.join(INPUTDIR, filename), "r", encoding="utf-8") as readFile:
         translatedData = parseTyrano(readFile, filename)
 
         # Delete lines marked for deletion
@@ -173,8 +184,7 @@ def parseTyrano(readFile, filename):
 
 
 def translateTyrano(data, pbar):
-    textHistory = []
-    maxHistory = MAXHISTORY
+    textHistory = History()
     tokens = [0, 0]
     currentGroup = []
     syncIndex = 0
@@ -195,10 +205,7 @@ def translateTyrano(data, pbar):
         # If there isn't any Japanese in the text just skip
         if IGNORETLTEXT is True:
             if not re.search(r'[一-龠]+|[ぁ-ゔ]+|[ァ-ヴー]+', data[i]):
-                # Keep textHistory list at length maxHistory
                 textHistory.append('\"' + data[i] + '\"')
-                if len(textHistory) > maxHistory:
-                    textHistory.pop(0)
                 currentGroup = []  
                 continue
 
@@ -295,14 +302,14 @@ def translateTyrano(data, pbar):
 
             # Check Speaker
             if speaker == "":
-                response = translateGPT(finalJAString, textHistory, True)
+                response = translateGPT(finalJAString, list(textHistory), True)
                 tokens[0] += response[1][0]
                 tokens[1] += response[1][1]
                 translatedText = response[0]
                 textHistory.append('"' + translatedText + '"')
             else:
                 response = translateGPT(
-                    speaker + ": " + finalJAString, textHistory, True
+                    speaker + ": " + finalJAString, list(textHistory), True
                 )
                 tokens[0] += response[1][0]
                 tokens[1] += response[1][1]
@@ -357,9 +364,6 @@ def translateTyrano(data, pbar):
                     data.insert(i, line.strip() + '[p][cm]\n')
                     i+=1
 
-            # Keep textHistory list at length maxHistory
-            if len(textHistory) > maxHistory:
-                textHistory.pop(0)
             currentGroup = []
             speaker = ""
 
@@ -370,131 +374,10 @@ def translateTyrano(data, pbar):
             break
     return tokens
 
-def subVars(jaString):
-    jaString = jaString.replace("\u3000", " ")
-
-    # Nested
-    count = 0
-    nestedList = re.findall(r"[\\]+[\w]+\[[\\]+[\w]+\[[0-9]+\]\]", jaString)
-    nestedList = set(nestedList)
-    if len(nestedList) != 0:
-        for icon in nestedList:
-            jaString = jaString.replace(icon, "{Nested_" + str(count) + "}")
-            count += 1
-
-    # Icons
-    count = 0
-    iconList = re.findall(r"[\\]+[iIkKwWaA]+\[[0-9]+\]", jaString)
-    iconList = set(iconList)
-    if len(iconList) != 0:
-        for icon in iconList:
-            jaString = jaString.replace(icon, "{Ascii_" + str(count) + "}")
-            count += 1
-
-    # Colors
-    count = 0
-    colorList = re.findall(r"[\\]+[cC]\[[0-9]+\]", jaString)
-    colorList = set(colorList)
-    if len(colorList) != 0:
-        for color in colorList:
-            jaString = jaString.replace(color, "{Color_" + str(count) + "}")
-            count += 1
-
-    # Names
-    count = 0
-    nameList = re.findall(r"[\\]+[nN]\[.+?\]+", jaString)
-    nameList = set(nameList)
-    if len(nameList) != 0:
-        for name in nameList:
-            jaString = jaString.replace(name, "{N_" + str(count) + "}")
-            count += 1
-
-    # Variables
-    count = 0
-    varList = re.findall(r"[\\]+[vV]\[[0-9]+\]", jaString)
-    varList = set(varList)
-    if len(varList) != 0:
-        for var in varList:
-            jaString = jaString.replace(var, "{Var_" + str(count) + "}")
-            count += 1
-
-    # Formatting
-    count = 0
-    if "笑えるよね." in jaString:
-        print("t")
-    formatList = re.findall(r"[\\]+[\w]+\[.+?\]", jaString)
-    formatList = set(formatList)
-    if len(formatList) != 0:
-        for var in formatList:
-            jaString = jaString.replace(var, "{FCode_" + str(count) + "}")
-            count += 1
-
-    # Put all lists in list and return
-    allList = [nestedList, iconList, colorList, nameList, varList, formatList]
-    return [jaString, allList]
-
-
-def resubVars(translatedText, allList):
-    # Fix Spacing and ChatGPT Nonsense
-    matchList = re.findall(r"\[\s?.+?\s?\]", translatedText)
-    if len(matchList) > 0:
-        for match in matchList:
-            text = match.strip()
-            translatedText = translatedText.replace(match, text)
-
-    # Nested
-    count = 0
-    if len(allList[0]) != 0:
-        for var in allList[0]:
-            translatedText = translatedText.replace("{Nested_" + str(count) + "}", var)
-            count += 1
-
-    # Icons
-    count = 0
-    if len(allList[1]) != 0:
-        for var in allList[1]:
-            translatedText = translatedText.replace("{Ascii_" + str(count) + "}", var)
-            count += 1
-
-    # Colors
-    count = 0
-    if len(allList[2]) != 0:
-        for var in allList[2]:
-            translatedText = translatedText.replace("{Color_" + str(count) + "}", var)
-            count += 1
-
-    # Names
-    count = 0
-    if len(allList[3]) != 0:
-        for var in allList[3]:
-            translatedText = translatedText.replace("{N_" + str(count) + "}", var)
-            count += 1
-
-    # Vars
-    count = 0
-    if len(allList[4]) != 0:
-        for var in allList[4]:
-            translatedText = translatedText.replace("{Var_" + str(count) + "}", var)
-            count += 1
-
-    # Formatting
-    count = 0
-    if len(allList[5]) != 0:
-        for var in allList[5]:
-            translatedText = translatedText.replace("{FCode_" + str(count) + "}", var)
-            count += 1
-
-    # Remove Color Variables Spaces
-    # if '\\c' in translatedText:
-    #     translatedText = re.sub(r'\s*(\\+c\[[1-9]+\])\s*', r' \1', translatedText)
-    #     translatedText = re.sub(r'\s*(\\+c\[0+\])', r'\1', translatedText)
-    return translatedText
-
-
-@retry(exceptions=Exception, tries=5, delay=5)
+@retryPolicy
 def translateGPT(t, history, fullPromptFlag):
     # Sub Vars
-    varResponse = subVars(t)
+    varResponse = TOKENIZER.subVars(t)
     subbedT = varResponse[0]
 
     # If there isn't any Japanese in the text just skip
@@ -503,19 +386,7 @@ def translateGPT(t, history, fullPromptFlag):
 
     # If ESTIMATE is True just count this as an execution and return.
     if ESTIMATE:
-        enc = tiktoken.encoding_for_model(MODEL)
-        historyRaw = ""
-        if isinstance(history, list):
-            for line in history:
-                historyRaw += line
-        else:
-            historyRaw = history
-
-        inputTotalTokens = len(enc.encode(historyRaw)) + len(enc.encode(PROMPT))
-        outputTotalTokens = (
-            len(enc.encode(t)) * 2
-        )  # Estimating 2x the size of the original text
-        totalTokens = [inputTotalTokens, outputTotalTokens]
+        totalTokens = estimateRequest(t, history, subbedT)
         return (t, totalTokens)
 
     # Characters
@@ -548,21 +419,28 @@ def translateGPT(t, history, fullPromptFlag):
         msg.append({"role": "user", "content": history})
     msg.append({"role": "user", "content": user})
 
-    response = openai.ChatCompletion.create(
-        temperature=0,
-        frequency_penalty=0.2,
-        presence_penalty=0.2,
-        model=MODEL,
-        messages=msg,
-        request_timeout=TIMEOUT,
-    )
+    # Translation Memory
+    cachedText = getCache(subbedT, system, history, msg)
+    if cachedText is not None:
+        translatedText = cachedText
+        totalTokens = [0, 0]
+    else:
+        response = createCompletion(
+            temperature=0,
+            frequency_penalty=0.2,
+            presence_penalty=0.2,
+            model=MODEL,
+            messages=msg,
+            request_timeout=TIMEOUT,
+        )
 
-    # Save Translated Text
-    translatedText = response.choices[0].message.content
-    totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+        # Save Translated Text
+        translatedText = response.choices[0].message.content
+        totalTokens = [response.usage.prompt_tokens, response.usage.completion_tokens]
+    rawText = translatedText
 
     # Resub Vars
-    translatedText = resubVars(translatedText, varResponse[1])
+    translatedText = TOKENIZER.resubVars(translatedText, varResponse[1])
 
     # Remove Placeholder Text
     translatedText = translatedText.replace(LANGUAGE + " Translation: ", "")
@@ -588,6 +466,7 @@ def translateGPT(t, history, fullPromptFlag):
         len(translatedText) > 15 * len(t)
         or "I'm sorry, but I'm unable to assist with that translation" in translatedText
     ):
-        raise Exception
+        raise BadTranslation("Bad reply: " + translatedText[:100])
     else:
+        setCache(subbedT, system, history, rawText)
         return [translatedText, totalTokens]
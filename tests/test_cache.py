@@ -0,0 +1,97 @@
+import copy
+import io
+import json
+import os
+
+import pytest
+
+# Settings the handlers read on import
+for key, value in [['api', ''], ['key', ''], ['org', ''], ['model', 'gpt-3.5-turbo'], ['language', 'English'],
+    ['timeout', '30'], ['width', '60'], ['listWidth', '100'], ['threads', '4'], ['fileThreads', '1'], ['cache', 'false'], ['journal', 'false']]:
+    os.environ.setdefault(key, value)
+
+CALLS = []
+
+@pytest.fixture(autouse=True)
+def project(tmp_path, monkeypatch):
+    # A fresh Translation Memory and speakers.json in the project folder, the modules read prompt.txt on import
+    (tmp_path / 'prompt.txt').write_text('Translate.', encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    from modules import cache, speakers
+    monkeypatch.setattr(cache, 'CACHE', True)
+    monkeypatch.setattr(cache, 'CACHEFILE', str(tmp_path / 'translationMemory.db'))
+    monkeypatch.setattr(cache, 'CONNECTION', None)
+    monkeypatch.setattr(speakers, 'SPEAKERSFILE', str(tmp_path / 'speakers.json'))
+    monkeypatch.setattr(speakers, 'SPEAKERS', None)
+    monkeypatch.setattr(speakers, 'NAMES', None)
+    CALLS.clear()
+
+def noCall(**kwargs):
+    CALLS.append(kwargs['messages'][-1]['content'])
+    raise AssertionError('Called the API')
+
+def getReply(content):
+    line = content.replace('Line to Translate = ', '')
+    if line == 'アイル':
+        return 'Aeru'
+    if line.startswith('アイル: '):
+        return 'Aeru: Hello'
+    return 'Hello'
+
+def answerRequests():
+    # Stands in for the Batch API, every request in requests.jsonl gets a reply in results.jsonl
+    from modules import batch
+    with open(batch.REQUESTFILE, 'r', encoding='utf-8') as f, open(batch.RESULTFILE, 'w', encoding='utf-8') as outFile:
+        for line in f:
+            request = json.loads(line)
+            content = getReply(request['body']['messages'][-1]['content'])
+            outFile.write(json.dumps({'custom_id': request['custom_id'], 'response': {'status_code': 200, 'body': {
+                'choices': [{'message': {'content': content}}], 'usage': {'prompt_tokens': 1, 'completion_tokens': 1}}}}) + '\n')
+
+def roundTrip(run):
+    # Export, answer and import, then the normal run has to build everything from the memory
+    from modules import batch, cache
+    batch.startExport()
+    try:
+        run()
+    finally:
+        requests = batch.stopExport()
+    answerRequests()
+    imported, missing, rejected, tokens = cache.importResults()
+    assert [imported, missing, rejected] == [requests, 0, 0]
+    return run()
+
+def test_mvmz_import_needs_no_calls(monkeypatch):
+    from modules import rpgmakermvmz
+    monkeypatch.setattr(rpgmakermvmz, 'createCompletion', noCall)
+    page = {'list': [
+        {'code': 401, 'indent': 0, 'parameters': ['\\n<アイル>こんにちは']},
+        {'code': 101, 'indent': 0, 'parameters': ['', 0, 0, 2]},
+        {'code': 401, 'indent': 0, 'parameters': ['元気？']},
+        {'code': 102, 'indent': 0, 'parameters': [['はい', 'いいえ'], 1, 0, 2, 0]},
+        {'code': 0, 'indent': 0, 'parameters': []},
+    ]}
+
+    def run():
+        data = copy.deepcopy(page)
+        with io.StringIO() as f:
+            rpgmakermvmz.searchCodes(data, rpgmakermvmz.tqdm(file=f), 'Map001.json/1/0')
+        return data
+
+    data = roundTrip(run)
+    assert CALLS == []
+    assert [command['parameters'][0] for command in data['list'] if command['code'] == 401] == ['\\n<Aeru>Hello', 'Hello']
+    assert data['list'][3]['parameters'][0] == ['Hello', 'Hello']
+
+def test_txt_import_needs_no_calls(monkeypatch):
+    from modules import txt
+    monkeypatch.setattr(txt, 'createCompletion', noCall)
+    lines = ['m[0] = "こんにちは"\n', 'x\n', 'm[1] = "元気？"\n', 'x\n', 'm[2] = "さようなら"\n']
+
+    def run():
+        with io.StringIO() as f:
+            return txt.translateText(list(lines), txt.tqdm(file=f))
+
+    data, tokens = roundTrip(run)
+    assert CALLS == []
+    assert data == ['m[0] = "Hello"\n', 'x\n', 'm[1] = "Hello"\n', 'x\n', 'm[2] = "Hello"\n']
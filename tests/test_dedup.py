@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+import openai
+
+# Settings the Translation Memory reads on import
+for key, value in [['api', ''], ['key', ''], ['org', ''], ['model', 'gpt-3.5-turbo'], ['language', 'English'],
+    ['timeout', '30'], ['cache', 'false']]:
+    os.environ.setdefault(key, value)
+
+from modules import dedup, retrypolicy
+from modules.retrypolicy import retryPolicy
+
+def test_failed_request_wakes_the_waiters(monkeypatch):
+    monkeypatch.setattr(retrypolicy, 'TRIES', 1)
+    monkeypatch.setattr(dedup, 'DEDUP', True)
+    monkeypatch.setattr(dedup, 'WAIT', 60)
+    claimed = threading.Event()
+    results = []
+
+    @retryPolicy
+    def translateGPT():
+        dedup.claim('key')
+        claimed.set()
+        time.sleep(0.1)
+        raise openai.error.Timeout('timeout')
+
+    def wait():
+        claimed.wait()
+        start = time.monotonic()
+        results.append([dedup.claim('key'), time.monotonic() - start])
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    try:
+        translateGPT()
+    except openai.error.Timeout:
+        pass
+    waiter.join()
+
+    # The waiter gets the key to send itself instead of sitting out the 60 seconds
+    assert results[0][0] is None
+    assert results[0][1] < 5
+    assert dedup.INFLIGHT['key'][0] == waiter.ident
+    dedup.release('key', 'Hello')
+
+def test_context_does_not_split_a_string(tmp_path, monkeypatch):
+    (tmp_path / 'prompt.txt').write_text('Translate.', encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    from modules import cache
+    monkeypatch.setattr(cache, 'CACHE', False)
+    monkeypatch.setattr(dedup, 'DEDUP', True)
+    monkeypatch.setattr(dedup, 'SAVED', [0, 0, 0])
+    results = []
+
+    # The same choice after two different lines
+    def getHistory(line):
+        return 'Keep your translation as brief as possible. Previous text for context: ' + line + '\n\nReply in the style of a dialogue option.'
+
+    assert cache.getCache('はい', 'Translate.', getHistory('"Hello"')) is None
+    waiter = threading.Thread(target=lambda: results.append(cache.getCache('はい', 'Translate.', getHistory('"Bye"'))))
+    waiter.start()
+    time.sleep(0.1)
+    cache.setCache('はい', 'Translate.', getHistory('"Hello"'), 'Yes')
+    waiter.join()
+    assert results == ['Yes']
+    assert dedup.SAVED[0] == 1
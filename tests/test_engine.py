@@ -0,0 +1,56 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# Settings the handlers read on import
+for key, value in [['api', ''], ['key', ''], ['org', ''], ['model', 'gpt-3.5-turbo'], ['language', 'English'],
+    ['timeout', '30'], ['width', '60'], ['listWidth', '100'], ['threads', '4'], ['fileThreads', '1'], ['cache', 'false'], ['journal', 'false']]:
+    os.environ.setdefault(key, value)
+
+@pytest.fixture(autouse=True)
+def project(tmp_path, monkeypatch):
+    # The handler reads prompt.txt from the project folder
+    (tmp_path / 'prompt.txt').write_text('Translate.', encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+
+def getResponse(content):
+    usage = SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+def useAsyncEngine(monkeypatch, reply):
+    # Every request takes 0.2 seconds on the engine loop, returns [in flight, most in flight]
+    from modules import engine
+    inflight = [0, 0]
+
+    async def acreate(**kwargs):
+        inflight[0] += 1
+        inflight[1] = max(inflight[1], inflight[0])
+        await asyncio.sleep(0.2)
+        inflight[0] -= 1
+        return getResponse(reply(kwargs['messages'][-1]['content']))
+
+    monkeypatch.setattr(engine, 'ENGINE', 'async')
+    monkeypatch.setattr(engine, 'acreate', acreate)
+    return inflight
+
+def test_list_goes_out_together(monkeypatch):
+    from modules import api
+    inflight = useAsyncEngine(monkeypatch, lambda content: content)
+    responses = api.createCompletions([{'model': 'gpt-3.5-turbo', 'messages': [{'role': 'user', 'content': str(k)}]} for k in range(20)])
+    assert [response.choices[0].message.content for response in responses] == [str(k) for k in range(20)]
+    assert inflight[1] == 20
+
+def test_record_fallback_goes_out_together(monkeypatch):
+    from modules import rpgmakermvmz
+    inflight = useAsyncEngine(monkeypatch, lambda content: 'Translation: Name ' + content[-1])
+
+    # The record reply is missing a key, so every field is redone on its own
+    monkeypatch.setattr(rpgmakermvmz, 'createCompletion', lambda **kwargs: getResponse(json.dumps({'0/name': 'Sword'})))
+    fields = {str(k) + '/name': ['剣' + str(k), 'Reply with only the English translation of the RPG item name'] for k in range(5)}
+    translations, tokens = rpgmakermvmz.translateRecord(fields)
+    assert translations == {str(k) + '/name': 'Name ' + str(k) for k in range(5)}
+    assert tokens == [1 + 5, 1 + 5]
+    assert inflight[1] == 5
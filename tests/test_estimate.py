@@ -0,0 +1,36 @@
+import io
+import os
+
+import pytest
+
+# Settings the handlers read on import
+for key, value in [['api', ''], ['key', ''], ['org', ''], ['model', 'gpt-3.5-turbo'], ['language', 'English'],
+    ['timeout', '30'], ['width', '60'], ['listWidth', '100'], ['threads', '4'], ['fileThreads', '1'], ['cache', 'false'], ['journal', 'false']]:
+    os.environ.setdefault(key, value)
+
+@pytest.fixture(autouse=True)
+def project(tmp_path, monkeypatch):
+    # The handler reads prompt.txt from the project folder
+    (tmp_path / 'prompt.txt').write_text('Translate.', encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+
+def noCall(**kwargs):
+    raise AssertionError('Estimate mode called the API')
+
+def test_estimate_counts_tokens_without_calling():
+    from modules import txt
+    lines = ['s[0] = "アイル"\n', 'm[0] = "こんにちは\\\\C[2]世界"\n', 'm[1] = "元気？"\n']
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(txt, 'ESTIMATE', True)
+        patch.setattr(txt, 'createCompletion', noCall)
+        with io.StringIO() as f:
+            data, tokens = txt.translateText(list(lines), txt.tqdm(file=f))
+    assert tokens > 0
+
+def test_estimate_groups_a_string_across_contexts(monkeypatch):
+    from modules import dedup
+    from modules.estimate import estimateRequest
+    monkeypatch.setattr(dedup, 'GROUPS', {})
+    for line in ['"Hello"', '"Bye"']:
+        estimateRequest('はい', 'Keep your translation as brief as possible. Previous text for context: ' + line + '\n\nReply in the style of a dialogue option.')
+    assert [group[0] for group in dedup.GROUPS.values()] == [2]
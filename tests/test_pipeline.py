@@ -0,0 +1,86 @@
+import io
+import json
+import os
+
+import pytest
+
+# Settings the pipeline and the MV/MZ handler read on import
+for key, value in [['api', ''], ['key', ''], ['org', ''], ['model', 'gpt-3.5-turbo'], ['language', 'English'],
+    ['timeout', '30'], ['width', '60'], ['listWidth', '100'], ['threads', '4'], ['fileThreads', '1'], ['cache', 'false'], ['journal', 'false']]:
+    os.environ.setdefault(key, value)
+
+from modules import pipeline
+
+@pytest.fixture(autouse=True)
+def project(tmp_path, monkeypatch):
+    # The handler reads prompt.txt from the project folder
+    (tmp_path / 'prompt.txt').write_text('Translate.', encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+
+def getPage():
+    return {'list': [
+        {'code': 101, 'indent': 0, 'parameters': ['', 0, 0, 2, 'アイル']},
+        {'code': 401, 'indent': 0, 'parameters': ['こんにちは']},
+        {'code': 101, 'indent': 0, 'parameters': ['', 0, 0, 2, 'アイル']},
+        {'code': 401, 'indent': 0, 'parameters': ['元気？']},
+        {'code': 0, 'indent': 0, 'parameters': []},
+    ]}
+
+def getUnits(filename, data):
+    lines = io.StringIO(''.join([json.dumps(unit, ensure_ascii=False) + '\n' for unit in pipeline.extractMVMZ(filename, data)]))
+    return [unit for group in pipeline.readGroups(lines) for unit in group]
+
+def test_event_page_is_one_unit():
+    data = {'displayName': '町', 'events': [None, {'id': 1, 'note': '', 'pages': [getPage()]}]}
+    units = getUnits('Map001.json', data)
+    assert [[unit['kind'], unit['path']] for unit in units] == [['location', ['displayName']], ['page', ['events', 1, 'pages', 0]]]
+    assert units[1]['value'] == getPage()
+    assert units[1]['context'] == 'Map001.json/1/0'
+
+def test_page_is_translated_by_the_handler(monkeypatch):
+    from modules import rpgmakermvmz
+    monkeypatch.setattr(rpgmakermvmz, 'translateGPT', lambda t, history, fullPromptFlag: ['Hello', [1, 1]])
+    data = {'displayName': '', 'events': [None, {'id': 1, 'note': '', 'pages': [getPage()]}]}
+    unit = getUnits('Map001.json', data)[0]
+    unit['id'] = 0
+    with io.StringIO() as f:
+        value, tokens = pipeline.translateMVMZ(unit, [], pipeline.tqdm(file=f))
+    pipeline.injectMVMZ(data, {'path': unit['path'], 'kind': unit['kind'], 'value': value})
+    assert [command['parameters'][0] for command in data['events'][1]['pages'][0]['list'] if command['code'] == 401] == ['Hello', 'Hello']
+    assert tokens == [2, 2]
+
+def test_records_go_back_by_index():
+    data = [None, {'id': 1, 'name': 'アイル'}, None, {'id': 3, 'name': 'リラ'}]
+    units = getUnits('Actors.json', data)
+    assert [[unit['kind'], unit['path'], unit['context']] for unit in units] == [['names', [1], 'Actors'], ['names', [3], 'Actors']]
+    for unit in units:
+        data = pipeline.injectMVMZ(data, {'path': unit['path'], 'kind': unit['kind'], 'value': [{'id': unit['path'][0], 'name': 'Name'}]})
+    assert data == [None, {'id': 1, 'name': 'Name'}, None, {'id': 3, 'name': 'Name'}]
+
+def test_txt_matches_the_handler(monkeypatch):
+    from modules import txt
+    monkeypatch.setattr(txt, 'translateGPT', lambda t, history, fullPromptFlag: ['Aeru: "Hi" ' + str(len(history)), 1])
+    lines = ['s[0] = "アイル"\n', 'm[0] = "こんにちは\\n世界"\n', 'm[1] = "元気？"\n', 'x\n', 'm[2] = "\\"はい\\""\n']
+    os.makedirs('files')
+    with open(os.path.join('files', 'Text001.txt'), 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+
+    assert pipeline.extractFiles('txt', 'files', 'pipeline') == 2
+    with open(pipeline.getUnitFile('pipeline'), 'r', encoding='utf-8') as f:
+        assert [unit['value'] for group in pipeline.readGroups(f) for unit in group] == ['こんにちは 世界 元気？', '\\"はい\\"']
+    pipeline.translateUnits(pipeline.getTXTTranslator(), 1, 'pipeline')
+    pipeline.injectFiles('txt', 'files', 'translated', 'pipeline')
+    with open(os.path.join('translated', 'Text001.txt'), 'r', encoding='utf-8') as f:
+        with io.StringIO() as bar:
+            assert f.readlines() == txt.translateText(list(lines), txt.tqdm(file=bar))[0]
+
+def test_name_tag_in_a_multi_line_box(monkeypatch):
+    from modules import rpgmakermvmz
+    monkeypatch.setattr(rpgmakermvmz, 'translateGPT', lambda t, history, fullPromptFlag: ['Aeru' if t == 'アイル' else 'Hello', [1, 1]])
+    monkeypatch.setattr(rpgmakermvmz, 'getSpeaker', lambda name: ['Aeru', [1, 1]])
+    for lines, expected in [[2, ['\\n<Aeru>Hello']], [3, ['\\n<Aeru>', 'Hello']]]:
+        page = {'list': [{'code': 401, 'indent': 0, 'parameters': ['\\n<アイル>こんにちは']}] + \
+            [{'code': 401, 'indent': 0, 'parameters': ['元気？']} for k in range(lines - 1)] + [{'code': 0, 'indent': 0, 'parameters': []}]}
+        with io.StringIO() as f:
+            rpgmakermvmz.searchCodes(page, pipeline.tqdm(file=f), 'Map001.json/1/0')
+        assert [command['parameters'][0] for command in page['list'] if command['code'] == 401] == expected
@@ -0,0 +1,32 @@
+import openai
+
+from modules import retrypolicy
+from modules.retrypolicy import retryPolicy
+
+def test_nested_calls_are_retried_once(monkeypatch):
+    monkeypatch.setattr(retrypolicy.time, 'sleep', lambda seconds: None)
+    calls = {'line': 0, 'batch': 0}
+
+    @retryPolicy
+    def translateLine():
+        calls['line'] += 1
+        raise openai.error.Timeout('timeout')
+
+    @retryPolicy
+    def translateBatch():
+        calls['batch'] += 1
+        return translateLine()
+
+    try:
+        translateBatch()
+    except openai.error.Timeout:
+        pass
+    assert calls == {'line': retrypolicy.TRIES, 'batch': retrypolicy.TRIES}
+
+    # The next call on the thread retries on its own again
+    calls['line'] = 0
+    try:
+        translateLine()
+    except openai.error.Timeout:
+        pass
+    assert calls['line'] == retrypolicy.TRIES
@@ -0,0 +1,39 @@
+import json
+import os
+
+for key, value in [['model', 'gpt-3.5-turbo'], ['language', 'English']]:
+    os.environ.setdefault(key, value)
+
+from modules import batch, speakers
+
+def useFile(monkeypatch, path, data=None):
+    if data is not None:
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(speakers, 'SPEAKERSFILE', str(path))
+    monkeypatch.setattr(speakers, 'SPEAKERS', None)
+    monkeypatch.setattr(speakers, 'NAMES', None)
+
+def test_names_are_kept_per_model_and_language(tmp_path, monkeypatch):
+    useFile(monkeypatch, tmp_path / 'speakers.json', {'gpt-4/German': {'アイル': 'Aeru'}})
+    assert speakers.translateSpeaker('アイル', lambda name: ['Ail', [1, 1]], [0, 0]) == ['Ail', [1, 1]]
+    data = json.loads((tmp_path / 'speakers.json').read_text(encoding='utf-8'))
+    assert data == {'gpt-4/German': {'アイル': 'Aeru'}, speakers.SECTION: {'アイル': 'Ail'}}
+
+def test_export_and_estimate_are_not_saved(tmp_path, monkeypatch):
+    useFile(monkeypatch, tmp_path / 'speakers.json')
+    monkeypatch.setattr(batch, 'EXPORT', True)
+    assert speakers.translateSpeaker('リラ', lambda name: ['<N_1>リラ', [0, 0]], [0, 0])[0] == '<N_1>リラ'
+    monkeypatch.setattr(batch, 'EXPORT', False)
+    assert speakers.translateSpeaker('リラ', lambda name: ['Lira?', [0, 0]], [0, 0], True)[0] == 'Lira?'
+    assert speakers.translateSpeaker('リラ', lambda name: ['Lira', [1, 1]], [0, 0]) == ['Lira', [1, 1]]
+    assert speakers.NAMES == {'リラ': 'Lira'}
+
+def test_flat_file_belongs_to_the_current_section(tmp_path, monkeypatch):
+    useFile(monkeypatch, tmp_path / 'speakers.json', {'アイル': 'Aeru'})
+    assert speakers.translateSpeaker('アイル', lambda name: ['Ail', [1, 1]], [0, 0]) == ['Aeru', [0, 0]]
+
+def test_file_wins_over_the_seed(tmp_path, monkeypatch):
+    useFile(monkeypatch, tmp_path / 'speakers.json', {speakers.SECTION: {'アイル': 'Airu'}})
+    speakers.seedSpeakers({'アイル': 'Aeru', 'リラ': 'Lira'})
+    assert speakers.translateSpeaker('アイル', lambda name: ['Ail', [1, 1]], [0, 0]) == ['Airu', [0, 0]]
+    assert speakers.NAMES == {'アイル': 'Airu', 'リラ': 'Lira'}